@@ -0,0 +1,219 @@
+"""Token-budgeted prompt context: retrieved documents and conversation history
+
+Keeps the prompt length (and so the Ollama prefill time) bounded: documents
+are cleaned of markup, near-duplicates are dropped, long answers are trimmed
+to the passages closest to the question, and only the most recent
+conversation turns are kept.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from core.config import get_settings
+from tools.bm25 import tokenize
+from tools.document_loader import clean_html
+
+# Rough characters-per-token ratio of gemma2 on French text (kept on the safe side)
+CHARS_PER_TOKEN = 3.5
+# Documents are never trimmed below this many tokens
+MIN_DOC_TOKENS = 60
+TRIM_MARKER = "[…]"
+
+_PASSAGE_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens of a text (no tokenizer round-trip)"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut a text to about `max_tokens`, on a word boundary"""
+    max_chars = int(max_tokens * CHARS_PER_TOKEN)
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars].rsplit(" ", 1)[0] + " " + TRIM_MARKER
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _split_document(content: str):
+    """Split a document into its header (school, theme, question) and answer body"""
+    head, sep, body = content.partition("Réponse:")
+    if not sep:
+        return "", content.strip()
+    return head.strip() + "\nRéponse:", body.strip()
+
+
+def trim_to_relevant(body: str, question_terms: set, max_tokens: int) -> str:
+    """Keep the passages of `body` sharing the most terms with the question
+
+    Args:
+        body: Answer text of a document
+        question_terms: Tokens of the user question
+        max_tokens: Token budget of the body
+
+    Returns:
+        The selected passages in their original order
+    """
+    if estimate_tokens(body) <= max_tokens:
+        return body
+
+    passages = [p.strip() for p in _PASSAGE_RE.split(body) if p.strip()]
+    # Rank by question overlap, earlier passages first on ties
+    ranked = sorted(
+        range(len(passages)),
+        key=lambda i: (-len(question_terms & set(tokenize(passages[i]))), i),
+    )
+    kept, used = set(), 0
+    for i in ranked:
+        cost = estimate_tokens(passages[i]) + 1
+        if used + cost > max_tokens:
+            continue
+        kept.add(i)
+        used += cost
+
+    if not kept:
+        return truncate_to_tokens(passages[ranked[0]], max_tokens)
+
+    parts, previous = [], -1
+    for i in sorted(kept):
+        if i != previous + 1:
+            parts.append(TRIM_MARKER)
+        parts.append(passages[i])
+        previous = i
+    if previous != len(passages) - 1:
+        parts.append(TRIM_MARKER)
+    return " ".join(parts)
+
+
+class ContextBuilder:
+    """Assembles the documents and history sections of the agent prompts"""
+
+    def __init__(
+        self,
+        token_budget: int = 1200,
+        dedup_threshold: float = 0.85,
+        history_token_budget: int = 400,
+        history_max_turns: int = 6,
+    ):
+        """
+        Args:
+            token_budget: Approximate token budget of the documents section
+            dedup_threshold: Term Jaccard similarity above which a document is a near-duplicate
+            history_token_budget: Approximate token budget of the conversation history
+            history_max_turns: Maximum number of past user/assistant turns kept
+        """
+        self.token_budget = token_budget
+        self.dedup_threshold = dedup_threshold
+        self.history_token_budget = history_token_budget
+        self.history_max_turns = history_max_turns
+
+    def deduplicate(self, docs: List[Document]) -> List[Document]:
+        """Drop documents whose content nearly repeats a better-ranked one"""
+        kept, kept_terms = [], []
+        for doc in docs:
+            terms = set(tokenize(_split_document(doc.page_content)[1]))
+            if any(_jaccard(terms, other) >= self.dedup_threshold for other in kept_terms):
+                continue
+            kept.append(doc)
+            kept_terms.append(terms)
+        return kept
+
+    def build_context(self, question: str, docs: List[Document]) -> str:
+        """Format the retrieved documents within the token budget
+
+        Documents are taken in rank order; each one gets an even share of
+        the budget left, so short documents leave room for the next ones.
+
+        Args:
+            question: Current user question
+            docs: Retrieved documents, best first
+
+        Returns:
+            Formatted documents section of the prompt
+        """
+        docs = self.deduplicate(docs)
+        question_terms = set(tokenize(question))
+        remaining = self.token_budget
+        sections = []
+
+        for i, doc in enumerate(docs):
+            header, body = _split_document(clean_html(doc.page_content))
+            label = f"Document {i+1} (ID: {doc.metadata.get('id', 'N/A')}):"
+            fixed = estimate_tokens(label) + estimate_tokens(header) + 2
+            share = remaining // (len(docs) - i) - fixed
+            if share < MIN_DOC_TOKENS and sections:
+                break
+
+            body = trim_to_relevant(body, question_terms, max(share, MIN_DOC_TOKENS))
+            section = "\n".join(part for part in (label, header, body) if part)
+            sections.append(section)
+            remaining -= estimate_tokens(section)
+
+        return "\n\n".join(sections)
+
+    def build_history(
+        self,
+        messages: List[BaseMessage],
+        question: Optional[str] = None,
+        summary: Optional[str] = None,
+    ) -> str:
+        """Format the most recent conversation turns within the history budget
+
+        Args:
+            messages: Conversation messages, oldest first
+            question: Current question, dropped from the end of the history
+                since the prompt already states it
+            summary: Rolling summary of the older turns (server-side sessions),
+                given at most half of the budget and placed first
+
+        Returns:
+            "Utilisateur: ..." / "Assistant: ..." lines, oldest first
+        """
+        if self.history_max_turns <= 0:
+            return ""
+        summary_line = ""
+        if summary:
+            summary_line = "Résumé des échanges précédents: " + truncate_to_tokens(summary, self.history_token_budget // 2)
+        messages = [msg for msg in messages if isinstance(msg, (HumanMessage, AIMessage))]
+        if question is not None and messages and isinstance(messages[-1], HumanMessage) \
+                and messages[-1].content.strip() == question.strip():
+            messages = messages[:-1]
+
+        # A turn is a user message and the assistant reply
+        messages = messages[-2 * self.history_max_turns:]
+        per_message = max(self.history_token_budget // 4, MIN_DOC_TOKENS)
+        lines, used = [], estimate_tokens(summary_line)
+        for msg in reversed(messages):
+            speaker = "Utilisateur" if isinstance(msg, HumanMessage) else "Assistant"
+            line = f"{speaker}: {truncate_to_tokens(clean_html(msg.content), per_message)}"
+            cost = estimate_tokens(line)
+            if used + cost > self.history_token_budget:
+                break
+            lines.append(line)
+            used += cost
+
+        if summary_line:
+            lines.append(summary_line)
+        return "\n".join(reversed(lines))
+
+
+@lru_cache(maxsize=1)
+def get_context_builder() -> ContextBuilder:
+    """Return the context builder configured from the settings"""
+    settings = get_settings()
+    return ContextBuilder(
+        token_budget=settings.context_token_budget,
+        dedup_threshold=settings.context_dedup_threshold,
+        history_token_budget=settings.history_token_budget,
+        history_max_turns=settings.history_max_turns,
+    )
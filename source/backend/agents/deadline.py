@@ -0,0 +1,23 @@
+"""Per-request latency deadline carried in the agent state"""
+import time
+from typing import Optional
+from agents.state import AgentState
+
+
+def new_deadline(seconds: float) -> float:
+    """Return an absolute deadline (monotonic clock) `seconds` from now"""
+    return time.monotonic() + seconds
+
+
+def remaining_time(state: AgentState) -> Optional[float]:
+    """Seconds left before the request deadline (None if the request has no deadline)"""
+    deadline = state.get("deadline")
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def has_time_for(state: AgentState, seconds: float) -> bool:
+    """True if at least `seconds` remain before the deadline"""
+    remaining = remaining_time(state)
+    return remaining is None or remaining >= seconds
@@ -1,27 +1,64 @@
 """LangGraph workflow definition for multi-agent RAG system"""
+import logging
+from functools import lru_cache
 from langgraph.graph import StateGraph, END
 from agents.state import AgentState
-from agents.nodes import retrieve_context, generate_answer, validate_answer, regenerate_answer
+from agents.deadline import has_time_for
+from core.config import get_settings
+from core.metrics import AGENT_DEADLINE_EXCEEDED, AGENT_RETRY_BUDGET_EXHAUSTED, DEGRADED_REQUESTS
+from agents.nodes import retrieve_context, match_faq, generate_answer, validate_answer, regenerate_answer
+
+logger = logging.getLogger(__name__)
 
 
 def should_retry(state: AgentState) -> str:
     """Conditional edge: retry generation if validation fails
     
     Returns:
-        "end" if answer is valid or max retries reached
+        "end" if answer is valid, max retries reached or the deadline is near
         "retry" if answer is invalid and retries available
     """
     # If answer is valid, finish
     if state.get("is_valid", True):
         return "end"
     
-    # Check retry count (max 1 retry to avoid infinite loops)
-    retry_count = state.get("retry_count", 0)
-    if retry_count < 1:
-        return "retry"
+    # Deadline reached while validating: return the best answer so far
+    if state.get("deadline_exceeded"):
+        return "end"
+    
+    # Check the retry budget (regenerate_answer increments retry_count)
+    retry_count = state.get("retry_count") or 0
+    max_retries = state.get("max_retries")
+    if max_retries is None:
+        max_retries = get_settings().agent_max_retries
+    if retry_count >= max_retries:
+        AGENT_RETRY_BUDGET_EXHAUSTED.inc()
+        logger.info("Retry budget exhausted after %d retries, returning last answer", retry_count)
+        return "end"
     
-    # Max retries reached, return answer anyway
-    return "end"
+    # Not enough time left for a regeneration + validation
+    if not has_time_for(state, get_settings().agent_min_step_seconds):
+        AGENT_DEADLINE_EXCEEDED.labels(node="regenerate_answer").inc()
+        logger.info("Deadline reached after %d retries, returning last answer", retry_count)
+        return "end"
+    
+    return "retry"
+
+
+def after_faq(state: AgentState) -> str:
+    """Conditional edge: stop when the FAQ fast path answered, otherwise generate"""
+    return "end" if state.get("answer_path") == "faq" else "generate"
+
+
+def after_generate(state: AgentState) -> str:
+    """Conditional edge: skip the validation of requests admitted in degraded mode
+    or whose generation ran out of time (the fallback answer is not validated)"""
+    if state.get("deadline_exceeded"):
+        return "end"
+    if state.get("degraded"):
+        DEGRADED_REQUESTS.inc()
+        return "end"
+    return "validate"
 
 
 def create_agent_graph():
@@ -29,8 +66,9 @@ def create_agent_graph():
     
     Workflow:
     1. retrieve_context: Get relevant documents from RAG system
+       (match_faq: stored answer of a near-identical question, skips the LLM)
     2. generate_answer: Generate answer using LLM with context
-    3. validate_answer: Check answer quality and relevance
+    3. validate_answer: Check answer quality and relevance (skipped in degraded mode)
     4. (conditional) regenerate_answer: Retry with stricter prompt if invalid
     
     Returns:
@@ -41,14 +79,33 @@ def create_agent_graph():
     
     # Add agent nodes (3 agents + retry logic)
     workflow.add_node("retrieve_context", retrieve_context)
+    workflow.add_node("match_faq", match_faq)
     workflow.add_node("generate_answer", generate_answer)
     workflow.add_node("validate_answer", validate_answer)
     workflow.add_node("regenerate_answer", regenerate_answer)
     
     # Define the workflow edges
     workflow.set_entry_point("retrieve_context")
-    workflow.add_edge("retrieve_context", "generate_answer")
-    workflow.add_edge("generate_answer", "validate_answer")
+    workflow.add_edge("retrieve_context", "match_faq")
+    
+    # FAQ fast path: a near-identical stored question answers directly
+    workflow.add_conditional_edges(
+        "match_faq",
+        after_faq,
+        {
+            "generate": "generate_answer",
+            "end": END
+        }
+    )
+    # Degraded mode (admission queue under pressure): no validation LLM call
+    workflow.add_conditional_edges(
+        "generate_answer",
+        after_generate,
+        {
+            "validate": "validate_answer",
+            "end": END
+        }
+    )
     
     # Conditional edge based on validation result
     workflow.add_conditional_edges(
@@ -67,3 +124,13 @@ def create_agent_graph():
     app = workflow.compile()
     
     return app
+
+
+@lru_cache(maxsize=1)
+def get_agent_graph():
+    """Return the compiled workflow graph, compiled once per process
+    
+    The compiled graph holds no per-request data, so it can be shared
+    by all requests.
+    """
+    return create_agent_graph()
@@ -1,18 +1,46 @@
 """Agent node functions for the LangGraph workflow"""
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
 from agents.state import AgentState
+from agents.context import get_context_builder
+from agents.prompts import GENERATE_TEMPLATE, NO_DOCUMENTS, NO_INFO_ANSWER, REGENERATE_TEMPLATE, VALIDATE_TEMPLATE
+from agents.deadline import has_time_for, remaining_time
 from agents.tools import RAGRetrieverTool
-from tools.ollamaChat import create_ollama_chat
+from tools.rag_system import get_rag_system
+from tools.reranker import get_reranker
+from tools.ollamaChat import get_ollama_chat, record_ollama_timings
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.messages import HumanMessage, AIMessage
+from core.config import get_settings
+from core.timing import timed, timed_node
+from core.metrics import AGENT_DEADLINE_EXCEEDED, AGENT_RETRIES, GROUNDING_SCORE, VALIDATION_PATH
+from tools.executor import run_cpu_bound
+from tools.document_loader import answer_from_content
+from tools.groundedness import groundedness_score
+from tools.metadata_filters import profile_predicate
 
+logger = logging.getLogger(__name__)
 
 # Lightweight model for faster agent performance
 AGENT_MODEL = "gemma2:2b"
+# Same sampling options for every node, so that Ollama keeps one loaded
+# model and prompt cache for the whole workflow
+AGENT_TEMPERATURE = get_settings().agent_temperature
 # Number of documents to retrieve from RAG system
-K_DOCS = 6
+K_DOCS = get_settings().k_docs
+
+
+def _prompt_context(state: AgentState) -> str:
+    """Documents section shared by the prompts of all nodes"""
+    retrieved_docs = state.get("retrieved_docs", [])
+    return retrieved_docs[0] if retrieved_docs and retrieved_docs[0] else NO_DOCUMENTS
 
 
-def retrieve_context(state: AgentState) -> AgentState:
+@timed_node("retrieve_context")
+async def retrieve_context(state: AgentState) -> AgentState:
     """Node: Retrieve relevant documents from RAG system
     
     This agent node uses the RAG retriever to find documents
@@ -20,94 +48,162 @@ def retrieve_context(state: AgentState) -> AgentState:
     """
     question = state["question"]
     
-    # Initialize RAG retriever tool
-    rag_tool = RAGRetrieverTool(k_docs=K_DOCS)
+    # Retriever tool backed by the shared RAG system (no model reload per request);
+    # with the reranker, a wider candidate set is narrowed down to the best few
+    settings = get_settings()
+    reranker = get_reranker()
+    rag_tool = RAGRetrieverTool(
+        rag_system=get_rag_system(),
+        k_docs=settings.rerank_top_n if reranker is not None else K_DOCS,
+        reranker=reranker,
+        fetch_k=settings.rerank_fetch_k,
+    )
     
-    # Retrieve documents
-    docs = rag_tool.retrieve(question)
+    # Retrieve documents, pre-filtered on the user's school / audience / language
+    docs = await rag_tool.aretrieve(question, profile=state.get("profile"))
     
-    # Format documents for context
-    formatted_docs = rag_tool.format_docs(docs)
+    # De-duplicate and trim the documents to the prompt token budget
+    formatted_docs = get_context_builder().build_context(question, docs)
     
     # Store in state
     state["retrieved_docs"] = [formatted_docs]
+    state["retrieved_sources"] = rag_tool.sources(docs)
+    state["retrieved_documents"] = docs
     
     return state
 
 
-def generate_answer(state: AgentState) -> AgentState:
-    """Node: Generate answer using LLM with retrieved context
-    
-    This agent node takes the retrieved documents and conversation
-    history to generate a contextual answer.
-    """
+async def _faq_match(state: AgentState) -> Tuple[Optional[Document], float]:
+    """Best stored question for the FAQ fast path and its similarity to the question"""
+    settings = get_settings()
     question = state["question"]
-    retrieved_docs = state.get("retrieved_docs", [])
-    messages = state.get("messages", [])
-    
-    # Format conversation history
-    conversation_history = []
-    for msg in messages:
-        if isinstance(msg, HumanMessage):
-            conversation_history.append(f"Utilisateur: {msg.content}")
-        elif isinstance(msg, AIMessage):
-            conversation_history.append(f"Assistant: {msg.content}")
+    rag_system = get_rag_system()
+    predicate = profile_predicate(state.get("profile"))
+    
+    # Same question once normalized (case, accents, punctuation)
+    ids = rag_system.faq_index.lookup(question)
+    if ids:
+        matches = await run_cpu_bound(rag_system.get_documents, ids)
+        matches = [doc for doc in matches if predicate is None or predicate(doc)]
+        if matches:
+            return matches[0], 1.0
+    
+    # Question vs stored titles of the top retrieved documents: the question
+    # vector comes from the query cache, the title vectors from the FAQ index
+    candidates = [doc for doc in state.get("retrieved_documents", [])[:settings.faq_candidates] if doc.metadata.get("title")]
+    if not candidates:
+        return None, 0.0
+    question_vector, title_vectors = await asyncio.gather(
+        rag_system.embeddings.aembed_query(question),
+        run_cpu_bound(rag_system.title_vectors, candidates),
+    )
+    scores = (title_vectors @ np.asarray(question_vector, dtype=np.float32)).tolist()
+    best = int(np.argmax(scores))
+    return candidates[best], scores[best]
+
+
+@timed_node("match_faq")
+async def match_faq(state: AgentState) -> AgentState:
+    """Node: FAQ fast path
     
-    conversation_str = "\n".join(conversation_history)
+    When the question is (nearly) identical to a stored question, its
+    stored answer is authoritative: it is returned with a source reference
+    and the LLM generation and validation are skipped.
+    """
+    settings = get_settings()
+    if not settings.faq_enabled:
+        return state
     
-    # Context from retrieved documents
-    context = retrieved_docs[0] if retrieved_docs else "Aucun document trouvé."
+    doc, score = await _faq_match(state)
+    state["faq_score"] = score
+    if doc is None or score < settings.faq_similarity_threshold:
+        return state
     
-    llm = create_ollama_chat(model=AGENT_MODEL, temperature=0.3)
+    answer = answer_from_content(doc.page_content)
+    if not answer:
+        return state
+    title = doc.metadata.get("title", "")
+    state["answer"] = f"{answer}\n\nSource : {title}"
+    state["retrieved_sources"] = RAGRetrieverTool.sources([doc])
+    state["validation"] = f"VALID: réponse de la FAQ (similarité {score:.2f})"
+    state["is_valid"] = True
+    state["answer_path"] = "faq"
+    logger.info("FAQ fast path for %r -> %r (%.2f)", state["question"][:80], title[:80], score)
     
-    # Prompt template
-    template = """Tu es un assistant virtuel pour une école. Tu dois répondre à la dernière question de l'utilisateur en t'appuyant sur:
-1. Les documents de la base de connaissances ci-dessous
-2. L'historique de la conversation pour comprendre le contexte
-
-RÈGLES IMPORTANTES:
-- Utilise les informations des documents pour répondre, même si la formulation de la question n'est pas exactement la même que dans les documents
-- Si les documents contiennent des informations pertinentes qui peuvent aider à répondre, utilise-les pour construire ta réponse
-- Sois clair et pédagogique dans tes explications
-- Si vraiment AUCUNE information dans les documents ne peut aider à répondre (par exemple une question sur la météo), dis alors : "Je n'ai pas d'information sur ce sujet dans ma base de connaissances."
-- Ne réponds QU'À la dernière question posée
-- Utilise l'historique pour comprendre le contexte de la conversation
-
-=== DOCUMENTS DE LA BASE DE CONNAISSANCES ===
-{context}
-
-=== HISTORIQUE DE LA CONVERSATION ===
-{conversation_history}
+    return state
 
-=== DERNIÈRE QUESTION À RÉPONDRE ===
-{question}
 
-Réponse de l'assistant:"""
+@timed_node("generate_answer")
+async def generate_answer(state: AgentState) -> AgentState:
+    """Node: Generate answer using LLM with retrieved context
+    
+    This agent node takes the retrieved documents and conversation
+    history to generate a contextual answer. The LLM call is bounded by
+    the request deadline.
+    """
+    question = state["question"]
+    messages = state.get("messages", [])
     
-    prompt = ChatPromptTemplate.from_template(template)
+    # Sliding window of the most recent turns (after the session summary, if
+    # any), within the history token budget
+    conversation_str = get_context_builder().build_history(messages, question, state.get("summary"))
+    
+    llm = get_ollama_chat(model=AGENT_MODEL, temperature=AGENT_TEMPERATURE)
+    prompt = ChatPromptTemplate.from_template(GENERATE_TEMPLATE)
     
     # Create chain
     chain = prompt | llm
     
-    # Generate response
-    response = chain.invoke({
-        "context": context,
-        "conversation_history": conversation_str,
-        "question": question
-    })
+    # Generate response, bounded by the request deadline
+    try:
+        with timed("llm"):
+            response = await asyncio.wait_for(
+                chain.ainvoke({
+                    "context": _prompt_context(state),
+                    "question": question,
+                    "conversation_history": conversation_str,
+                }),
+                timeout=remaining_time(state),
+            )
+    except asyncio.TimeoutError:
+        # No answer in time: the no-info answer, returned without validation
+        state["answer"] = NO_INFO_ANSWER
+        state["deadline_exceeded"] = True
+        AGENT_DEADLINE_EXCEEDED.labels(node="generate_answer").inc()
+        logger.info("Deadline reached during generation, returning the no-info answer")
+        return state
+    
+    record_ollama_timings(response, node="generate_answer")
     # Store answer
     state["answer"] = response.content if hasattr(response, 'content') else str(response)
     
     return state
 
 
-def validate_answer(state: AgentState) -> AgentState:
+def _skip_validation(state: AgentState) -> AgentState:
+    """Deadline reached before or during the LLM validation: keep the answer unvalidated"""
+    state["validation"] = "SKIPPED: délai de réponse atteint"
+    state["is_valid"] = None
+    state["deadline_exceeded"] = True
+    state["validation_path"] = "deadline"
+    VALIDATION_PATH.labels(path="deadline").inc()
+    AGENT_DEADLINE_EXCEEDED.labels(node="validate_answer").inc()
+    logger.info("Deadline reached, answer returned without validation")
+    return state
+
+
+@timed_node("validate_answer")
+async def validate_answer(state: AgentState) -> AgentState:
     """Node: Validate answer quality and relevance
     
     This agent checks if the generated answer:
     1. Uses information from retrieved documents
     2. Answers the actual question
     3. Doesn't hallucinate
+    
+    Validation is tiered: a cheap embedding-based groundedness score
+    accepts or rejects confident cases, and the LLM validator is only
+    called in the uncertain band.
     """
     question = state["question"]
     answer = state["answer"]
@@ -128,85 +224,116 @@ def validate_answer(state: AgentState) -> AgentState:
     if any(phrase in answer_lower for phrase in no_info_phrases):
         state["validation"] = "VALID: Réponse appropriée indiquant l'absence d'information dans la base"
         state["is_valid"] = True
-        print(f"✅ Auto-validation: Réponse 'pas d'information' acceptée")
+        state["validation_path"] = "no_info"
+        VALIDATION_PATH.labels(path="no_info").inc()
+        logger.info("Auto-validation: no-information answer accepted")
         return state
     
-    llm = create_ollama_chat(model=AGENT_MODEL, temperature=0.1)
-    
-    validation_template = """Tu es un validateur d'IA. Analyse si la réponse est de bonne qualité.
-
-QUESTION: {question}
-
-DOCUMENTS DISPONIBLES:
-{context}
-
-RÉPONSE GÉNÉRÉE:
-{answer}
-
-Évalue la réponse selon ces critères:
-1. La réponse utilise-t-elle les informations des documents? (OUI/NON)
-2. La réponse répond-elle vraiment à la question? (OUI/NON)
-3. La réponse contient-elle des informations inventées non présentes dans les documents? (OUI/NON)
-
-Réponds UNIQUEMENT par: VALID ou INVALID suivi d'une raison courte.
-Format: VALID: [raison] ou INVALID: [raison]
-"""
-    
-    prompt = ChatPromptTemplate.from_template(validation_template)
+    settings = get_settings()
+    context = retrieved_docs[0] if retrieved_docs else ""
+    
+    # Tier 1: embedding-based groundedness against the retrieved documents
+    if settings.grounding_enabled and context:
+        with timed("grounding"):
+            scores = await run_cpu_bound(
+                groundedness_score, answer, context, get_rag_system().embeddings,
+                semantic_weight=settings.grounding_semantic_weight,
+            )
+        state["grounding_score"] = scores["score"]
+        GROUNDING_SCORE.observe(scores["score"])
+        
+        if scores["score"] >= settings.grounding_accept_threshold:
+            path, is_valid, verdict = "grounding_accept", True, "VALID: réponse ancrée dans les documents"
+        elif scores["score"] <= settings.grounding_reject_threshold:
+            path, is_valid, verdict = "grounding_reject", False, "INVALID: réponse peu ancrée dans les documents"
+        else:
+            path = "llm"
+        
+        logger.info(
+            "Groundedness %.2f (semantic %.2f, lexical %.2f) -> %s",
+            scores["score"], scores["semantic"], scores["lexical"], path,
+        )
+        if path != "llm":
+            state["validation"] = f"{verdict} (score {scores['score']:.2f})"
+            state["is_valid"] = is_valid
+            state["validation_path"] = path
+            VALIDATION_PATH.labels(path=path).inc()
+            return state
+    
+    # Not enough time left for an LLM validation: keep the answer unvalidated
+    if not has_time_for(state, settings.agent_min_step_seconds):
+        return _skip_validation(state)
+    
+    llm = get_ollama_chat(model=AGENT_MODEL, temperature=AGENT_TEMPERATURE)
+    prompt = ChatPromptTemplate.from_template(VALIDATE_TEMPLATE)
     chain = prompt | llm
     
-    validation_result = chain.invoke({
-        "question": question,
-        "context": retrieved_docs[0] if retrieved_docs else "Aucun document",
-        "answer": answer
-    })
+    try:
+        with timed("llm"):
+            validation_result = await asyncio.wait_for(
+                chain.ainvoke({
+                    "context": _prompt_context(state),
+                    "question": question,
+                    "answer": answer,
+                }),
+                timeout=remaining_time(state),
+            )
+    except asyncio.TimeoutError:
+        return _skip_validation(state)
+    record_ollama_timings(validation_result, node="validate_answer")
     
     result_text = validation_result.content if hasattr(validation_result, 'content') else str(validation_result)
     
     # Store validation result
     state["validation"] = result_text
     state["is_valid"] = result_text.strip().startswith("VALID")
+    state["validation_path"] = "llm"
+    VALIDATION_PATH.labels(path="llm").inc()
     
-    print(f"🔍 Validation result: {result_text[:100]}...")
+    logger.info("Validation result: %s", result_text[:100])
     
     return state
 
 
-def regenerate_answer(state: AgentState) -> AgentState:
+@timed_node("regenerate_answer")
+async def regenerate_answer(state: AgentState) -> AgentState:
     """Node: Regenerate answer with stricter prompt after validation failure
     
     This agent is called when validation fails, using a more
-    strict prompt to force document-based answers.
+    strict prompt to force document-based answers. The LLM call is
+    bounded by the request deadline; if it runs out, the previous
+    answer is kept.
     """
     question = state["question"]
-    retrieved_docs = state.get("retrieved_docs", [])
     validation_reason = state.get("validation", "")
     
-    llm = create_ollama_chat(model=AGENT_MODEL, temperature=0.3)
+    # Consume one retry from the budget
+    state["retry_count"] = (state.get("retry_count") or 0) + 1
+    AGENT_RETRIES.inc()
+    logger.info("Regenerating answer (retry %d): %s", state["retry_count"], validation_reason[:100])
     
-    strict_template = """ATTENTION: Ta réponse précédente a été rejetée pour: {validation_reason}
-
-Tu DOIS répondre en utilisant UNIQUEMENT les informations ci-dessous.
-Si les documents ne contiennent pas d\'information pour répondre, dis clairement:
-"Je n\'ai pas d\'information sur ce sujet dans ma base de connaissances."
-
-DOCUMENTS:
-{context}
-
-QUESTION:
-{question}
-
-Réponse (basée UNIQUEMENT sur les documents):"""
-    
-    prompt = ChatPromptTemplate.from_template(strict_template)
+    llm = get_ollama_chat(model=AGENT_MODEL, temperature=AGENT_TEMPERATURE)
+    prompt = ChatPromptTemplate.from_template(REGENERATE_TEMPLATE)
     chain = prompt | llm
     
-    response = chain.invoke({
-        "context": retrieved_docs[0] if retrieved_docs else "",
-        "question": question,
-        "validation_reason": validation_reason
-    })
+    try:
+        with timed("llm"):
+            response = await asyncio.wait_for(
+                chain.ainvoke({
+                    "context": _prompt_context(state),
+                    "question": question,
+                    "validation_reason": validation_reason,
+                }),
+                timeout=remaining_time(state),
+            )
+    except asyncio.TimeoutError:
+        # Deadline reached: keep the best answer so far
+        state["deadline_exceeded"] = True
+        AGENT_DEADLINE_EXCEEDED.labels(node="regenerate_answer").inc()
+        logger.info("Deadline reached during regeneration, keeping previous answer")
+        return state
     
+    record_ollama_timings(response, node="regenerate_answer")
     state["answer"] = response.content if hasattr(response, 'content') else str(response)
     
     return state
@@ -0,0 +1,180 @@
+"""Execution of the agent workflow for one request, with the semantic answer cache in front"""
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional, Tuple
+
+from agents.deadline import new_deadline
+from agents.graph import get_agent_graph
+from agents.state import AgentState
+from core.config import get_settings
+from core.metrics import ANSWER_CACHE_HITS, ANSWER_CACHE_MISSES, ANSWER_PATH
+from core.timing import timed
+from tools.admission import get_admission_controller
+from tools.answer_cache import CachedAnswer, get_answer_cache
+from tools.faq_index import normalize_title
+from tools.rag_system import get_rag_system
+from tools.single_flight import get_single_flight
+
+logger = logging.getLogger(__name__)
+
+
+def is_cacheable(state: AgentState) -> bool:
+    """Only first-turn questions are cached: follow-ups depend on the conversation"""
+    return len(state.get("messages", [])) <= 1 and not state.get("summary")
+
+
+def cache_scope(state: AgentState) -> str:
+    """Answers retrieved with different profiles must not be shared"""
+    return json.dumps(state.get("profile") or {}, sort_keys=True)
+
+
+def coalescing_key(state: AgentState) -> str:
+    """Identical questions (once normalized) asked with the same profile share one execution"""
+    return f"{cache_scope(state)}\0{normalize_title(state['question'])}"
+
+
+async def lookup_cached_answer(state: AgentState) -> Tuple[Optional[CachedAnswer], Optional[List[float]]]:
+    """Look the question up in the answer cache
+    
+    Returns:
+        (cached entry or None, question embedding or None if the cache is not used)
+    """
+    cache = get_answer_cache()
+    if cache is None or not is_cacheable(state):
+        return None, None
+    
+    # Batched with the other requests' questions; the retrieval then hits the query cache
+    with timed("embedding"):
+        embedding = await get_rag_system().embeddings.aembed_query(state["question"])
+    entry = cache.lookup(embedding, scope=cache_scope(state))
+    if entry is None:
+        ANSWER_CACHE_MISSES.inc()
+        return None, embedding
+    
+    ANSWER_CACHE_HITS.inc()
+    logger.info("Answer cache hit for %r (cached question: %r)", state["question"][:80], entry.question[:80])
+    return entry, embedding
+
+
+def store_answer(embedding: Optional[List[float]], final_state: AgentState):
+    """Cache the final answer if it passed validation"""
+    cache = get_answer_cache()
+    if cache is None or embedding is None or final_state.get("is_valid") is not True:
+        return
+    # Stored FAQ answers are cheaper to serve again than to cache
+    if final_state.get("answer_path") == "faq":
+        return
+    cache.store(
+        question=final_state["question"],
+        embedding=embedding,
+        answer=final_state.get("answer", ""),
+        sources=final_state.get("retrieved_sources", []),
+        scope=cache_scope(final_state),
+    )
+
+
+def cached_state(state: AgentState, entry: CachedAnswer) -> AgentState:
+    """Final state returned for a cache hit"""
+    return {
+        **state,
+        "answer": entry.answer,
+        "retrieved_sources": entry.sources,
+        "validation": "VALID: réponse servie depuis le cache",
+        "is_valid": True,
+        "answer_path": "cache",
+    }
+
+
+def record_answer_path(final_state: AgentState) -> str:
+    """Set (default "llm") and count the path that served the answer"""
+    path = final_state.get("answer_path") or "llm"
+    final_state["answer_path"] = path
+    ANSWER_PATH.labels(path=path).inc()
+    return path
+
+
+@asynccontextmanager
+async def admitted(state: AgentState):
+    """Hold an admission slot for a graph execution, flagging the state as degraded under pressure
+    
+    The request deadline starts once admitted, so the time spent in the
+    admission queue is not taken from the graph execution.
+    
+    Raises:
+        AdmissionRejected: the request was shed (queue full or wait timed out)
+    """
+    deadline_seconds = get_settings().agent_deadline_seconds
+    controller = get_admission_controller()
+    if controller is None:
+        state["deadline"] = new_deadline(deadline_seconds)
+        yield
+        return
+    async with controller.admit() as degraded:
+        state["degraded"] = degraded
+        state["deadline"] = new_deadline(deadline_seconds)
+        yield
+
+
+def is_degraded(final_state: AgentState) -> bool:
+    """True if the answer was returned without the full workflow (load or deadline)"""
+    return bool(final_state.get("degraded") or final_state.get("deadline_exceeded"))
+
+
+async def run_agent(initial_state: AgentState) -> AgentState:
+    """Answer one question: from the answer cache if possible, otherwise with the agent graph
+    
+    Concurrent identical first-turn questions (a burst after an announcement)
+    await a single execution and get its result; follow-ups depend on their
+    conversation and always run on their own.
+    
+    Args:
+        initial_state: Initial AgentState built from the request
+        
+    Returns:
+        Final AgentState, with "answer_path" set to "cache", "faq" or "llm"
+        
+    Raises:
+        AdmissionRejected: the graph execution was shed by admission control
+    """
+    single_flight = get_single_flight()
+    if single_flight is None or not is_cacheable(initial_state):
+        return await _run_agent(initial_state)
+    
+    final_state, shared = await single_flight.run(coalescing_key(initial_state), lambda: _run_agent(initial_state))
+    if shared:
+        logger.info("Coalesced %r with an identical in-flight question", initial_state["question"][:80])
+    # Each caller gets its own copy of the shared state
+    return {**final_state, "question": initial_state["question"]}
+
+
+async def join_in_flight(initial_state: AgentState) -> Optional[AgentState]:
+    """Result of the in-flight execution of an identical question, or None if there is none
+    
+    Used by the streaming endpoint, which runs the graph itself: it shares a
+    running execution but does not start one, since that would end with the
+    client's stream.
+    """
+    single_flight = get_single_flight()
+    if single_flight is None or not is_cacheable(initial_state):
+        return None
+    task = single_flight.in_flight(coalescing_key(initial_state))
+    if task is None:
+        return None
+    final_state = await single_flight.join(task)
+    return {**final_state, "question": initial_state["question"]}
+
+
+async def _run_agent(initial_state: AgentState) -> AgentState:
+    entry, embedding = await lookup_cached_answer(initial_state)
+    if entry is not None:
+        final_state = cached_state(initial_state, entry)
+        record_answer_path(final_state)
+        return final_state
+    
+    # Execute the agent workflow without blocking the event loop, once admitted
+    async with admitted(initial_state):
+        final_state = await get_agent_graph().ainvoke(initial_state)
+    record_answer_path(final_state)
+    store_answer(embedding, final_state)
+    return final_state
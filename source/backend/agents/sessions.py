@@ -0,0 +1,113 @@
+"""Turns of server-side conversation sessions and their rolling summary
+
+The client only sends the new message: the session holds the recent
+messages, and once it grows past the trigger the oldest turns are folded
+into a rolling summary by the LLM, in a background task after the answer
+was sent. The history given to the agent (summary + a few recent turns)
+so stays the same size however long the conversation gets.
+"""
+import asyncio
+import logging
+from typing import List, Set
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.prompts import ChatPromptTemplate
+
+from agents.context import truncate_to_tokens
+from agents.nodes import AGENT_MODEL, AGENT_TEMPERATURE
+from agents.prompts import SUMMARY_TEMPLATE
+from core.config import get_settings
+from tools.document_loader import clean_html
+from tools.ollamaChat import get_ollama_chat, record_ollama_timings
+from tools.session_store import Session, get_session_store
+
+logger = logging.getLogger(__name__)
+
+# Running summary tasks (referenced so they are not garbage collected) and their sessions
+_summary_tasks: Set[asyncio.Task] = set()
+_summarizing: Set[str] = set()
+
+
+def session_messages(session: Session, question: str) -> List[BaseMessage]:
+    """LangChain messages of the session followed by the new question"""
+    messages = [
+        HumanMessage(content=message["content"]) if message["role"] == "user" else AIMessage(content=message["content"])
+        for message in session.messages
+    ]
+    return messages + [HumanMessage(content=question)]
+
+
+def messages_to_fold(session: Session) -> int:
+    """Number of oldest messages to fold into the summary (0 below the trigger)"""
+    settings = get_settings()
+    if len(session.messages) <= 2 * settings.session_summary_trigger_turns:
+        return 0
+    return len(session.messages) - 2 * settings.session_keep_turns
+
+
+async def summarize(summary: str, messages: List[dict]) -> str:
+    """Fold messages into the rolling summary with the LLM"""
+    settings = get_settings()
+    conversation = "\n".join(
+        f"{'Utilisateur' if message['role'] == 'user' else 'Assistant'}: {clean_html(message['content'])}"
+        for message in messages
+    )
+    llm = get_ollama_chat(
+        model=AGENT_MODEL,
+        temperature=AGENT_TEMPERATURE,
+        # Bounds the generation itself; ChatOllama has no max_tokens
+        num_predict=settings.session_summary_max_tokens,
+    )
+    chain = ChatPromptTemplate.from_template(SUMMARY_TEMPLATE) | llm
+    response = await chain.ainvoke({"summary": summary or "(aucun)", "conversation": conversation})
+    record_ollama_timings(response, node="summarize_session")
+    content = response.content if hasattr(response, "content") else str(response)
+    return truncate_to_tokens(content.strip(), settings.session_summary_max_tokens)
+
+
+async def update_summary(session_id: str):
+    """Fold the oldest turns of a session into its summary (background task)"""
+    store = get_session_store()
+    try:
+        session = await store.get(session_id)
+        count = messages_to_fold(session) if session is not None else 0
+        if not count:
+            return
+        folded = [dict(message) for message in session.messages[:count]]
+        summary = await summarize(session.summary, folded)
+
+        # New turns may have been added meanwhile: they are after the folded ones.
+        # Give up if the session was deleted, evicted and reloaded, or changed otherwise
+        session = await store.get(session_id)
+        if session is None or session.messages[:count] != folded:
+            return
+        session.summary = summary
+        del session.messages[:count]
+        session.summarized_count += count
+        await store.save(session)
+        logger.info("Session %s: %d messages folded into the summary", session_id, count)
+    except Exception as e:
+        # The recent messages are kept: the next turn retries
+        logger.warning("Session %s: summary failed: %s", session_id, e)
+    finally:
+        _summarizing.discard(session_id)
+
+
+def schedule_summary(session: Session):
+    """Start the summary of a session in the background if it is due and not already running"""
+    if session.id in _summarizing or not messages_to_fold(session):
+        return
+    _summarizing.add(session.id)
+    task = asyncio.create_task(update_summary(session.id))
+    _summary_tasks.add(task)
+    task.add_done_callback(_summary_tasks.discard)
+
+
+async def record_turn(session: Session, question: str, answer: str):
+    """Append a question / answer turn to the session, save it and fold old turns if due"""
+    if not answer:
+        return
+    session.messages.append({"role": "user", "content": question})
+    session.messages.append({"role": "agent", "content": answer})
+    await get_session_store().save(session)
+    schedule_summary(session)
@@ -1,21 +1,35 @@
 """Agent state schema for LangGraph workflow"""
-from typing import List, TypedDict, Annotated, Optional
-from operator import add
+from typing import List, TypedDict, Optional
+from langchain_core.documents import Document
 from langchain_core.messages import BaseMessage
 
 
 class AgentState(TypedDict):
     """State shared across all agent nodes in the workflow"""
     
-    # Conversation messages (user + assistant history)
-    messages: Annotated[List[BaseMessage], add]
+    # Conversation messages (user + assistant history). Nodes return the
+    # whole state, so this is a plain value: an `add` reducer would append
+    # the history to itself after every node
+    messages: List[BaseMessage]
+    
+    # Rolling summary of the older turns of a server-side session
+    summary: Optional[str]
     
     # Current question to answer
     question: str
     
+    # Optional user profile used to pre-filter retrieval (ecole, utilisateur, langue)
+    profile: Optional[dict]
+    
     # Retrieved documents from RAG
     retrieved_docs: List[str]
     
+    # Sources of the retrieved documents (id + title)
+    retrieved_sources: List[dict]
+    
+    # Retrieved documents themselves, best first (used by the FAQ fast path)
+    retrieved_documents: List[Document]
+    
     # Generated answer
     answer: str
     
@@ -25,5 +39,29 @@ class AgentState(TypedDict):
     # Is the answer valid?
     is_valid: Optional[bool]
     
+    # How the answer was validated (no_info, grounding_accept, grounding_reject, llm, deadline)
+    validation_path: Optional[str]
+    
+    # Embedding-based groundedness score of the answer
+    grounding_score: Optional[float]
+    
+    # Path that served the answer: "faq" (stored answer), "cache" (answer cache) or "llm"
+    answer_path: Optional[str]
+    
+    # Similarity between the question and the matched stored question (FAQ fast path)
+    faq_score: Optional[float]
+    
     # Retry counter to prevent infinite loops
     retry_count: Optional[int]
+    
+    # Maximum number of regenerations allowed for this request
+    max_retries: Optional[int]
+    
+    # Absolute deadline of the request (time.monotonic() value)
+    deadline: Optional[float]
+    
+    # Admitted under load: the answer is returned without validation
+    degraded: Optional[bool]
+    
+    # Set when a step was skipped or cut short by the deadline
+    deadline_exceeded: Optional[bool]
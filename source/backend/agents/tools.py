@@ -1,26 +1,98 @@
 """Agent tools for document retrieval and processing"""
-from tools.rag_system import RAGSystem
+from typing import Optional
+from core.timing import timed
+from tools.embedding_cache import CachedEmbeddings
+from tools.executor import run_cpu_bound
+from tools.rag_system import RAGSystem, get_rag_system
+from tools.reranker import CrossEncoderReranker
 
 
 class RAGRetrieverTool:
     """Wrapper for RAG system to use as an agent tool"""
     
-    def __init__(self, persist_directory: str = "../database/prod", k_docs: int = 6):
-        self.rag_system = RAGSystem(persist_directory=persist_directory, k_docs=k_docs)
+    def __init__(
+        self,
+        rag_system: Optional[RAGSystem] = None,
+        k_docs: int = 6,
+        reranker: Optional[CrossEncoderReranker] = None,
+        fetch_k: int = 12,
+    ):
+        """
+        Args:
+            rag_system: RAG system to search (default: the process-wide one)
+            k_docs: Number of documents returned
+            reranker: Optional cross-encoder; when set, fetch_k candidates are
+                retrieved and reranked, and the k_docs best are returned
+            fetch_k: Number of candidates retrieved for the reranker
+        """
+        # Reuse the process-wide RAG system: the embedding model and Chroma are loaded once
+        self.rag_system = rag_system if rag_system is not None else get_rag_system()
+        self.k_docs = k_docs
+        self.reranker = reranker
+        self.fetch_k = max(fetch_k, k_docs)
     
-    def retrieve(self, question: str) -> list:
+    def search(self, question: str, profile: Optional[dict] = None) -> list:
+        """Retrieve the candidate documents (fetch_k of them when reranking)"""
+        k = self.fetch_k if self.reranker is not None else self.k_docs
+        docs = self.rag_system.get_retriever(k=k, profile=profile).invoke(question)
+        if not docs and profile:
+            # Nothing matches the profile: fall back to the whole collection
+            docs = self.rag_system.get_retriever(k=k).invoke(question)
+        return docs
+    
+    def retrieve(self, question: str, profile: Optional[dict] = None) -> list:
         """Retrieve relevant documents for a question
         
         Args:
             question: The user's question
+            profile: Optional school / audience / language pre-filter
             
         Returns:
             List of document objects with page_content and metadata
         """
-        retriever = self.rag_system.get_retriever()
-        docs = retriever.invoke(question)
+        docs = self.search(question, profile)
+        if self.reranker is not None:
+            docs = self.reranker.rerank(question, docs, self.k_docs)
         return docs
     
+    async def aretrieve(self, question: str, profile: Optional[dict] = None) -> list:
+        """Async version of retrieve: the query is embedded through the
+        micro-batcher (together with concurrent requests), then the vector
+        search runs in the bounded CPU thread pool and hits the query cache,
+        as does the optional reranking
+        
+        Args:
+            question: The user's question
+            profile: Optional school / audience / language pre-filter
+            
+        Returns:
+            List of document objects with page_content and metadata
+        """
+        if isinstance(self.rag_system.embeddings, CachedEmbeddings):
+            with timed("embedding"):
+                await self.rag_system.embeddings.aembed_query(question)
+        with timed("vector_search"):
+            docs = await run_cpu_bound(self.search, question, profile)
+        if self.reranker is not None:
+            with timed("rerank"):
+                docs = await run_cpu_bound(self.reranker.rerank, question, docs, self.k_docs)
+        return docs
+    
+    @staticmethod
+    def sources(docs: list) -> list:
+        """Extract the source references (id and title) of retrieved documents
+        
+        Args:
+            docs: List of document objects
+            
+        Returns:
+            List of {"id", "title"} dicts, in retrieval order
+        """
+        return [
+            {"id": doc.metadata.get("id"), "title": doc.metadata.get("title", "")}
+            for doc in docs
+        ]
+    
     def format_docs(self, docs: list) -> str:
         """Format retrieved documents into a string context
         
@@ -1,19 +1,19 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from schemas.question import QuestionSchema
-from tools.rag_system import RAGSystem
+from tools.answer_cache import get_answer_cache
+from tools.executor import run_cpu_bound
+from tools.rag_system import RAGSystem, get_rag_system
 
 router = APIRouter()
 
 @router.post("/", summary="Add a new question")
-async def add_question(question: QuestionSchema):
+async def add_question(question: QuestionSchema, rag_system: RAGSystem = Depends(get_rag_system)):
 
     try:
 
-        rag_system = RAGSystem(
-                persist_directory="../database/prod"
-        )
-
-        rag_system.add_question(
+        # Embedding the new document is CPU-bound: keep it off the event loop
+        result = await run_cpu_bound(
+            rag_system.add_question,
             titre=question.titre,
             contenu=question.contenu,
             thematique=question.thematique,
@@ -22,7 +22,15 @@ async def add_question(question: QuestionSchema):
             langue=question.langue,
         )
 
-        return {"status": "200", "message": "Question added successfully"}
+        if result["status"] == "skipped":
+            return {"status": "200", "message": "Question already exists", "id": result["id"]}
+
+        # A new document can change any answer: drop the cached ones
+        answer_cache = get_answer_cache()
+        if answer_cache is not None:
+            answer_cache.invalidate()
+
+        return {"status": "200", "message": "Question added successfully", "id": result["id"]}
     
     except Exception as e:
-        return {"status": "500", "message": str(e)}
\ No newline at end of file
+        return {"status": "500", "message": str(e)}
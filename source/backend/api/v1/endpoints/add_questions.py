@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends
+from api.v1.endpoints.ask_agent import error_response
+from core.config import get_settings
+from schemas.question import QuestionBatchSchema
+from tools.answer_cache import get_answer_cache
+from tools.executor import run_cpu_bound
+from tools.rag_system import RAGSystem, get_rag_system
+
+router = APIRouter()
+
+@router.post("/", summary="Add many questions at once")
+async def add_questions(batch: QuestionBatchSchema, rag_system: RAGSystem = Depends(get_rag_system)):
+
+    if not batch.questions:
+        return error_response(400, "Aucune question à ajouter")
+
+    try:
+
+        # Batched embedding is CPU-bound: keep it off the event loop
+        results = await run_cpu_bound(
+            rag_system.add_questions,
+            [question.model_dump() for question in batch.questions],
+            batch_size=batch.batch_size or get_settings().ingest_batch_size,
+        )
+
+        added = sum(1 for result in results if result["status"] == "added")
+        if added:
+            answer_cache = get_answer_cache()
+            if answer_cache is not None:
+                answer_cache.invalidate()
+
+        return {
+            "status": "200",
+            "added": added,
+            "skipped": sum(1 for result in results if result["status"] == "skipped"),
+            "errors": sum(1 for result in results if result["status"] == "error"),
+            "results": results,
+        }
+
+    except ValueError as e:
+        # Invalid batch parameters
+        return error_response(400, str(e))
+    except Exception as e:
+        return error_response(500, str(e))
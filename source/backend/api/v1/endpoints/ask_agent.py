@@ -1,11 +1,108 @@
 """Multi-agent endpoint using LangGraph for question answering"""
+import json
+from typing import Awaitable, Callable, Optional
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, StreamingResponse
 from schemas.message import MessageList
-from agents.graph import create_agent_graph
+from agents.graph import get_agent_graph
+from agents.runner import admitted, cached_state, is_degraded, join_in_flight, lookup_cached_answer, record_answer_path, run_agent, store_answer
+from core.config import get_settings
+from core.timing import get_request_timings
+from tools.admission import AdmissionRejected, get_admission_controller
 from langchain_core.messages import HumanMessage, AIMessage
 
 router = APIRouter()
 
+# Nodes whose LLM tokens are forwarded to the client (the validator's are not)
+STREAMED_NODES = ("generate_answer", "regenerate_answer")
+
+
+def build_initial_state(messages: MessageList) -> dict:
+    """Build the initial graph state from the frontend conversation
+    
+    Args:
+        messages: Conversation history with user messages
+        
+    Returns:
+        Initial AgentState dict, or None if there is no user question
+    """
+    # Extract the last user question
+    user_messages = [msg for msg in messages.messages if msg.role == "user"]
+    if not user_messages:
+        return None
+    
+    last_user_question = user_messages[-1].content
+    
+    # Convert message history to LangChain format
+    langchain_messages = []
+    for msg in messages.messages:
+        if msg.role == "user":
+            langchain_messages.append(HumanMessage(content=msg.content))
+        elif msg.role == "agent":
+            langchain_messages.append(AIMessage(content=msg.content))
+    
+    profile = messages.profile.model_dump(exclude_none=True) if messages.profile else None
+    return new_agent_state(last_user_question, langchain_messages, profile)
+
+
+def new_agent_state(question: str, messages: list, profile: Optional[dict] = None, summary: Optional[str] = None) -> dict:
+    """Initial graph state for a question
+    
+    Args:
+        question: The question to answer
+        messages: LangChain conversation messages, ending with the question
+        profile: Optional school / audience / language pre-filter
+        summary: Rolling summary of the older turns (server-side sessions)
+        
+    Returns:
+        Initial AgentState dict
+    """
+    settings = get_settings()
+    return {
+        "messages": messages,
+        "summary": summary,
+        "question": question,
+        "profile": profile,
+        "retrieved_docs": [],
+        "retrieved_sources": [],
+        "retrieved_documents": [],
+        "answer": "",
+        "validation": None,
+        "is_valid": None,
+        "validation_path": None,
+        "grounding_score": None,
+        "answer_path": None,
+        "faq_score": None,
+        "retry_count": 0,
+        "max_retries": settings.agent_max_retries,
+        # Set once the execution is admitted (agents.runner.admitted)
+        "deadline": None,
+        "degraded": False,
+        "deadline_exceeded": False
+    }
+
+
+def error_response(status_code: int, message: str, retry_after: Optional[int] = None) -> JSONResponse:
+    """Error with a real HTTP status code (and the usual {"status", "message"} body)"""
+    headers = {"Retry-After": str(retry_after)} if retry_after is not None else None
+    return JSONResponse(status_code=status_code, content={"status": str(status_code), "message": message}, headers=headers)
+
+
+def rejected_response(error: AdmissionRejected) -> JSONResponse:
+    """429 (queue full) or 503 (queue wait timed out) with Retry-After"""
+    return error_response(error.status_code, str(error), retry_after=error.retry_after)
+
+
+def reject_stream_if_full() -> Optional[JSONResponse]:
+    """Real 429 for a streaming request that could not even queue (checked before the stream starts)"""
+    controller = get_admission_controller()
+    try:
+        if controller is not None:
+            controller.reject_if_full()
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    return None
+
 
 @router.post("/", summary="Ask something to the AI using multi-agent system")
 async def ask_agent(messages: MessageList):
@@ -21,45 +118,184 @@ async def ask_agent(messages: MessageList):
         messages: Conversation history with user messages
         
     Returns:
-        Response with status and generated answer
+        Response with status and generated answer; 429 / 503 with
+        Retry-After when the server is saturated
     """
     try:
-        # Extract the last user question
-        user_messages = [msg for msg in messages.messages if msg.role == "user"]
-        if not user_messages:
-            return {"status": "400", "message": "Aucune question utilisateur trouvée"}
-        
-        last_user_question = user_messages[-1].content
+        initial_state = build_initial_state(messages)
+        if initial_state is None:
+            return error_response(400, "Aucune question utilisateur trouvée")
         
-        # Convert message history to LangChain format
-        langchain_messages = []
-        for msg in messages.messages:
-            if msg.role == "user":
-                langchain_messages.append(HumanMessage(content=msg.content))
-            elif msg.role == "agent":
-                langchain_messages.append(AIMessage(content=msg.content))
+        # Answer cache, then the shared compiled agent graph (once admitted)
+        final_state = await run_agent(initial_state)
         
-        # Create the agent graph
-        agent_graph = create_agent_graph()
+        # Extract the answer from final state
+        answer = final_state.get("answer", "Erreur lors de la génération de la réponse")
         
-        # Prepare initial state
-        initial_state = {
-            "messages": langchain_messages,
-            "question": last_user_question,
-            "retrieved_docs": [],
-            "answer": "",
-            "validation": None,
-            "is_valid": None,
-            "retry_count": 0
-        }
+        # "path" tells which path served the answer: faq, cache or llm;
+        # "degraded" that it skipped validation (under load) or hit the deadline
+        return {"status": "200", "message": answer, "path": final_state["answer_path"], "degraded": is_degraded(final_state)}
+    
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    except Exception as e:
+        return error_response(500, f"Error: {str(e)}")
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def done_event(final_state: dict) -> dict:
+    """Payload of the final "done" event, the same whichever path served the answer"""
+    done = {
+        "message": final_state.get("answer") or "Erreur lors de la génération de la réponse",
+        "path": final_state["answer_path"],
+        "degraded": is_degraded(final_state),
+    }
+    # The Server-Timing header is sent before the stream, so the timings go in the last event
+    timings = get_request_timings()
+    if timings is not None:
+        done["timings"] = {name: round(seconds * 1000, 1) for name, seconds in timings.items()}
+    return done
+
+
+async def stream_agent_events(initial_state: dict, on_complete: Optional[Callable[[dict], Awaitable[None]]] = None):
+    """Run the agent graph and yield its progress as Server-Sent Events
+    
+    Args:
+        initial_state: Initial AgentState built from the request
+        on_complete: Called with the final state before the "done" event
+            (records the turn of a server-side session)
+    
+    Events:
+        retrieval: sources of the retrieved documents
+        token: a chunk of the answer being generated
+        reset: the streamed answer was rejected and is being regenerated
+        validation: result of each validation pass (or of the FAQ match)
+        done: the final answer (replaces everything streamed before) and the
+            path that served it (faq, cache or llm; no tokens are streamed
+            when an identical in-flight question is shared), with the
+            step durations in ms when HELPAI_SERVER_TIMING_HEADER is enabled
+        error: the workflow failed, or the request was shed by admission
+            control while queued (with "status" 503 and "retry_after")
+    """
+    agent_graph = get_agent_graph()
+    answer = ""
+    is_valid = None
+    sources = []
+    regenerating = False
+    path = None
+    deadline_exceeded = False
+    
+    try:
+        # An identical question is being answered right now: share its result
+        final_state = await join_in_flight(initial_state)
+        if final_state is not None:
+            if on_complete is not None:
+                await on_complete(final_state)
+            yield format_sse("retrieval", {"sources": final_state.get("retrieved_sources", [])})
+            yield format_sse("validation", {"is_valid": final_state.get("is_valid"), "validation": final_state.get("validation"), "path": final_state["answer_path"]})
+            yield format_sse("done", done_event(final_state))
+            return
         
-        # Execute the agent workflow
-        final_state = agent_graph.invoke(initial_state)
+        entry, embedding = await lookup_cached_answer(initial_state)
+        if entry is not None:
+            final_state = cached_state(initial_state, entry)
+            record_answer_path(final_state)
+            if on_complete is not None:
+                await on_complete(final_state)
+            yield format_sse("retrieval", {"sources": final_state["retrieved_sources"]})
+            yield format_sse("validation", {"is_valid": True, "validation": final_state["validation"], "path": "cache"})
+            yield format_sse("done", done_event(final_state))
+            return
         
-        # Extract the answer from final state
-        answer = final_state.get("answer", "Erreur lors de la génération de la réponse")
+        # Wait for an execution slot (admission control) before running the graph
+        async with admitted(initial_state):
+            async for mode, chunk in agent_graph.astream(initial_state, stream_mode=["updates", "messages"]):
+                if mode == "messages":
+                    message, metadata = chunk
+                    node = metadata.get("langgraph_node")
+                    if node not in STREAMED_NODES or not message.content:
+                        continue
+                    # The first regenerated token replaces the rejected answer
+                    if node == "regenerate_answer" and not regenerating:
+                        regenerating = True
+                        yield format_sse("reset", {"reason": "validation_failed"})
+                    yield format_sse("token", {"node": node, "content": message.content})
+                    continue
+            
+                for node, update in chunk.items():
+                    if not update:
+                        continue
+                    deadline_exceeded = deadline_exceeded or bool(update.get("deadline_exceeded"))
+                    if node == "retrieve_context":
+                        sources = update.get("retrieved_sources", [])
+                        yield format_sse("retrieval", {"sources": sources})
+                    elif node == "match_faq" and update.get("answer_path") == "faq":
+                        answer, is_valid, path = update["answer"], True, "faq"
+                        sources = update.get("retrieved_sources", sources)
+                        yield format_sse("validation", {"is_valid": True, "validation": update.get("validation"), "path": "faq"})
+                    elif node in STREAMED_NODES:
+                        answer = update.get("answer", answer)
+                        regenerating = False
+                    elif node == "validate_answer":
+                        is_valid = update.get("is_valid")
+                        yield format_sse("validation", {
+                            "is_valid": update.get("is_valid"),
+                            "validation": update.get("validation"),
+                            "path": update.get("validation_path"),
+                        })
         
-        return {"status": "200", "message": answer}
+        final_state = {
+            **initial_state,
+            "answer": answer,
+            "is_valid": is_valid,
+            "retrieved_sources": sources,
+            "answer_path": path,
+            "deadline_exceeded": deadline_exceeded,
+        }
+        path = record_answer_path(final_state)
+        store_answer(embedding, final_state)
+        if on_complete is not None:
+            await on_complete(final_state)
+        yield format_sse("done", done_event(final_state))
     
+    except AdmissionRejected as e:
+        # Headers are already sent: the status and Retry-After go in the event
+        yield format_sse("error", {"message": str(e), "status": e.status_code, "retry_after": e.retry_after})
     except Exception as e:
-        return {"status": "500", "message": f"Error: {str(e)}"}
+        yield format_sse("error", {"message": f"Error: {str(e)}"})
+
+
+@router.post("/stream", summary="Ask something to the AI and stream the answer (SSE)")
+async def ask_agent_stream(messages: MessageList):
+    """
+    Streaming variant of the multi-agent endpoint.
+    
+    Sends Server-Sent Events as the workflow progresses: retrieval results,
+    answer tokens as Ollama produces them, validation results and the final
+    answer. If validation fails, a "reset" event is sent before the tokens
+    of the regenerated answer.
+    
+    Args:
+        messages: Conversation history with user messages
+        
+    Returns:
+        text/event-stream response (429 with Retry-After if the admission
+        queue is full)
+    """
+    initial_state = build_initial_state(messages)
+    if initial_state is None:
+        return error_response(400, "Aucune question utilisateur trouvée")
+    
+    rejected = reject_stream_if_full()
+    if rejected is not None:
+        return rejected
+    
+    return StreamingResponse(
+        stream_agent_events(initial_state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
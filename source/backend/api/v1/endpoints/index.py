@@ -0,0 +1,62 @@
+from fastapi import APIRouter
+from api.v1.endpoints.ask_agent import error_response
+from core.config import get_settings
+from schemas.index import IndexActivationSchema, IndexReloadSchema
+from tools.executor import run_cpu_bound
+from tools.index_artifacts import ArtifactNotFoundError, current_version, list_versions, read_manifest
+from tools.rag_system import EmptyVectorStoreError, get_rag_system, reload_rag_system, swap_index_version
+
+router = APIRouter()
+
+@router.get("/", summary="Served index version and available versions")
+async def index_status():
+
+    rag_system = get_rag_system()
+    if rag_system.backend != "artifact":
+        return {"status": "200", "backend": rag_system.backend, "version": None, "versions": []}
+
+    artifacts_directory = get_settings().artifacts_directory
+    return {
+        "status": "200",
+        "backend": rag_system.backend,
+        "version": rag_system.index_version,
+        "active": current_version(artifacts_directory),
+        "versions": [read_manifest(artifacts_directory, version) for version in list_versions(artifacts_directory)],
+    }
+
+@router.post("/activate", summary="Hot-swap to another index version (or roll back)")
+async def activate_index(request: IndexActivationSchema):
+
+    try:
+
+        # Loading the new version happens off the event loop; requests keep being served
+        rag_system = await run_cpu_bound(swap_index_version, request.version)
+
+        return {"status": "200", "message": f"Now serving index {rag_system.index_version}", "version": rag_system.index_version}
+
+    except ArtifactNotFoundError as e:
+        return error_response(404, str(e))
+    except ValueError as e:
+        # The served backend cannot be hot-swapped
+        return error_response(400, str(e))
+    except Exception as e:
+        return error_response(500, str(e))
+
+@router.post("/reload", summary="Reload the vector store after tools.sync_index")
+async def reload_index(request: IndexReloadSchema):
+
+    try:
+
+        # Rebuilt off the event loop; requests keep being served by the previous store
+        rag_system = await run_cpu_bound(reload_rag_system, request.changed_ids)
+
+        return {"status": "200", "message": f"Vector store reloaded ({len(rag_system.vectorstore)} documents)"}
+
+    except EmptyVectorStoreError as e:
+        # The store on disk is unusable: a server-side problem, not a bad request
+        return error_response(500, str(e))
+    except ValueError as e:
+        # The served backend cannot be reloaded in place
+        return error_response(400, str(e))
+    except Exception as e:
+        return error_response(500, str(e))
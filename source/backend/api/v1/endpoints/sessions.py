@@ -0,0 +1,117 @@
+"""Server-side conversation sessions: the client only sends the new message"""
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from agents.runner import is_degraded, run_agent
+from agents.sessions import record_turn, session_messages
+from api.v1.endpoints.ask_agent import error_response, new_agent_state, reject_stream_if_full, rejected_response, stream_agent_events
+from schemas.session import SessionCreateSchema, SessionMessageSchema
+from tools.admission import AdmissionRejected
+from tools.session_store import Session, get_session_store
+
+router = APIRouter()
+
+
+def session_state(session: Session, question: str) -> dict:
+    """Initial graph state from the session (summary + recent messages) and the new question"""
+    return new_agent_state(question, session_messages(session, question), session.profile, session.summary)
+
+
+@router.post("/", summary="Start a conversation session")
+async def create_session(request: SessionCreateSchema = SessionCreateSchema()):
+    profile = request.profile.model_dump(exclude_none=True) if request.profile else None
+    session = await get_session_store().create(profile)
+    return {"status": "200", "session_id": session.id}
+
+
+@router.get("/{session_id}", summary="Summary and recent messages of a session")
+async def get_session(session_id: str):
+    session = await get_session_store().get(session_id)
+    if session is None:
+        return error_response(404, "Session introuvable")
+    return {
+        "status": "200",
+        "session_id": session.id,
+        "profile": session.profile,
+        "summary": session.summary,
+        "summarized_messages": session.summarized_count,
+        "messages": session.messages,
+    }
+
+
+@router.delete("/{session_id}", summary="Delete a session")
+async def delete_session(session_id: str):
+    store = get_session_store()
+    if await store.get(session_id) is None:
+        return error_response(404, "Session introuvable")
+    await store.delete(session_id)
+    return {"status": "200", "message": "Session supprimée"}
+
+
+@router.post("/{session_id}/messages", summary="Ask the next question of a session")
+async def ask_in_session(session_id: str, message: SessionMessageSchema):
+    """
+    Answer the new message with the multi-agent workflow, using the session's
+    rolling summary and recent turns as conversation history, then record
+    the turn in the session.
+    
+    Args:
+        session_id: ID returned by POST /sessions/
+        message: The new user message
+        
+    Returns:
+        Response with status, generated answer and the path that served it;
+        404 for an unknown or expired session, 429 / 503 with Retry-After
+        when the server is saturated
+    """
+    try:
+        session = await get_session_store().get(session_id)
+        if session is None:
+            return error_response(404, "Session introuvable")
+        question = message.content.strip()
+        if not question:
+            return error_response(400, "Aucune question utilisateur trouvée")
+        
+        final_state = await run_agent(session_state(session, question))
+        answer = final_state.get("answer", "Erreur lors de la génération de la réponse")
+        await record_turn(session, question, answer)
+        
+        return {
+            "status": "200",
+            "message": answer,
+            "path": final_state["answer_path"],
+            "degraded": is_degraded(final_state),
+            "session_id": session.id,
+        }
+    
+    except AdmissionRejected as e:
+        return rejected_response(e)
+    except Exception as e:
+        return error_response(500, f"Error: {str(e)}")
+
+
+@router.post("/{session_id}/messages/stream", summary="Ask the next question of a session and stream the answer (SSE)")
+async def ask_in_session_stream(session_id: str, message: SessionMessageSchema):
+    """
+    Streaming variant of POST /sessions/{session_id}/messages, with the
+    events of POST /ask_agent/stream. The turn is recorded before the
+    "done" event.
+    """
+    session = await get_session_store().get(session_id)
+    if session is None:
+        return error_response(404, "Session introuvable")
+    question = message.content.strip()
+    if not question:
+        return error_response(400, "Aucune question utilisateur trouvée")
+    
+    rejected = reject_stream_if_full()
+    if rejected is not None:
+        return rejected
+    
+    async def on_complete(final_state: dict):
+        await record_turn(session, question, final_state.get("answer", ""))
+    
+    return StreamingResponse(
+        stream_agent_events(session_state(session, question), on_complete=on_complete),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,6 +1,9 @@
 from fastapi import APIRouter
-from api.v1.endpoints import add_question, ask_agent
+from api.v1.endpoints import add_question, add_questions, ask_agent, index, sessions
 
 router = APIRouter()
 router.include_router(add_question.router, prefix="/add_question", tags=["add_question"])
-router.include_router(ask_agent.router, prefix="/ask_agent", tags=["ask_agent"])
\ No newline at end of file
+router.include_router(add_questions.router, prefix="/add_questions", tags=["add_questions"])
+router.include_router(ask_agent.router, prefix="/ask_agent", tags=["ask_agent"])
+router.include_router(index.router, prefix="/index", tags=["index"])
+router.include_router(sessions.router, prefix="/sessions", tags=["sessions"])
\ No newline at end of file
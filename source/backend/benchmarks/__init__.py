@@ -0,0 +1 @@
+"""Benchmarks of the backend (run from source/backend with `python -m benchmarks.<name>`)"""
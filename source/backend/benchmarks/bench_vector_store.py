@@ -0,0 +1,107 @@
+"""Chroma (HNSW) vs exact NumPy vector store on the QA corpus
+
+Both stores are built from the same precomputed embeddings, then queried with
+the same precomputed query vectors, so only the vector search is timed.
+
+Usage (from source/backend):
+    python -m benchmarks.bench_vector_store [--json ../database/samples/QA_clean.json] [--k 4] [--repeat 5]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from core.config import get_settings
+from tools.document_loader import load_qa_documents
+from tools.metadata_filters import profile_filter
+from tools.numpy_vector_store import NumpyVectorStore
+from tools.rag_system import document_ids
+
+
+def time_queries(search, query_vectors, repeat):
+    """Run every query `repeat` times, return per-call latencies (ms) and the last results"""
+    latencies, results = [], []
+    for _ in range(repeat):
+        results = []
+        for vector in query_vectors:
+            start = time.perf_counter()
+            results.append(search(vector))
+            latencies.append((time.perf_counter() - start) * 1000)
+    return latencies, results
+
+
+def summarize(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"  {name:<28} mean {statistics.mean(latencies):7.3f} ms   p50 {statistics.median(latencies):7.3f} ms   p95 {p95:7.3f} ms")
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", default="../database/samples/QA_clean.json")
+    parser.add_argument("--k", type=int, default=settings.k_docs)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = load_qa_documents(args.json)
+    ids = document_ids(documents)
+    texts = [doc.page_content for doc in documents]
+    metadatas = [doc.metadata for doc in documents]
+    queries = [doc.metadata["title"] for doc in documents if doc.metadata.get("title")]
+
+    embeddings = HuggingFaceEmbeddings(
+        model_name=settings.embedding_model,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    print("Embedding corpus and queries...")
+    doc_vectors = embeddings.embed_documents(texts)
+    query_vectors = embeddings.embed_documents(queries)
+
+    with tempfile.TemporaryDirectory() as chroma_dir, tempfile.TemporaryDirectory() as numpy_dir:
+        start = time.perf_counter()
+        chroma = Chroma(persist_directory=chroma_dir, embedding_function=embeddings)
+        chroma._collection.add(ids=ids, embeddings=doc_vectors, documents=texts, metadatas=metadatas)
+        chroma_build = time.perf_counter() - start
+
+        stores = {}
+        for dtype in ("float32", "float16"):
+            start = time.perf_counter()
+            store = NumpyVectorStore(embedding=embeddings, persist_directory=f"{numpy_dir}/{dtype}", dtype=dtype)
+            store.add_embeddings(texts, doc_vectors, metadatas, ids)
+            build = time.perf_counter() - start
+            # Reopen from disk to search on the memory-mapped matrix
+            stores[dtype] = (NumpyVectorStore(embedding=embeddings, persist_directory=f"{numpy_dir}/{dtype}", read_only=True), build)
+
+        print(f"\n{len(documents)} documents, {len(queries)} queries x {args.repeat}, k={args.k}")
+        print(f"Build: chroma {chroma_build:.2f}s, " + ", ".join(f"numpy-{dtype} {build:.2f}s" for dtype, (_, build) in stores.items()))
+        print("Matrix size: " + ", ".join(f"numpy-{dtype} {store.nbytes / 1e6:.2f} MB" for dtype, (store, _) in stores.items()))
+
+        where = profile_filter({"ecole": "ESILV", "utilisateur": "student", "langue": "Français"})
+        for label, filter_ in (("no filter", None), ("profile filter", where)):
+            print(f"\nSearch latency ({label}):")
+            latencies, chroma_results = time_queries(
+                lambda vector: chroma.similarity_search_by_vector(vector, k=args.k, filter=filter_),
+                query_vectors, args.repeat,
+            )
+            summarize("chroma (HNSW)", latencies)
+            for dtype, (store, _) in stores.items():
+                latencies, numpy_results = time_queries(
+                    lambda vector: store.similarity_search_by_vector(vector, k=args.k, filter=filter_),
+                    query_vectors, args.repeat,
+                )
+                overlap = np.mean([
+                    len({doc.page_content for doc in a} & {doc.page_content for doc in b}) / max(len(a), 1)
+                    for a, b in zip(chroma_results, numpy_results)
+                ])
+                summarize(f"numpy-{dtype} (exact)", latencies)
+                print(f"  {'':<28} top-{args.k} overlap with chroma: {overlap:.1%}")
+
+
+if __name__ == "__main__":
+    main()
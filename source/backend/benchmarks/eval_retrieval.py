@@ -0,0 +1,253 @@
+"""Offline retrieval evaluation: recall@k and MRR against latency and index size
+
+Every record of the QA export gives query / gold document pairs: its title,
+a keyword version of the title and a reformulated question (plus optional
+hand-written paraphrases), the gold document being the record's `id`. The
+pairs are run through RAGRetrieverTool for each configuration (embedding
+model, backend, HNSW parameters, hybrid on / off) and each k, so that the
+smallest k and the cheapest index keeping the recall can be picked. With
+--rerank on, each configuration is also run with the cross-encoder reranking
+its --rerank-fetch-k candidates.
+
+Usage (from source/backend):
+    python -m benchmarks.eval_retrieval [--k 1,2,3,4,6] [--backends chroma,numpy,numpy-float16]
+        [--models <model>,<model>] [--hnsw "M=16,construction_ef=100,search_ef=10;M=32,search_ef=50"]
+        [--hybrid on,off] [--rerank off,on] [--paraphrases paraphrases.jsonl] [--target-recall 0.95]
+
+Paraphrase files hold one {"query": ..., "id": ...} object per line.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from agents.tools import RAGRetrieverTool
+from benchmarks.load_test import RESULTS_DIRECTORY, git_commit, percentile
+from core.config import get_settings
+from tools.bm25 import STOPWORDS
+from tools.document_loader import load_qa_documents
+from tools.rag_system import RAGSystem
+from tools.reranker import CrossEncoderReranker
+
+# Question openings rewritten into a longer, differently worded request
+_REWRITES = [
+    (re.compile(r"^comment\s+", re.IGNORECASE), "je voudrais savoir comment "),
+    (re.compile(r"^(où|quand|qui|quel|quelle|quels|quelles|pourquoi|combien)\b", re.IGNORECASE), r"pouvez-vous me dire \1"),
+    (re.compile(r"^est-ce que\s+", re.IGNORECASE), "j'aimerais savoir si "),
+    (re.compile(r"^(puis-je|peut-on|dois-je)\s+", re.IGNORECASE), "est-il possible de "),
+    (re.compile(r"^(how|what|where|when|who|which|why)\b", re.IGNORECASE), r"could you tell me \1"),
+    (re.compile(r"^(can|do|is|are|should)\s+(i|we)\s+", re.IGNORECASE), r"I would like to know if \2 "),
+]
+_WORD_RE = re.compile(r"[\w'-]+", re.UNICODE)
+
+
+def keyword_query(title: str) -> str:
+    """Title reduced to its content words, lowercase, without punctuation"""
+    return " ".join(word for word in _WORD_RE.findall(title.lower()) if word not in STOPWORDS)
+
+
+def reformulate(title: str, rng: random.Random) -> str:
+    """Heuristic paraphrase: one content word dropped, reworded opening, no punctuation"""
+    words = title.strip().rstrip("?!. ").split()
+    content = [i for i, word in enumerate(words) if i > 0 and len(word) > 3 and word.lower() not in STOPWORDS]
+    if len(content) > 3:
+        del words[rng.choice(content)]
+    text = " ".join(words)
+    text = text[:1].lower() + text[1:]
+
+    for pattern, replacement in _REWRITES:
+        if pattern.search(text):
+            return pattern.sub(replacement, text, count=1)
+    return "j'ai une question : " + text
+
+
+def build_pairs(documents, kinds: List[str], paraphrases: Optional[str], seed: int) -> List[dict]:
+    """Query / gold-id pairs from the export (and an optional paraphrase file)"""
+    rng = random.Random(seed)
+    pairs = []
+    for doc in documents:
+        title, gold = (doc.metadata.get("title") or "").strip(), doc.metadata.get("id")
+        if not title or gold is None:
+            continue
+        queries = {"title": title, "keywords": keyword_query(title), "reformulated": reformulate(title, rng)}
+        pairs.extend({"kind": kind, "query": queries[kind], "gold": str(gold)} for kind in kinds if queries[kind])
+
+    if paraphrases:
+        with open(paraphrases, encoding="utf-8") as f:
+            for line in filter(str.strip, f):
+                item = json.loads(line)
+                pairs.append({"kind": "paraphrase", "query": item["query"], "gold": str(item["id"])})
+    return pairs
+
+
+def parse_hnsw(value: str) -> List[Optional[dict]]:
+    """ "M=16,search_ef=10;M=32" -> Chroma collection metadata dicts (None = Chroma defaults) """
+    configs = []
+    for spec in filter(None, (part.strip() for part in value.split(";"))):
+        if spec == "default":
+            configs.append(None)
+            continue
+        configs.append({f"hnsw:{key.strip()}": int(number) for key, number in (item.split("=") for item in spec.split(","))})
+    return configs or [None]
+
+
+def directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def evaluate(
+    rag_system: RAGSystem,
+    pairs: List[dict],
+    ks: List[int],
+    reranker: Optional[CrossEncoderReranker] = None,
+    fetch_k: int = 12,
+) -> dict:
+    """Run every pair through the retriever tool at the largest k and score each k"""
+    tool = RAGRetrieverTool(rag_system=rag_system, k_docs=max(ks), reranker=reranker, fetch_k=fetch_k)
+    tool.retrieve(pairs[0]["query"])  # first call loads lazily initialized parts
+
+    latencies = []
+    ranks_by_kind: Dict[str, List[Optional[int]]] = {}
+    for pair in pairs:
+        start = time.perf_counter()
+        docs = tool.retrieve(pair["query"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids = [str(doc.metadata.get("id")) for doc in docs]
+        rank = ids.index(pair["gold"]) + 1 if pair["gold"] in ids else None
+        ranks_by_kind.setdefault(pair["kind"], []).append(rank)
+
+    def scores(ranks):
+        return {
+            "queries": len(ranks),
+            "recall": {k: sum(1 for rank in ranks if rank is not None and rank <= k) / len(ranks) for k in ks},
+            "mrr": sum(1 / rank for rank in ranks if rank is not None) / len(ranks),
+        }
+
+    all_ranks = [rank for ranks in ranks_by_kind.values() for rank in ranks]
+    return {
+        **scores(all_ranks),
+        "by_kind": {kind: scores(ranks) for kind, ranks in ranks_by_kind.items()},
+        "latency_ms": {
+            "mean": statistics.mean(latencies),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+        },
+    }
+
+
+def print_result(result: dict, ks: List[int], target: float):
+    recall = result["recall"]
+    smallest = next((k for k in ks if recall[k] >= target), None)
+    print(
+        f"{result['name']:<58} " + " ".join(f"{recall[k]:6.1%}" for k in ks)
+        + f"  {result['mrr']:6.3f}  {result['latency_ms']['p50']:7.2f} {result['latency_ms']['p95']:7.2f}"
+        + f"  {result['index_mb']:7.2f}  {smallest if smallest else '-':>5}"
+    )
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", default="../database/samples/QA_clean.json")
+    parser.add_argument("--k", default="1,2,3,4,6", type=lambda value: sorted(int(k) for k in value.split(",")))
+    parser.add_argument("--models", default=settings.embedding_model, type=lambda value: value.split(","))
+    parser.add_argument("--backends", default="chroma,numpy,numpy-float16", type=lambda value: value.split(","))
+    parser.add_argument("--hnsw", default="default", type=parse_hnsw, help='Chroma HNSW settings, ";"-separated')
+    parser.add_argument("--hybrid", default="on,off", type=lambda value: [v.strip() == "on" for v in value.split(",")])
+    parser.add_argument("--rerank", default="off", type=lambda value: [v.strip() == "on" for v in value.split(",")])
+    parser.add_argument("--rerank-model", default=settings.rerank_model)
+    parser.add_argument("--rerank-fetch-k", type=int, default=settings.rerank_fetch_k)
+    parser.add_argument("--queries", default="title,keywords,reformulated", type=lambda value: value.split(","))
+    parser.add_argument("--paraphrases", help="JSONL file of {\"query\", \"id\"} paraphrases")
+    parser.add_argument("--sample", type=int, default=0, help="Evaluate on a random sample of pairs (0 for all)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/eval-<commit>-<time>.json)")
+    args = parser.parse_args()
+
+    documents = load_qa_documents(args.json)
+    pairs = build_pairs(documents, args.queries, args.paraphrases, args.seed)
+    if args.sample:
+        pairs = random.Random(args.seed).sample(pairs, min(args.sample, len(pairs)))
+    print(f"{len(pairs)} query / gold pairs from {len(documents)} documents")
+
+    reranker = None
+    if any(args.rerank):
+        reranker = CrossEncoderReranker(args.rerank_model, max_length=settings.rerank_max_length)
+
+    results = []
+    header = (f"\n{'configuration':<58} " + " ".join(f"{'R@' + str(k):>6}" for k in args.k)
+              + f"  {'MRR':>6}  {'p50 ms':>7} {'p95 ms':>7}  {'idx MB':>7}  {'min k':>5}")
+    for model in args.models:
+        embeddings = HuggingFaceEmbeddings(
+            model_name=model,
+            model_kwargs={'device': 'cpu'},
+            encode_kwargs={'normalize_embeddings': True}
+        )
+        for backend, hybrid in itertools.product(args.backends, args.hybrid):
+            backend_name, _, dtype = backend.partition("-")
+            for hnsw in (args.hnsw if backend_name == "chroma" else [None]):
+                with tempfile.TemporaryDirectory() as directory:
+                    start = time.perf_counter()
+                    rag_system = RAGSystem(
+                        documents=documents,
+                        persist_directory=directory,
+                        embedding_model=model,
+                        k_docs=max(args.k),
+                        hybrid=hybrid,
+                        hybrid_fetch_k=settings.hybrid_fetch_k,
+                        rrf_k=settings.rrf_k,
+                        backend=backend_name,
+                        vector_dtype=dtype or "float32",
+                        embeddings=embeddings,
+                        collection_metadata=hnsw,
+                    )
+                    build_seconds = time.perf_counter() - start
+
+                    for rerank in args.rerank:
+                        result = evaluate(
+                            rag_system, pairs, args.k,
+                            reranker=reranker if rerank else None,
+                            fetch_k=args.rerank_fetch_k,
+                        )
+                        hnsw_label = ",".join(f"{key[5:]}={value}" for key, value in hnsw.items()) if hnsw else ""
+                        name = (f"{model.split('/')[-1]} {backend}{'(' + hnsw_label + ')' if hnsw_label else ''} "
+                                f"{'hybrid' if hybrid else 'dense'}{f' rerank@{args.rerank_fetch_k}' if rerank else ''}")
+                        result.update({
+                            "name": name,
+                            "model": model,
+                            "backend": backend,
+                            "hnsw": hnsw,
+                            "hybrid": hybrid,
+                            "rerank": args.rerank_model if rerank else None,
+                            "build_seconds": build_seconds,
+                            "index_mb": directory_size(directory) / 1e6,
+                        })
+                        results.append(result)
+                        print_result(result, args.k, args.target_recall)
+
+    print(header)
+    for result in results:
+        print_result(result, args.k, args.target_recall)
+    print(f"\nmin k: smallest k with recall >= {args.target_recall:.0%}; idx MB: on-disk index size")
+
+    output = args.output or os.path.join(
+        RESULTS_DIRECTORY, f"eval-{git_commit()}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"commit": git_commit(), "pairs": len(pairs), "k": args.k, "results": results}, f, indent=2)
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""Local stand-in for the Ollama HTTP API, for reproducible load tests
+
+Serves /api/chat (streamed NDJSON or single JSON) and /api/generate (the
+warm-up call) with a configurable load, prefill and per-token latency. The
+answer is taken from the documents section of the prompt, so that the
+groundedness tier behaves as with a real model; validator prompts get the
+scripted VALID / INVALID replies in turn. The timing fields of the final
+message (load_duration, prompt_eval_duration, eval_duration, counts) mimic
+those of Ollama.
+
+Usage (from source/backend):
+    python -m benchmarks.fake_ollama [--port 11435] [--token-latency-ms 20] [--validator-replies VALID,INVALID]
+    HELPAI_OLLAMA_BASE_URL=http://localhost:11435 uvicorn main:app
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Markers of the prompts in agents/prompts.py
+DOCUMENTS_MARKER = "=== DOCUMENTS DE LA BASE DE CONNAISSANCES ==="
+QUESTION_MARKER = "=== QUESTION ==="
+VALIDATOR_MARKER = "Tu es maintenant validateur"
+NO_INFO_ANSWER = "Je n'ai pas d'information sur ce sujet dans ma base de connaissances."
+
+VALIDATOR_REASONS = {
+    "VALID": "la réponse s'appuie sur les documents",
+    "INVALID": "la réponse contient des informations absentes des documents",
+}
+_TOKEN_RE = re.compile(r"\S+\s*")
+
+
+class FakeOllama:
+    """Scripted model: latency parameters and validator verdicts"""
+
+    def __init__(
+        self,
+        token_latency_ms: float = 20.0,
+        prefill_ms_per_token: float = 0.5,
+        load_ms: float = 0.0,
+        answer_tokens: int = 60,
+        validator_replies: List[str] = ("VALID",),
+    ):
+        """
+        Args:
+            token_latency_ms: Decode time of each generated token
+            prefill_ms_per_token: Prompt evaluation time per prompt token
+            load_ms: Model load time paid by the first request only
+            answer_tokens: Maximum number of tokens of a generated answer
+            validator_replies: Verdicts returned to validator prompts, in turn
+        """
+        self.token_latency = token_latency_ms / 1000
+        self.prefill_per_token = prefill_ms_per_token / 1000
+        self.load_seconds = load_ms / 1000
+        self.answer_tokens = answer_tokens
+        self._verdicts = itertools.cycle([reply.strip().upper() for reply in validator_replies])
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def load_time(self) -> float:
+        """Load time to pay now (the model is loaded once)"""
+        with self._lock:
+            if self._loaded:
+                return 0.0
+            self._loaded = True
+            return self.load_seconds
+
+    def reply(self, prompt: str) -> str:
+        """Text the fake model answers to a prompt"""
+        if VALIDATOR_MARKER in prompt:
+            with self._lock:
+                verdict = next(self._verdicts)
+            return f"{verdict}: {VALIDATOR_REASONS.get(verdict, '')}"
+
+        # First answer found in the documents section, cut to the answer length
+        documents = prompt.split(DOCUMENTS_MARKER, 1)[-1].split(QUESTION_MARKER, 1)[0]
+        _, found, answer = documents.partition("Réponse:")
+        answer = answer.split("\n\nDocument ", 1)[0].replace("[…]", " ").strip()
+        if not found or not answer:
+            return NO_INFO_ANSWER
+        return "".join(_TOKEN_RE.findall(" ".join(answer.split()))[:self.answer_tokens]).strip()
+
+    async def generate(self, prompt: str):
+        """Yield (token, final_stats) pairs, sleeping like a real model would"""
+        start = time.perf_counter()
+        load = self.load_time()
+        prompt_tokens = max(1, len(prompt) // 4)
+        prefill = prompt_tokens * self.prefill_per_token
+        await asyncio.sleep(load + prefill)
+
+        tokens = _TOKEN_RE.findall(self.reply(prompt))
+        decode_start = time.perf_counter()
+        for token in tokens:
+            await asyncio.sleep(self.token_latency)
+            yield token, None
+
+        yield "", {
+            "total_duration": int((time.perf_counter() - start) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prefill * 1e9),
+            "eval_count": len(tokens),
+            "eval_duration": int((time.perf_counter() - decode_start) * 1e9),
+        }
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def create_app(model: FakeOllama) -> FastAPI:
+    """Build the fake Ollama API around a scripted model"""
+    app = FastAPI(title="Fake Ollama")
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        prompt = "\n".join(message.get("content") or "" for message in body.get("messages", []))
+        name = body.get("model", "fake")
+
+        async def chunks():
+            async for token, stats in model.generate(prompt):
+                message = {"role": "assistant", "content": token}
+                if stats is None:
+                    yield {"model": name, "created_at": _now(), "message": message, "done": False}
+                else:
+                    yield {"model": name, "created_at": _now(), "message": message, "done": True, "done_reason": "stop", **stats}
+
+        if body.get("stream", True):
+            async def ndjson():
+                async for chunk in chunks():
+                    yield json.dumps(chunk, ensure_ascii=False) + "\n"
+            return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+        content, final = "", {}
+        async for chunk in chunks():
+            content += chunk["message"]["content"]
+            final = chunk
+        final["message"] = {"role": "assistant", "content": content}
+        return final
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        name = body.get("model", "fake")
+        # Warm-up call (empty prompt): only loads the model
+        if not body.get("prompt"):
+            load = model.load_time()
+            await asyncio.sleep(load)
+            final = {"model": name, "created_at": _now(), "response": "", "done": True, "done_reason": "load", "load_duration": int(load * 1e9)}
+        else:
+            response, final = "", {}
+            async for token, stats in model.generate(body["prompt"]):
+                response += token
+                final = stats or final
+            final = {"model": name, "created_at": _now(), "response": response, "done": True, "done_reason": "stop", **final}
+        if body.get("stream", True):
+            return StreamingResponse(iter([json.dumps(final) + "\n"]), media_type="application/x-ndjson")
+        return final
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": []}
+
+    @app.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-fake"}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-latency-ms", type=float, default=20.0)
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.5)
+    parser.add_argument("--load-ms", type=float, default=0.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--validator-replies", default="VALID", help="Comma-separated verdicts returned in turn (ex: VALID,INVALID)")
+    args = parser.parse_args()
+
+    model = FakeOllama(
+        token_latency_ms=args.token_latency_ms,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+        load_ms=args.load_ms,
+        answer_tokens=args.answer_tokens,
+        validator_replies=args.validator_replies.split(","),
+    )
+    uvicorn.run(create_app(model), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
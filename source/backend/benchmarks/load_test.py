@@ -0,0 +1,215 @@
+"""Load test of /v1/ask_agent: latency percentiles, throughput and per-node breakdown
+
+Replays questions sampled from the QA export against a running backend at
+several concurrency levels and writes a JSON report tagged with the git
+commit, so that runs can be compared across commits. Start the backend with
+HELPAI_SERVER_TIMING_HEADER=true to get the per-node breakdown, and against
+benchmarks.fake_ollama for runs that do not depend on a real model.
+The sampled questions are the stored titles, which the FAQ fast path answers
+without calling the model: start the backend with HELPAI_FAQ_ENABLED=false
+(and HELPAI_ANSWER_CACHE_ENABLED=false for repeated questions) to measure the
+full workflow. Each level reports the mix of paths (faq, cache, llm) that
+served the answers.
+
+Usage (from source/backend):
+    python -m benchmarks.load_test [--url http://localhost:8000] [--concurrency 1,4,16] [--requests 50]
+    python -m benchmarks.load_test --baseline benchmarks/results/<old>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from tools.document_loader import iter_json_array
+
+RESULTS_DIRECTORY = os.path.join(os.path.dirname(__file__), "results")
+
+
+def load_questions(json_path: str, sample: int, seed: int) -> List[str]:
+    """Sample question titles from the QA export (reproducible with the seed)"""
+    titles = [item["Title"].strip() for item in iter_json_array(json_path) if (item.get("Title") or "").strip()]
+    random.Random(seed).shuffle(titles)
+    return titles[:sample] if sample else titles
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Linear-interpolated percentile (q in [0, 100]) of unsorted values"""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Server-Timing header -> {name: milliseconds}"""
+    timings = {}
+    for entry in filter(None, (part.strip() for part in header.split(","))):
+        name, _, params = entry.partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur":
+                timings[name.strip()] = float(value)
+    return timings
+
+
+async def ask(client: httpx.AsyncClient, url: str, question: str) -> dict:
+    """Send one question, return its latency, outcome, serving path and server timings"""
+    payload = {"messages": [{"id": datetime.now(timezone.utc).isoformat(), "role": "user", "content": question}]}
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, json=payload)
+        latency = (time.perf_counter() - start) * 1000
+        body = response.json()
+        ok = response.is_success and str(body.get("status", "200")) == "200"
+        return {
+            "latency_ms": latency,
+            "ok": ok,
+            "status": response.status_code,
+            "path": body.get("path") if ok else None,
+            "timings": parse_server_timing(response.headers.get("server-timing", "")),
+        }
+    except Exception as e:
+        return {"latency_ms": (time.perf_counter() - start) * 1000, "ok": False, "status": type(e).__name__, "path": None, "timings": {}}
+
+
+async def run_level(url: str, questions: List[str], concurrency: int, requests: int, timeout: float) -> dict:
+    """Send `requests` questions with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+        async def worker(question):
+            async with semaphore:
+                return await ask(client, url, question)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(worker(questions[i % len(questions)]) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies = [result["latency_ms"] for result in results if result["ok"]]
+    statuses = defaultdict(int)
+    paths = defaultdict(int)
+    node_timings = defaultdict(list)
+    for result in results:
+        statuses[str(result["status"])] += 1
+        if result["path"]:
+            paths[result["path"]] += 1
+        for name, milliseconds in result["timings"].items():
+            node_timings[name].append(milliseconds)
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": requests - len(latencies),
+        "statuses": dict(statuses),
+        # Answers served by the FAQ fast path or the cache skip the model
+        "paths": dict(paths),
+        "duration_s": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {f"p{q}": percentile(latencies, q) for q in (50, 95, 99)} | {"max": max(latencies, default=None)},
+        # Mean over the requests that went through each step (retries only for some)
+        "breakdown_ms": {
+            name: {"mean": sum(values) / len(values), "p95": percentile(values, 95), "count": len(values)}
+            for name, values in sorted(node_timings.items())
+        },
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _fmt(value: Optional[float], width: int = 9) -> str:
+    return f"{value:{width}.1f}" if value is not None else f"{'-':>{width}}"
+
+
+def print_report(report: dict, baseline: Optional[dict] = None):
+    """Print one line per concurrency level (and the change from the baseline)"""
+    base_levels = {level["concurrency"]: level for level in (baseline or {}).get("levels", [])}
+    print(f"\nCommit {report['commit']}  ({report['url']})")
+    print(f"{'conc':>5} {'req':>5} {'err':>4} {'rps':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for level in report["levels"]:
+        latency = level["latency_ms"]
+        print(f"{level['concurrency']:>5} {level['requests']:>5} {level['errors']:>4} {level['rps']:7.2f} "
+              f"{_fmt(latency['p50'])} {_fmt(latency['p95'])} {_fmt(latency['p99'])}")
+        base = base_levels.get(level["concurrency"])
+        if base:
+            deltas = []
+            for key in ("p50", "p95", "p99"):
+                old, new = base["latency_ms"].get(key), latency.get(key)
+                if old and new is not None:
+                    deltas.append(f"{key} {100 * (new - old) / old:+.1f}%")
+            if base["rps"]:
+                deltas.append(f"rps {100 * (level['rps'] - base['rps']) / base['rps']:+.1f}%")
+            print(f"{'':>5} vs {baseline['commit']}: " + ", ".join(deltas))
+        if level.get("paths"):
+            print(f"{'':>11} paths: " + ", ".join(f"{path} {count}" for path, count in sorted(level["paths"].items())))
+        for name, stats in level["breakdown_ms"].items():
+            print(f"{'':>11} {name:<20} mean {_fmt(stats['mean'])} ms   p95 {_fmt(stats['p95'])} ms   ({stats['count']} req)")
+
+
+async def run(args) -> dict:
+    questions = load_questions(args.json, args.sample, args.seed)
+    url = args.url.rstrip("/") + "/v1/ask_agent/"
+    levels = []
+    for concurrency in args.concurrency:
+        if args.warmup:
+            await run_level(url, questions[:args.warmup], concurrency, args.warmup, args.timeout)
+        print(f"Concurrency {concurrency}: {args.requests} requests...")
+        levels.append(await run_level(url, questions, concurrency, args.requests, args.timeout))
+    return {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "url": args.url,
+        "questions": len(questions),
+        "seed": args.seed,
+        "levels": levels,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--json", default="../database/samples/QA_clean.json")
+    parser.add_argument("--concurrency", default="1,4,16", type=lambda value: [int(c) for c in value.split(",")])
+    parser.add_argument("--requests", type=int, default=50, help="Requests per concurrency level")
+    parser.add_argument("--sample", type=int, default=200, help="Number of distinct questions (0 for all)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests before each level")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--baseline", help="Previous report to compare with")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    output = args.output or os.path.join(
+        RESULTS_DIRECTORY, f"{report['commit']}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport written to {output}")
+
+
+if __name__ == "__main__":
+    main()
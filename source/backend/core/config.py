@@ -0,0 +1,131 @@
+"""Application settings loaded from the environment (and the .env file)"""
+from functools import lru_cache
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """Backend configuration, overridable with HELPAI_* environment variables"""
+
+    model_config = SettingsConfigDict(env_prefix="HELPAI_", env_file=".env", extra="ignore")
+
+    # Vector store backend: "chroma" (HNSW + SQLite), "numpy" (exact, memory-mapped)
+    # or "artifact" (read-only prebuilt versions, see tools/build_index.py)
+    vector_backend: str = "chroma"
+    # Vector store locations, relative to the backend working directory
+    persist_directory: str = "../database/prod"
+    numpy_directory: str = "../database/numpy"
+    artifacts_directory: str = "../database/artifacts"
+    # Interval between checks of the active artifact version (0 disables the watcher)
+    artifact_poll_seconds: float = 30.0
+    # Storage type of the NumPy embedding matrix ("float32" or "float16")
+    vector_dtype: str = "float32"
+    # Multilingual embedding model (French + English questions)
+    embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+    # Default number of documents returned by the retriever
+    k_docs: int = 4
+    # Number of documents embedded per batch by the bulk ingestion
+    ingest_batch_size: int = 64
+    # Hybrid retrieval: BM25 + dense results fused by reciprocal rank
+    hybrid_retrieval: bool = True
+    hybrid_fetch_k: int = 20
+    rrf_k: int = 60
+    # Query embedding cache: in-memory LRU size and on-disk store (empty to disable)
+    embedding_cache_size: int = 10000
+    embedding_cache_path: str = "../database/cache/query_embeddings.sqlite"
+    # Micro-batching of concurrent query embeddings (batch size 1 disables it)
+    embedding_batch_size: int = 32
+    embedding_batch_wait_ms: float = 5.0
+    # Optional cross-encoder reranking: rerank_fetch_k candidates are retrieved
+    # and scored on CPU, and only the rerank_top_n best go into the prompt
+    rerank_enabled: bool = False
+    rerank_model: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    rerank_fetch_k: int = 12
+    rerank_top_n: int = 3
+    rerank_max_length: int = 512
+    rerank_cache_size: int = 20000
+
+    # Ollama server and shared HTTP connection pool
+    ollama_base_url: str = "http://localhost:11434"
+    ollama_max_connections: int = 20
+    ollama_max_keepalive_connections: int = 10
+    ollama_timeout: float = 120.0
+    # How long Ollama keeps the model loaded after a request, and interval of
+    # the background warm-up that pins it in memory (0 disables the warm-up)
+    ollama_keep_alive: str = "30m"
+    ollama_warmup_interval_seconds: float = 600.0
+
+    # Sampling temperature shared by all agent nodes (one model configuration,
+    # so Ollama can reuse the loaded model and the prompt prefix cache)
+    agent_temperature: float = 0.2
+
+    # Agent retry budget and per-request latency deadline
+    agent_max_retries: int = 1
+    agent_deadline_seconds: float = 60.0
+    # Do not start an LLM step with less time than this left before the deadline
+    agent_min_step_seconds: float = 3.0
+
+    # Admission control: at most admission_max_concurrent agent executions reach
+    # Ollama at once, up to admission_max_queue requests wait (429 beyond) for
+    # at most admission_queue_timeout_seconds (503 beyond); requests admitted
+    # while admission_degrade_queue_depth are waiting skip the validation
+    # (0 disables the degraded mode, admission_max_concurrent 0 the whole control)
+    admission_max_concurrent: int = 4
+    admission_max_queue: int = 32
+    admission_queue_timeout_seconds: float = 20.0
+    admission_degrade_queue_depth: int = 8
+
+    # Tiered validation: answers scoring above / below these groundedness
+    # thresholds are accepted / rejected without calling the LLM validator
+    grounding_enabled: bool = True
+    grounding_accept_threshold: float = 0.80
+    grounding_reject_threshold: float = 0.45
+    grounding_semantic_weight: float = 0.7
+
+    # FAQ fast path: questions matching a stored title (normalized, or with a
+    # cosine similarity above the threshold among the top retrieved documents)
+    # are answered with the stored answer, without calling the LLM
+    faq_enabled: bool = True
+    faq_similarity_threshold: float = 0.93
+    faq_candidates: int = 3
+
+    # Concurrent identical first-turn questions (normalized text + profile)
+    # share a single in-flight execution
+    coalescing_enabled: bool = True
+
+    # Semantic answer cache (cosine similarity on question embeddings)
+    answer_cache_enabled: bool = True
+    answer_cache_threshold: float = 0.95
+    answer_cache_ttl_seconds: float = 3600.0
+    answer_cache_max_size: int = 1000
+
+    # Prompt context budget (approximate tokens): retrieved documents are
+    # de-duplicated and trimmed to their most relevant passages, and only
+    # the most recent conversation turns are kept
+    context_token_budget: int = 1200
+    context_dedup_threshold: float = 0.85
+    history_token_budget: int = 400
+    history_max_turns: int = 6
+
+    # Server-side conversation sessions: in-memory LRU / TTL store in front of
+    # one JSON file per session (empty directory keeps them in memory only).
+    # Past session_summary_trigger_turns turns, the oldest ones are folded into
+    # a rolling summary in the background, keeping the last session_keep_turns
+    session_directory: str = "../database/sessions"
+    session_max_size: int = 1000
+    session_ttl_seconds: float = 86400.0
+    session_summary_trigger_turns: int = 6
+    session_keep_turns: int = 3
+    session_summary_max_tokens: int = 150
+
+    # Add a Server-Timing header (and "timings" in the final SSE event) with the
+    # per-node and per-step durations of each request
+    server_timing_header: bool = False
+
+    # Size of the thread pool running blocking embedding / vector search work
+    cpu_workers: int = 4
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings instance"""
+    return Settings()
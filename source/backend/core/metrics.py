@@ -0,0 +1,163 @@
+"""Prometheus metrics shared by the agent workflow and the API"""
+from prometheus_client import Counter, Gauge, Histogram
+
+# Latency buckets (seconds) shared by the request, node and stage histograms
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+# End-to-end and per-step latency
+REQUEST_SECONDS = Histogram(
+    "helpai_request_seconds",
+    "HTTP request duration (time to the response headers for streamed responses)",
+    ["method", "path"],
+    buckets=LATENCY_BUCKETS,
+)
+NODE_SECONDS = Histogram(
+    "helpai_agent_node_seconds",
+    "Duration of each agent graph node",
+    ["node"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "helpai_stage_seconds",
+    "Duration of sub-steps inside the nodes (embedding, vector_search, llm, grounding)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+
+# Retry loop of the agent graph
+AGENT_RETRIES = Counter(
+    "helpai_agent_retries_total",
+    "Answer regenerations triggered by a failed validation",
+)
+AGENT_RETRY_BUDGET_EXHAUSTED = Counter(
+    "helpai_agent_retry_budget_exhausted_total",
+    "Requests that ended with an invalid answer because the retry budget was used up",
+)
+AGENT_DEADLINE_EXCEEDED = Counter(
+    "helpai_agent_deadline_exceeded_total",
+    "Workflow steps skipped or cut short because the request deadline was reached",
+    ["node"],
+)
+
+# Which path served each answer
+ANSWER_PATH = Counter(
+    "helpai_answer_path_total",
+    "Answers by serving path (faq, cache, llm)",
+    ["path"],
+)
+
+# Single-flight coalescing of identical in-flight questions
+COALESCED_REQUESTS = Counter(
+    "helpai_coalesced_requests_total",
+    "Requests that shared the in-flight execution of an identical question",
+)
+INFLIGHT_EXECUTIONS = Gauge(
+    "helpai_inflight_executions",
+    "Distinct question executions currently shared by the single-flight group",
+)
+
+# Semantic answer cache
+ANSWER_CACHE_HITS = Counter(
+    "helpai_answer_cache_hits_total",
+    "Questions answered from the semantic answer cache",
+)
+ANSWER_CACHE_MISSES = Counter(
+    "helpai_answer_cache_misses_total",
+    "Cacheable questions that were not found in the semantic answer cache",
+)
+
+# Query embedding cache
+EMBEDDING_CACHE_REQUESTS = Counter(
+    "helpai_embedding_cache_requests_total",
+    "Query embedding lookups by result (memory_hit, disk_hit, miss)",
+    ["result"],
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "helpai_embedding_batch_size",
+    "Number of distinct queries encoded together by the embedding micro-batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+# Tiered answer validation
+VALIDATION_PATH = Counter(
+    "helpai_validation_path_total",
+    "Validations by path (no_info, grounding_accept, grounding_reject, llm, deadline)",
+    ["path"],
+)
+GROUNDING_SCORE = Histogram(
+    "helpai_grounding_score",
+    "Embedding-based groundedness score of generated answers",
+    buckets=(0.2, 0.3, 0.4, 0.5, 0.55, 0.6, 0.65, 0.7, 0.75, 0.8, 0.85, 0.9, 1.0),
+)
+
+# Ollama timings reported with each response (load / prefill / decode)
+OLLAMA_LOAD_SECONDS = Histogram(
+    "helpai_ollama_load_seconds",
+    "Time Ollama spent loading the model before answering",
+    ["node"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+OLLAMA_PREFILL_SECONDS = Histogram(
+    "helpai_ollama_prefill_seconds",
+    "Time Ollama spent evaluating the prompt (prefill)",
+    ["node"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0),
+)
+OLLAMA_DECODE_SECONDS = Histogram(
+    "helpai_ollama_decode_seconds",
+    "Time Ollama spent generating the answer tokens (decode)",
+    ["node"],
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+)
+OLLAMA_TOKENS_PER_SECOND = Histogram(
+    "helpai_ollama_tokens_per_second",
+    "Decode speed reported by Ollama (generated tokens / eval duration)",
+    ["node"],
+    buckets=(2, 5, 10, 15, 20, 30, 40, 60, 80, 120),
+)
+OLLAMA_PROMPT_TOKENS = Counter(
+    "helpai_ollama_prompt_tokens_total",
+    "Prompt tokens evaluated by Ollama (cached prefix tokens are not counted)",
+    ["node"],
+)
+OLLAMA_GENERATED_TOKENS = Counter(
+    "helpai_ollama_generated_tokens_total",
+    "Tokens generated by Ollama",
+    ["node"],
+)
+
+# Cross-encoder reranking
+RERANK_SECONDS = Histogram(
+    "helpai_rerank_seconds",
+    "Cross-encoder scoring time of the uncached (question, document) pairs of a query",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+RERANK_CACHE_REQUESTS = Counter(
+    "helpai_rerank_cache_requests_total",
+    "(question, document) reranking scores by result (hit, miss)",
+    ["result"],
+)
+
+# Admission control of the agent executions
+ADMISSION_ACTIVE = Gauge(
+    "helpai_admission_active",
+    "Agent executions holding an admission slot",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "helpai_admission_queue_depth",
+    "Requests waiting for an admission slot",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "helpai_admission_wait_seconds",
+    "Time admitted requests waited for a slot",
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "helpai_admission_rejected_total",
+    "Requests shed by admission control by reason (queue_full: 429, timeout: 503)",
+    ["reason"],
+)
+DEGRADED_REQUESTS = Counter(
+    "helpai_degraded_requests_total",
+    "Requests admitted under pressure whose answer skipped validation",
+)
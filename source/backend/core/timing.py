@@ -0,0 +1,62 @@
+"""Latency instrumentation: graph node spans, sub-step timings and per-request totals"""
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from core.metrics import NODE_SECONDS, STAGE_SECONDS
+
+# Durations (seconds) of the current request, filled when the timing header is enabled
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("helpai_request_timings", default=None)
+
+
+def start_request_timings() -> Dict[str, float]:
+    """Start collecting the timings of the current request (returns the collecting dict)"""
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def get_request_timings() -> Optional[Dict[str, float]]:
+    """Timings collected so far for the current request (None if not collecting)"""
+    return _request_timings.get()
+
+
+def _add_request_timing(name: str, seconds: float):
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+@contextmanager
+def timed(stage: str):
+    """Time a sub-step (embedding, vector_search, llm, grounding, ...)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(stage=stage).observe(elapsed)
+        _add_request_timing(stage, elapsed)
+
+
+def timed_node(name: str):
+    """Decorator recording the duration of an async graph node"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                NODE_SECONDS.labels(node=name).observe(elapsed)
+                _add_request_timing(name, elapsed)
+        return wrapper
+    return decorator
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Format timings as a Server-Timing header value (durations in milliseconds)"""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
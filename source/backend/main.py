@@ -1,12 +1,52 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from prometheus_client import make_asgi_app
+from agents.nodes import AGENT_MODEL
 from api.router import api_router
+from core.config import get_settings
+from core.metrics import REQUEST_SECONDS
+from core.timing import server_timing_header, start_request_timings
+from tools.executor import shutdown_cpu_executor
+from tools.ollamaChat import keep_model_warm
+from tools.rag_system import init_rag_system, watch_index_version
+from tools.reranker import get_reranker
 
 load_dotenv()
+logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(name)s - %(message)s")
 
 
-app = FastAPI(title="HelpAI Backend API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model and the vector store once for the whole process
+    rag_system = init_rag_system()
+    # Load the optional reranker model too, rather than on the first request
+    get_reranker()
+    
+    # Follow the active prebuilt index version (hot-swap without restart)
+    watcher = None
+    settings = get_settings()
+    if rag_system.backend == "artifact" and settings.artifact_poll_seconds > 0:
+        watcher = asyncio.create_task(watch_index_version(settings.artifact_poll_seconds))
+    
+    # Load the LLM now and keep it resident so no request pays the model load
+    warmer = None
+    if settings.ollama_warmup_interval_seconds > 0:
+        warmer = asyncio.create_task(keep_model_warm(AGENT_MODEL, settings.ollama_warmup_interval_seconds))
+    
+    yield
+    
+    for task in (watcher, warmer):
+        if task is not None:
+            task.cancel()
+    shutdown_cpu_executor()
+
+
+app = FastAPI(title="HelpAI Backend API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,4 +56,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(api_router)
\ No newline at end of file
+app.include_router(api_router)
+
+
+def route_template(request: Request) -> str:
+    """Path template of the matched route (/v1/sessions/{session_id}), "unmatched" if none"""
+    path_format = getattr(request.scope.get("route"), "path_format", None)
+    if path_format is None:
+        return "unmatched"
+    # Depending on the FastAPI version, routes of included routers only know
+    # their path below the router prefix: take the prefix from the URL
+    rendered = path_format.format(**request.path_params)
+    path = request.scope["path"]
+    prefix = path[:-len(rendered)] if rendered and path.endswith(rendered) else ""
+    return prefix + path_format
+
+
+@app.middleware("http")
+async def record_request_timings(request: Request, call_next):
+    """Request latency histogram and optional Server-Timing header"""
+    timings = start_request_timings() if get_settings().server_timing_header else None
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    
+    # One series per route, not per session ID
+    REQUEST_SECONDS.labels(method=request.method, path=route_template(request)).observe(elapsed)
+    if timings is not None:
+        timings["total"] = elapsed
+        response.headers["Server-Timing"] = server_timing_header(timings)
+    return response
+
+
+# Prometheus metrics (latency histograms, cache hit / miss counters, retries)
+app.mount("/metrics", make_asgi_app())
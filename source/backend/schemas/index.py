@@ -0,0 +1,9 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class IndexActivationSchema(BaseModel):
+    version: str
+
+class IndexReloadSchema(BaseModel):
+    # Export record IDs changed by the sync (None: drop every cached answer)
+    changed_ids: Optional[List[str]] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Literal
+from typing import Literal, Optional
 from datetime import datetime
 
 
@@ -8,5 +8,11 @@ class MessageSchema(BaseModel):
     role: Literal["user", "agent"]
     content: str
 
+class ProfileSchema(BaseModel):
+    ecole: Optional[Literal['IIM', 'EXECUTIVE', 'EMLV', 'ESILV']] = None
+    utilisateur: Optional[Literal['faculty-en', 'anonymous', 'staff', 'student', 'staff-en', 'student-en', 'faculty']] = None
+    langue: Optional[Literal["Français", "English"]] = None
+
 class MessageList(BaseModel):
-    messages: list[MessageSchema]
\ No newline at end of file
+    messages: list[MessageSchema]
+    profile: Optional[ProfileSchema] = None
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Literal, Optional
 
 class QuestionSchema(BaseModel):
@@ -7,4 +7,8 @@ class QuestionSchema(BaseModel):
     thematique: Optional[str] = ""
     ecoles: Literal['IIM', 'EXECUTIVE', 'EMLV', 'ESILV']
     utilisateurs: Literal['faculty-en', 'anonymous', 'staff', 'student', 'staff-en', 'student-en', 'faculty']
-    langue: Literal["Français", "English"]
\ No newline at end of file
+    langue: Literal["Français", "English"]
+
+class QuestionBatchSchema(BaseModel):
+    questions: list[QuestionSchema]
+    batch_size: Optional[int] = Field(None, gt=0)
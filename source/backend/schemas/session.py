@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Optional
+from schemas.message import ProfileSchema
+
+
+class SessionCreateSchema(BaseModel):
+    profile: Optional[ProfileSchema] = None
+
+class SessionMessageSchema(BaseModel):
+    content: str
@@ -0,0 +1,132 @@
+"""Shared fixtures: settings from the environment, a small numpy-backed RAG system and the fake Ollama"""
+import hashlib
+import re
+from typing import List
+
+import httpx
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from agents import context, graph
+from benchmarks.fake_ollama import FakeOllama, create_app
+from core.config import get_settings
+from tools import admission, answer_cache, ollamaChat, rag_system, reranker, session_store, single_flight
+from tools.document_loader import build_document_from_record
+from tools.rag_system import RAGSystem
+
+RECORDS = [
+    {
+        "id": 1,
+        "Title": "Comment justifier une absence en cours ?",
+        "Content": "<p>Envoyez le justificatif au secrétariat pédagogique sous 48 heures.</p>",
+        "Date": "2023-09-01",
+        "Post Type": "question",
+        "Langues": "Français",
+        "Thématiques": "Scolarité>Absences",
+        "Utilisateurs": ["student"],
+        "Écoles": ["ESILV", "EMLV"],
+        "Status": "publish",
+    },
+    {
+        "id": 2,
+        "Title": "Où trouver mon emploi du temps ?",
+        "Content": "<p>Votre emploi du temps est disponible sur l'intranet, rubrique Planning.</p>",
+        "Date": "2023-09-01",
+        "Post Type": "question",
+        "Langues": "Français",
+        "Thématiques": "Scolarité>Planning",
+        "Utilisateurs": ["student"],
+        "Écoles": ["ESILV"],
+        "Status": "publish",
+    },
+    {
+        "id": 3,
+        "Title": "Comment obtenir un certificat de scolarité ?",
+        "Content": "<p>Le certificat se télécharge depuis votre espace étudiant.</p>",
+        "Date": "2023-09-01",
+        "Post Type": "question",
+        "Langues": "Français",
+        "Thématiques": "Administratif",
+        "Utilisateurs": ["student", "staff"],
+        "Écoles": ["ESILV", "EMLV", "IIM"],
+        "Status": "publish",
+    },
+]
+
+
+class HashEmbeddings(Embeddings):
+    """Deterministic bag-of-words embeddings (L2-normalized), counting the model calls"""
+
+    def __init__(self, size: int = 512):
+        self.size = size
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(word.encode("utf-8")).hexdigest(), 16) % self.size] += 1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        return self._embed(text)
+
+
+@pytest.fixture
+def settings(monkeypatch, tmp_path):
+    """Settings for the tests; set HELPAI_* variables with monkeypatch.setenv before using them"""
+    monkeypatch.setenv("HELPAI_VECTOR_BACKEND", "numpy")
+    monkeypatch.setenv("HELPAI_NUMPY_DIRECTORY", str(tmp_path / "numpy"))
+    monkeypatch.setenv("HELPAI_EMBEDDING_CACHE_PATH", "")
+    monkeypatch.setenv("HELPAI_SESSION_DIRECTORY", str(tmp_path / "sessions"))
+    get_settings.cache_clear()
+    # Process-wide singletons are rebuilt from the test settings
+    for module, name in [
+        (rag_system, "_rag_system"),
+        (admission, "_admission_controller"),
+        (single_flight, "_single_flight"),
+        (answer_cache, "_answer_cache"),
+        (reranker, "_reranker"),
+        (session_store, "_session_store"),
+    ]:
+        monkeypatch.setattr(module, name, None)
+    graph.get_agent_graph.cache_clear()
+    context.get_context_builder.cache_clear()
+    yield get_settings
+    get_settings.cache_clear()
+    graph.get_agent_graph.cache_clear()
+    context.get_context_builder.cache_clear()
+
+
+@pytest.fixture
+def rag(settings, monkeypatch, tmp_path):
+    """Shared RAG system on the numpy backend, built from RECORDS"""
+    documents = [build_document_from_record(record) for record in RECORDS]
+    system = RAGSystem(
+        documents=documents,
+        persist_directory=str(tmp_path / "numpy"),
+        backend="numpy",
+        embeddings=HashEmbeddings(),
+    )
+    monkeypatch.setattr(rag_system, "_rag_system", system)
+    return system
+
+
+@pytest.fixture
+def fake_ollama(settings, monkeypatch):
+    """Route the Ollama clients to an in-process fake Ollama (its latencies can be changed by the test)"""
+    model = FakeOllama(token_latency_ms=1, prefill_ms_per_token=0, validator_replies=["VALID"])
+    app = create_app(model)
+    base_url = settings().ollama_base_url
+    monkeypatch.setattr(ollamaChat, "_chat_registry", {})
+    monkeypatch.setattr(ollamaChat, "_sync_clients", {base_url: ollamaChat.Client(host=base_url)})
+    monkeypatch.setattr(ollamaChat, "_async_clients", {
+        base_url: ollamaChat.AsyncClient(host=base_url, transport=httpx.ASGITransport(app=app)),
+    })
+    return model
@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+
+QUESTION = {
+    "titre": "Comment réserver une salle de travail ?",
+    "contenu": "Les salles se réservent sur l'intranet, rubrique Réservations.",
+    "thematique": "Vie étudiante",
+    "ecoles": "ESILV",
+    "utilisateurs": "student",
+    "langue": "Français",
+}
+
+
+def test_questions_are_deduplicated_by_content_hash(rag):
+    other = {**QUESTION, "titre": "Comment emprunter un ordinateur ?"}
+    spaced = {**QUESTION, "titre": f"  {QUESTION['titre']} "}
+    count = len(rag.vectorstore)
+
+    results = rag.add_questions([QUESTION, other, spaced, {"titre": "Sans contenu"}], batch_size=1)
+
+    assert [result["status"] for result in results] == ["added", "added", "skipped", "error"]
+    assert results[2]["id"] == results[0]["id"]
+    assert len(rag.vectorstore) == count + 2
+
+    # Sent again, the questions are found in the store
+    again = rag.add_questions([QUESTION, other])
+    assert [result["status"] for result in again] == ["skipped", "skipped"]
+    assert len(rag.vectorstore) == count + 2
+
+
+def test_same_text_for_another_profile_is_a_new_question(rag):
+    results = rag.add_questions([QUESTION, {**QUESTION, "ecoles": "EMLV"}])
+
+    assert [result["status"] for result in results] == ["added", "added"]
+    assert results[0]["id"] != results[1]["id"]
+
+
+def test_invalid_batch_size(rag):
+    with pytest.raises(ValueError):
+        rag.add_questions([QUESTION], batch_size=0)
+
+
+def test_endpoint_status_codes(rag):
+    client = TestClient(app)
+
+    response = client.post("/v1/add_questions/", json={"questions": [QUESTION, QUESTION]})
+    assert response.status_code == 200
+    assert (response.json()["added"], response.json()["skipped"]) == (1, 1)
+
+    assert client.post("/v1/add_questions/", json={"questions": []}).status_code == 400
+    assert client.post("/v1/add_questions/", json={"questions": [QUESTION], "batch_size": 0}).status_code == 422
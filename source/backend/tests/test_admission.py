@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from api.v1.endpoints import ask_agent
+from tools.admission import AdmissionController, AdmissionRejected, get_admission_controller
+
+
+def _message(question):
+    return {"messages": [{"id": "2024-01-01T00:00:00", "role": "user", "content": question}]}
+
+
+async def _until(condition, timeout=5.0):
+    async def wait():
+        while not condition():
+            await asyncio.sleep(0.005)
+    await asyncio.wait_for(wait(), timeout)
+
+
+def test_queue_full_is_429_and_queue_timeout_is_503():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.admit():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await _until(lambda: controller.active == 1)
+        queued = asyncio.ensure_future(hold())
+        await _until(lambda: controller.waiting == 1)
+
+        with pytest.raises(AdmissionRejected) as full:
+            async with controller.admit():
+                pass
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await queued
+        release.set()
+        await holder
+        return full.value, timed_out.value, controller
+
+    full, timed_out, controller = asyncio.run(scenario())
+
+    assert (full.status_code, full.reason) == (429, "queue_full")
+    assert (timed_out.status_code, timed_out.reason) == (503, "timeout")
+    assert full.retry_after >= 1 and timed_out.retry_after >= 1
+    assert (controller.active, controller.waiting) == (0, 0)
+
+
+def test_long_queue_admits_in_degraded_mode():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=4, queue_timeout=1.0, degrade_queue_depth=1)
+        modes = []
+
+        async def run(name):
+            async with controller.admit() as degraded:
+                modes.append((name, degraded))
+                await asyncio.sleep(0.01)
+
+        first = asyncio.ensure_future(run("alone"))
+        await _until(lambda: controller.active == 1)
+        await asyncio.gather(first, run("queue not empty"), run("last"))
+        return dict(modes)
+
+    # Admitted while another request was still waiting: degraded
+    assert asyncio.run(scenario()) == {"alone": False, "queue not empty": True, "last": False}
+
+
+def test_endpoint_answers_with_the_fake_ollama_and_sheds_load(rag, settings, fake_ollama, monkeypatch):
+    monkeypatch.setenv("HELPAI_ADMISSION_MAX_CONCURRENT", "1")
+    monkeypatch.setenv("HELPAI_ADMISSION_MAX_QUEUE", "1")
+    monkeypatch.setenv("HELPAI_ADMISSION_QUEUE_TIMEOUT_SECONDS", "0.1")
+    monkeypatch.setenv("HELPAI_ANSWER_CACHE_ENABLED", "false")
+    monkeypatch.setenv("HELPAI_COALESCING_ENABLED", "false")
+    monkeypatch.setenv("HELPAI_FAQ_ENABLED", "false")
+    settings.cache_clear()
+    # Long enough for the other requests to queue behind this one
+    fake_ollama.token_latency = 0.02
+
+    app = FastAPI()
+    app.include_router(ask_agent.router, prefix="/v1/ask_agent")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+            slow = asyncio.ensure_future(client.post("/v1/ask_agent/", json=_message("Comment justifier une absence ?")))
+            await _until(lambda: get_admission_controller() is not None and get_admission_controller().active == 1)
+            queued = asyncio.ensure_future(client.post("/v1/ask_agent/", json=_message("Où trouver mon emploi du temps ?")))
+            await _until(lambda: get_admission_controller().waiting == 1)
+            full = await client.post("/v1/ask_agent/", json=_message("Comment obtenir un certificat ?"))
+            return await slow, await queued, full
+
+    slow, queued, full = asyncio.run(scenario())
+
+    assert slow.status_code == 200
+    assert slow.json()["path"] == "llm"
+    assert slow.json()["message"].startswith("Envoyez le justificatif")
+    assert full.status_code == 429
+    assert queued.status_code == 503
+    assert int(full.headers["Retry-After"]) >= 1
+    assert int(queued.headers["Retry-After"]) >= 1
@@ -0,0 +1,81 @@
+import time
+
+from agents.runner import cache_scope, store_answer
+from tests.conftest import HashEmbeddings
+from tools.answer_cache import SemanticAnswerCache, get_answer_cache
+
+EMBEDDINGS = HashEmbeddings()
+QUESTION = "Comment justifier une absence en cours ?"
+ESILV_STUDENT = cache_scope({"profile": {"ecole": "ESILV", "utilisateur": "student", "langue": "Français"}})
+EMLV_STUDENT = cache_scope({"profile": {"ecole": "EMLV", "utilisateur": "student", "langue": "Français"}})
+
+
+def _store(cache, question=QUESTION, source_ids=(1,), scope=ESILV_STUDENT):
+    cache.store(
+        question=question,
+        embedding=EMBEDDINGS.embed_query(question),
+        answer=f"Réponse à {question}",
+        sources=[{"id": source_id, "title": "Absences"} for source_id in source_ids],
+        scope=scope,
+    )
+
+
+def test_near_identical_question_hits_and_different_one_misses():
+    cache = SemanticAnswerCache(threshold=0.9)
+    _store(cache)
+
+    hit = cache.lookup(EMBEDDINGS.embed_query("comment justifier une absence en cours"), scope=ESILV_STUDENT)
+    assert hit is not None and hit.question == QUESTION
+    assert cache.lookup(EMBEDDINGS.embed_query("Où trouver mon emploi du temps ?"), scope=ESILV_STUDENT) is None
+
+
+def test_answers_are_scoped_by_profile():
+    cache = SemanticAnswerCache(threshold=0.9)
+    _store(cache, scope=ESILV_STUDENT)
+
+    assert cache.lookup(EMBEDDINGS.embed_query(QUESTION), scope=EMLV_STUDENT) is None
+    assert cache.lookup(EMBEDDINGS.embed_query(QUESTION), scope=ESILV_STUDENT) is not None
+
+
+def test_invalidate_only_answers_built_from_changed_documents():
+    cache = SemanticAnswerCache(threshold=0.9)
+    _store(cache, source_ids=(1, 3))
+    _store(cache, question="Où trouver mon emploi du temps ?", source_ids=(2,))
+
+    # Record IDs come as strings from the sync and as integers from the sources
+    assert cache.invalidate(["3"]) == 1
+    assert cache.lookup(EMBEDDINGS.embed_query(QUESTION), scope=ESILV_STUDENT) is None
+    assert len(cache) == 1
+
+    assert cache.invalidate() == 1
+    assert len(cache) == 0
+
+
+def test_expired_and_least_recently_used_entries_are_dropped():
+    cache = SemanticAnswerCache(threshold=0.9, max_size=2)
+    _store(cache, question="Comment justifier une absence en cours ?")
+    _store(cache, question="Où trouver mon emploi du temps ?")
+    # A hit makes the first entry the most recently used
+    assert cache.lookup(EMBEDDINGS.embed_query(QUESTION), scope=ESILV_STUDENT) is not None
+    _store(cache, question="Comment obtenir un certificat de scolarité ?")
+
+    assert cache.lookup(EMBEDDINGS.embed_query("Où trouver mon emploi du temps ?"), scope=ESILV_STUDENT) is None
+    assert cache.lookup(EMBEDDINGS.embed_query(QUESTION), scope=ESILV_STUDENT) is not None
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.lookup(EMBEDDINGS.embed_query(QUESTION), scope=ESILV_STUDENT) is None
+    assert len(cache) == 0
+
+
+def test_only_validated_first_answers_are_stored(settings):
+    cache = get_answer_cache()
+    embedding = EMBEDDINGS.embed_query(QUESTION)
+    state = {"question": QUESTION, "answer": "Envoyez le justificatif.", "retrieved_sources": [{"id": 1}]}
+
+    store_answer(embedding, {**state, "is_valid": False})
+    store_answer(embedding, {**state, "is_valid": True, "answer_path": "faq"})
+    assert len(cache) == 0
+
+    store_answer(embedding, {**state, "is_valid": True})
+    assert cache.lookup(embedding, scope=cache_scope(state)).answer == "Envoyez le justificatif."
@@ -0,0 +1,79 @@
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from agents.context import TRIM_MARKER, ContextBuilder, estimate_tokens, trim_to_relevant, truncate_to_tokens
+from tools.bm25 import tokenize
+
+FILLER = " ".join(f"Le règlement des études précise la règle numéro {i} applicable aux étudiants." for i in range(40))
+
+
+def _doc(record_id, title, answer):
+    content = f"[Écoles: ESILV] [Thématique: Scolarité]\n\nQuestion: {title}\n\nRéponse: {answer}"
+    return Document(page_content=content, metadata={"id": record_id})
+
+
+def test_truncation_stays_within_the_budget_on_a_word_boundary():
+    text = truncate_to_tokens(FILLER, 20)
+
+    assert text.endswith(TRIM_MARKER)
+    assert estimate_tokens(text) <= 22
+    assert FILLER.startswith(text[:-len(TRIM_MARKER)].rstrip())
+    assert truncate_to_tokens("Court.", 20) == "Court."
+
+
+def test_trim_keeps_the_passages_about_the_question_in_order():
+    body = f"{FILLER} Un justificatif d'absence est envoyé au secrétariat sous 48 heures. {FILLER}"
+
+    trimmed = trim_to_relevant(body, set(tokenize("Comment envoyer un justificatif d'absence ?")), 60)
+
+    assert "Un justificatif d'absence est envoyé au secrétariat sous 48 heures." in trimmed
+    # The budget left is filled with the earliest passages, kept in their order
+    assert trimmed.startswith("Le règlement des études précise la règle numéro 0")
+    assert trimmed.index(TRIM_MARKER) < trimmed.index("Un justificatif") and trimmed.endswith(TRIM_MARKER)
+    assert estimate_tokens(trimmed) <= 60 + 10
+
+
+def test_documents_fit_the_budget_best_ranked_first():
+    builder = ContextBuilder(token_budget=300)
+    docs = [
+        _doc(1, "Comment justifier une absence en cours ?", FILLER),
+        _doc(2, "Où trouver mon emploi du temps ?", "Sur l'intranet, rubrique Planning."),
+        _doc(3, "Comment obtenir un certificat de scolarité ?", FILLER),
+    ]
+
+    context = builder.build_context("Comment justifier une absence ?", docs)
+
+    assert context.startswith("Document 1 (ID: 1):")
+    assert "Document 2 (ID: 2):" in context and "Sur l'intranet, rubrique Planning." in context
+    assert estimate_tokens(context) <= 300 + 20
+
+
+def test_near_duplicate_documents_are_dropped():
+    builder = ContextBuilder()
+    docs = [
+        _doc(1, "Comment justifier une absence ?", "Envoyez le justificatif au secrétariat sous 48 heures."),
+        _doc(2, "Justifier une absence", "Envoyez le justificatif au secrétariat sous 48 heures !"),
+        _doc(3, "Où trouver mon emploi du temps ?", "Sur l'intranet, rubrique Planning."),
+    ]
+
+    assert [doc.metadata["id"] for doc in builder.deduplicate(docs)] == [1, 3]
+
+
+def test_history_keeps_the_latest_turns_within_the_budget():
+    builder = ContextBuilder(history_token_budget=400, history_max_turns=2)
+    messages = [SystemMessage(content="Système")]
+    for turn in range(4):
+        messages += [HumanMessage(content=f"Question {turn}"), AIMessage(content=f"Réponse {turn}")]
+    messages.append(HumanMessage(content="Question 4"))
+
+    history = builder.build_history(messages, question="Question 4", summary="L'étudiant de l'ESILV demande ses absences.")
+
+    assert history.splitlines() == [
+        "Résumé des échanges précédents: L'étudiant de l'ESILV demande ses absences.",
+        "Utilisateur: Question 2",
+        "Assistant: Réponse 2",
+        "Utilisateur: Question 3",
+        "Assistant: Réponse 3",
+    ]
+    long_history = ContextBuilder(history_token_budget=100).build_history([HumanMessage(content=FILLER)] * 6)
+    assert estimate_tokens(long_history) <= 100
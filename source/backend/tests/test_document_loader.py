@@ -0,0 +1,32 @@
+import json
+
+import pytest
+
+from tools.document_loader import iter_json_array
+
+
+def _write(tmp_path, text):
+    path = tmp_path / "export.json"
+    path.write_text(text, encoding="utf-8")
+    return str(path)
+
+
+def test_items_larger_than_the_read_chunk(tmp_path):
+    items = [{"id": i, "Title": f"Question {i}", "Content": "é" * (50 * i)} for i in range(1, 6)]
+    path = _write(tmp_path, json.dumps(items, ensure_ascii=False, indent=2))
+
+    assert list(iter_json_array(path, chunk_size=16)) == items
+
+
+def test_empty_array_and_whitespace(tmp_path):
+    assert list(iter_json_array(_write(tmp_path, "  [ \n ]  "))) == []
+
+
+def test_not_an_array(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_json_array(_write(tmp_path, '{"id": 1}')))
+
+
+def test_truncated_file(tmp_path):
+    with pytest.raises(ValueError):
+        list(iter_json_array(_write(tmp_path, '[{"id": 1}, {"id": '), chunk_size=8))
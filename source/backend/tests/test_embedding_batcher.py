@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from tests.conftest import HashEmbeddings
+from tools.embedding_batcher import BatchingEmbeddings
+
+
+class RecordingEmbeddings(HashEmbeddings):
+    """Hash embeddings recording the texts of each model call"""
+
+    def __init__(self, fail: bool = False):
+        super().__init__()
+        self.batches = []
+        self.fail = fail
+
+    def embed_documents(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model unavailable")
+        return super().embed_documents(texts)
+
+
+def test_concurrent_queries_share_one_model_call():
+    model = RecordingEmbeddings()
+    batcher = BatchingEmbeddings(model, max_batch_size=8, max_wait_ms=200)
+    questions = ["Comment justifier une absence ?", "Où trouver mon emploi du temps ?", "Comment justifier une absence ?"]
+
+    async def ask_all():
+        return await asyncio.gather(*(batcher.aembed_query(question) for question in questions))
+
+    vectors = asyncio.run(ask_all())
+    batcher.close()
+
+    # Identical queries are encoded once
+    assert model.batches == [questions[:2]]
+    assert vectors == [model._embed(question) for question in questions]
+
+
+def test_batches_are_bounded_in_size():
+    model = RecordingEmbeddings()
+    batcher = BatchingEmbeddings(model, max_batch_size=2, max_wait_ms=200)
+
+    futures = [batcher.submit(f"question {i}") for i in range(5)]
+    for future in futures:
+        future.result(timeout=5)
+    batcher.close()
+
+    assert [len(batch) for batch in model.batches] == [2, 2, 1]
+
+
+def test_model_errors_reach_every_caller():
+    batcher = BatchingEmbeddings(RecordingEmbeddings(fail=True), max_wait_ms=50)
+
+    futures = [batcher.submit("absence"), batcher.submit("planning")]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            future.result(timeout=5)
+    # The worker keeps serving the next queries
+    batcher.embeddings.fail = False
+    assert len(batcher.embed_query("absence")) == batcher.embeddings.size
+    batcher.close()
+
+
+def test_cancelled_queries_are_not_encoded():
+    model = RecordingEmbeddings()
+    batcher = BatchingEmbeddings(model, max_wait_ms=100)
+    release = threading.Event()
+    blocking_embed = model.embed_documents
+    model.embed_documents = lambda texts: release.wait(5) and blocking_embed(texts)
+
+    first = batcher.submit("absence")
+    # Queued while the worker is busy encoding the first query
+    while not first.running():
+        time.sleep(0.001)
+    cancelled = batcher.submit("planning")
+    kept = batcher.submit("certificat")
+    assert cancelled.cancel()
+    release.set()
+
+    assert kept.result(timeout=5) and first.result(timeout=5)
+    batcher.close()
+    assert model.batches == [["absence"], ["certificat"]]
@@ -0,0 +1,48 @@
+import asyncio
+
+from tests.conftest import HashEmbeddings
+from tools.embedding_cache import CachedEmbeddings
+
+
+def test_key_ignores_case_and_spacing_but_not_the_model():
+    cache = CachedEmbeddings(HashEmbeddings(), model_name="model-a")
+    other_model = CachedEmbeddings(HashEmbeddings(), model_name="model-b")
+
+    assert cache._key("Comment  justifier une absence ?") == cache._key(" comment justifier une ABSENCE ?")
+    assert cache._key("justifier une absence") != cache._key("justifier un retard")
+    assert cache._key("justifier une absence") != other_model._key("justifier une absence")
+
+
+def test_miss_then_memory_hit_are_counted():
+    # A miss used to be recorded under a misspelled key and raised KeyError
+    model = HashEmbeddings()
+    cache = CachedEmbeddings(model, model_name="m")
+
+    first = cache.embed_query("Où trouver mon emploi du temps ?")
+    second = cache.embed_query("où trouver mon emploi du temps ?")
+
+    assert first == second
+    assert model.calls == 1
+    stats = cache.stats()
+    assert (stats["misses"], stats["memory_hits"], stats["disk_hits"]) == (1, 1, 0)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    CachedEmbeddings(HashEmbeddings(), model_name="m", cache_path=path).embed_query("certificat de scolarité")
+
+    model = HashEmbeddings()
+    cache = CachedEmbeddings(model, model_name="m", cache_path=path)
+    vector = asyncio.run(cache.aembed_query("Certificat de scolarité"))
+
+    assert len(vector) == model.size
+    assert model.calls == 0
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_documents_are_not_cached():
+    cache = CachedEmbeddings(HashEmbeddings(), model_name="m")
+    cache.embed_documents(["un document", "un autre"])
+
+    assert cache.stats()["memory_size"] == 0
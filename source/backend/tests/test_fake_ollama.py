@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.fake_ollama import DOCUMENTS_MARKER, NO_INFO_ANSWER, QUESTION_MARKER, FakeOllama, create_app
+from benchmarks.load_test import parse_server_timing, percentile
+
+PROMPT = f"""{DOCUMENTS_MARKER}
+Document 1 (ID: 1):
+[Écoles: ESILV] [Thématique: Scolarité>Absences]
+
+Question: Comment justifier une absence en cours ?
+
+Réponse: Envoyez le justificatif au secrétariat pédagogique sous 48 heures.
+
+Document 2 (ID: 2):
+Réponse: Votre emploi du temps est disponible sur l'intranet.
+
+{QUESTION_MARKER}
+Comment justifier une absence ?"""
+
+
+def test_reply_answers_from_the_first_document():
+    model = FakeOllama()
+    assert model.reply(PROMPT) == "Envoyez le justificatif au secrétariat pédagogique sous 48 heures."
+    assert model.reply(f"{DOCUMENTS_MARKER}\n{QUESTION_MARKER}\nBonjour") == NO_INFO_ANSWER
+
+
+def test_validator_replies_in_turn():
+    model = FakeOllama(validator_replies=["VALID", "invalid"])
+    verdicts = [model.reply("Tu es maintenant validateur").split(":")[0] for _ in range(3)]
+    assert verdicts == ["VALID", "INVALID", "VALID"]
+
+
+def test_chat_streams_tokens_then_timing_stats():
+    model = FakeOllama(token_latency_ms=0, prefill_ms_per_token=0, load_ms=5, answer_tokens=3)
+
+    async def chat():
+        transport = httpx.ASGITransport(app=create_app(model))
+        async with httpx.AsyncClient(transport=transport, base_url="http://fake") as client:
+            body = {"model": "gemma2:2b", "messages": [{"role": "user", "content": PROMPT}]}
+            response = await client.post("/api/chat", json=body)
+            return [json.loads(line) for line in response.text.splitlines()]
+
+    chunks = asyncio.run(chat())
+    assert "".join(chunk["message"]["content"] for chunk in chunks) == "Envoyez le justificatif"
+    assert [chunk["done"] for chunk in chunks] == [False, False, False, True]
+    assert chunks[-1]["eval_count"] == 3
+    # The model load is paid once
+    assert chunks[-1]["load_duration"] == 5_000_000
+    assert model.load_time() == 0.0
+
+
+def test_load_test_report_helpers():
+    assert percentile([], 50) is None
+    assert percentile([4.0, 1.0, 3.0, 2.0], 50) == 2.5
+    assert percentile([1.0, 2.0], 100) == 2.0
+    assert parse_server_timing("retrieve;dur=12.5, generate;desc=\"LLM\";dur=300, total;dur=320") == {
+        "retrieve": 12.5,
+        "generate": 300.0,
+        "total": 320.0,
+    }
@@ -0,0 +1,69 @@
+import asyncio
+
+from agents.nodes import match_faq
+from tools.embedding_cache import CachedEmbeddings
+
+
+def _state(rag, question):
+    return {
+        "question": question,
+        "profile": None,
+        "retrieved_documents": rag.vectorstore.similarity_search(question, k=3),
+        "retrieved_sources": [],
+        "answer": "",
+        "answer_path": None,
+    }
+
+
+def test_normalized_title_is_answered_from_the_faq(rag):
+    state = asyncio.run(match_faq(_state(rag, "comment justifier une absence en cours")))
+
+    assert state["answer_path"] == "faq"
+    assert state["faq_score"] == 1.0
+    assert state["answer"].startswith("Envoyez le justificatif")
+    assert state["is_valid"] is True
+
+
+def test_similarity_threshold(rag, settings, monkeypatch):
+    # The 6 words of the stored title plus one: cosine 6 / sqrt(6 * 7) ~ 0.926
+    question = "Comment justifier une absence en cours svp"
+
+    monkeypatch.setenv("HELPAI_FAQ_SIMILARITY_THRESHOLD", "0.92")
+    settings.cache_clear()
+    state = asyncio.run(match_faq(_state(rag, question)))
+    assert state["answer_path"] == "faq"
+    assert 0.92 <= state["faq_score"] < 0.93
+
+    monkeypatch.setenv("HELPAI_FAQ_SIMILARITY_THRESHOLD", "0.93")
+    settings.cache_clear()
+    state = asyncio.run(match_faq(_state(rag, question)))
+    assert state["answer_path"] is None
+    assert state["answer"] == ""
+
+
+def test_unrelated_question_goes_to_the_llm(rag):
+    state = asyncio.run(match_faq(_state(rag, "Quel temps fait-il demain ?")))
+
+    assert state["answer_path"] is None
+    assert state["faq_score"] < 0.5
+
+
+def test_disabled(rag, settings, monkeypatch):
+    monkeypatch.setenv("HELPAI_FAQ_ENABLED", "false")
+    settings.cache_clear()
+
+    state = asyncio.run(match_faq(_state(rag, "Comment justifier une absence en cours ?")))
+
+    assert state["answer_path"] is None
+
+
+def test_title_vectors_stay_out_of_the_query_cache(rag):
+    rag.embeddings = CachedEmbeddings(rag.embeddings, model_name="hash")
+    state = _state(rag, "Comment justifier une absence en cours svp")
+
+    asyncio.run(match_faq(state))
+    asyncio.run(match_faq(state))
+
+    # Only the question is cached; the titles are cached once in the FAQ index
+    assert rag.embeddings.stats()["memory_size"] == 1
+    assert all(vector is not None for vector in rag.faq_index.title_vectors([doc.id for doc in state["retrieved_documents"]]))
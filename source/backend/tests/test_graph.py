@@ -0,0 +1,32 @@
+from agents.deadline import new_deadline
+from agents.graph import after_generate, should_retry
+
+
+def _state(**values):
+    return {"is_valid": False, "retry_count": 0, "max_retries": 1, "deadline": None, "deadline_exceeded": False, **values}
+
+
+def test_valid_answer_ends():
+    assert should_retry(_state(is_valid=True)) == "end"
+
+
+def test_invalid_answer_retries_within_the_budget():
+    assert should_retry(_state(retry_count=0, max_retries=2)) == "retry"
+    assert should_retry(_state(retry_count=1, max_retries=2)) == "retry"
+
+
+def test_retry_budget_exhausted():
+    assert should_retry(_state(retry_count=2, max_retries=2)) == "end"
+    assert should_retry(_state(retry_count=0, max_retries=0)) == "end"
+
+
+def test_no_retry_without_time_left(settings):
+    assert should_retry(_state(deadline=new_deadline(0.1))) == "end"
+    assert should_retry(_state(deadline=new_deadline(3600))) == "retry"
+    assert should_retry(_state(deadline_exceeded=True)) == "end"
+
+
+def test_degraded_or_late_answers_skip_validation():
+    assert after_generate({"degraded": False, "deadline_exceeded": False}) == "validate"
+    assert after_generate({"degraded": True}) == "end"
+    assert after_generate({"deadline_exceeded": True}) == "end"
@@ -0,0 +1,55 @@
+import asyncio
+
+from agents.nodes import validate_answer
+from tests.conftest import HashEmbeddings
+from tools.groundedness import groundedness_score, lexical_overlap, split_sentences
+
+CONTEXT = """Document 1 (ID: 1):
+[Écoles: ESILV, EMLV] [Thématique: Scolarité>Absences]
+
+Question: Comment justifier une absence en cours ?
+
+Réponse: Envoyez le justificatif au secrétariat pédagogique sous 48 heures. Au-delà, l'absence reste injustifiée."""
+GROUNDED = "Envoyez le justificatif au secrétariat pédagogique sous 48 heures."
+UNGROUNDED = "Le parking du campus est gratuit pour les visiteurs le week-end."
+
+
+def test_document_structure_is_not_a_sentence():
+    assert split_sentences(CONTEXT) == [
+        "Comment justifier une absence en cours ?",
+        "Envoyez le justificatif au secrétariat pédagogique sous 48 heures.",
+        "Au-delà, l'absence reste injustifiée.",
+    ]
+
+
+def test_grounded_answers_score_higher():
+    grounded = groundedness_score(GROUNDED, CONTEXT, HashEmbeddings())
+    ungrounded = groundedness_score(UNGROUNDED, CONTEXT, HashEmbeddings())
+
+    assert grounded["lexical"] == 1.0 and grounded["score"] > 0.99
+    assert ungrounded["lexical"] == 0.0 and ungrounded["score"] < 0.3
+    assert lexical_overlap("", CONTEXT) == 0.0
+
+
+def _validate(answer):
+    state = {"question": "Comment justifier une absence ?", "answer": answer, "retrieved_docs": [CONTEXT], "deadline": None}
+    return asyncio.run(validate_answer(state))
+
+
+def test_confident_scores_skip_the_llm_validator(rag, fake_ollama):
+    accepted = _validate(GROUNDED)
+    rejected = _validate(UNGROUNDED)
+
+    assert (accepted["validation_path"], accepted["is_valid"]) == ("grounding_accept", True)
+    assert (rejected["validation_path"], rejected["is_valid"]) == ("grounding_reject", False)
+
+
+def test_uncertain_scores_go_to_the_llm_validator(rag, fake_ollama, settings, monkeypatch):
+    monkeypatch.setenv("HELPAI_GROUNDING_ACCEPT_THRESHOLD", "1.5")
+    monkeypatch.setenv("HELPAI_GROUNDING_REJECT_THRESHOLD", "-1")
+    settings.cache_clear()
+
+    state = _validate(GROUNDED)
+
+    assert (state["validation_path"], state["is_valid"]) == ("llm", True)
+    assert state["grounding_score"] > 0.99
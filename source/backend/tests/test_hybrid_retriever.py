@@ -0,0 +1,66 @@
+from langchain_core.documents import Document
+
+from tools.bm25 import BM25Index, tokenize
+from tools.hybrid_retriever import reciprocal_rank_fusion
+
+
+def _docs(*names):
+    return [Document(page_content=name) for name in names]
+
+
+def test_documents_ranked_well_by_both_lists_come_first():
+    dense = _docs("a", "b", "c")
+    keyword = _docs("b", "d")
+
+    fused = reciprocal_rank_fusion([dense, keyword], k=4, rrf_k=60)
+
+    # b: 1/62 + 1/61 > a: 1/61 > d: 1/62 > c: 1/63
+    assert [doc.page_content for doc in fused] == ["b", "a", "d", "c"]
+
+
+def test_fusion_keeps_k_documents_and_the_first_copy():
+    dense = [Document(page_content="a", metadata={"from": "dense"})] + _docs("b")
+    keyword = [Document(page_content="a", metadata={"from": "bm25"})]
+
+    fused = reciprocal_rank_fusion([dense, keyword], k=1)
+
+    assert len(fused) == 1
+    assert fused[0].metadata == {"from": "dense"}
+
+
+def test_empty_lists():
+    assert reciprocal_rank_fusion([[], []], k=3) == []
+
+
+def _keyword_index():
+    index = BM25Index()
+    index.add("qa-1", Document(page_content="Question: Comment justifier une absence en cours ?", metadata={"ecoles": "ESILV"}))
+    index.add("qa-2", Document(page_content="Question: Où trouver mon emploi du temps ?", metadata={"ecoles": "EMLV"}))
+    index.add("qa-3", Document(page_content="Question: Comment obtenir un certificat de scolarité ?", metadata={"ecoles": "ESILV"}))
+    return index
+
+
+def test_tokens_are_accent_free_without_stopwords_or_tags():
+    assert tokenize("<p>Où trouver mon Emploi du temps ?</p>") == ["trouver", "emploi", "temps"]
+
+
+def test_keyword_search_returns_store_ids_and_applies_the_predicate():
+    index = _keyword_index()
+
+    results = index.search("certificat de scolarite", k=3)
+    assert [doc.id for doc, _ in results] == ["qa-3"]
+
+    results = index.search("comment", k=3, predicate=lambda doc: doc.metadata["ecoles"] == "ESILV")
+    assert {doc.id for doc, _ in results} == {"qa-1", "qa-3"}
+
+
+def test_reindexing_replaces_the_document():
+    index = _keyword_index()
+    index.add("qa-2", Document(page_content="Question: Où consulter le planning des examens ?"))
+
+    assert len(index) == 3
+    assert index.search("emploi du temps") == []
+    assert [doc.id for doc, _ in index.search("planning examens")] == ["qa-2"]
+
+    index.remove("qa-2")
+    assert index.search("planning examens") == []
@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from tests.conftest import RECORDS, HashEmbeddings
+from tools import rag_system as rag_module
+from tools.answer_cache import get_answer_cache
+from tools.index_artifacts import (
+    ArtifactError,
+    ArtifactNotFoundError,
+    build_artifact,
+    current_version,
+    list_versions,
+    read_manifest,
+    set_current_version,
+    verify_artifact,
+)
+from tools.rag_system import create_rag_system, swap_index_version
+
+QUESTION = {
+    "titre": "Comment réserver une salle de travail ?",
+    "contenu": "Les salles se réservent sur l'intranet.",
+    "ecoles": "ESILV",
+    "utilisateurs": "student",
+    "langue": "Français",
+}
+
+
+@pytest.fixture
+def artifacts(settings, monkeypatch, tmp_path):
+    """Artifact backend with two built versions, the first one active and served"""
+    directory = str(tmp_path / "artifacts")
+    monkeypatch.setenv("HELPAI_VECTOR_BACKEND", "artifact")
+    monkeypatch.setenv("HELPAI_ARTIFACTS_DIRECTORY", directory)
+    settings.cache_clear()
+    export = tmp_path / "export.json"
+    model = settings().embedding_model
+
+    export.write_text(json.dumps(RECORDS[:2], ensure_ascii=False), encoding="utf-8")
+    first = build_artifact(str(export), directory, HashEmbeddings(), model)
+    export.write_text(json.dumps(RECORDS, ensure_ascii=False), encoding="utf-8")
+    second = build_artifact(str(export), directory, HashEmbeddings(), model)
+    set_current_version(directory, first)
+
+    monkeypatch.setattr(rag_module, "_rag_system", create_rag_system(embeddings=HashEmbeddings()))
+    return directory, first, second
+
+
+def test_build_writes_immutable_verified_versions(artifacts, settings):
+    directory, first, second = artifacts
+
+    assert list_versions(directory) == [first, second]
+    assert current_version(directory) == first
+    assert read_manifest(directory, second)["count"] == 3
+    assert verify_artifact(directory, second, settings().embedding_model)["version"] == second
+    with pytest.raises(ArtifactError):
+        verify_artifact(directory, second, "another-model")
+    with pytest.raises(ArtifactNotFoundError):
+        read_manifest(directory, "../numpy")
+
+    manifest = read_manifest(directory, first)
+    with open(os.path.join(directory, first, manifest["embeddings_file"]), "ab") as f:
+        f.write(b"\0")
+    with pytest.raises(ArtifactError):
+        verify_artifact(directory, first, settings().embedding_model)
+
+
+def test_swap_serves_the_new_version_with_the_added_questions(artifacts):
+    directory, first, second = artifacts
+    served = rag_module.get_rag_system()
+    assert (served.index_version, len(served.vectorstore)) == (first, 2)
+    served.add_questions([QUESTION])
+    cache = get_answer_cache()
+    cache.store("absence", HashEmbeddings().embed_query("absence"), "Réponse", [{"id": 1}])
+
+    swapped = swap_index_version(second)
+
+    assert rag_module.get_rag_system() is swapped
+    assert current_version(directory) == second
+    # 3 export records and the journaled question
+    assert len(swapped.vectorstore) == 4
+    assert len(cache) == 0
+    # The artifacts themselves are never written
+    assert read_manifest(directory, second)["count"] == 3
+
+    # Rolling back keeps the question too
+    assert len(swap_index_version(first).vectorstore) == 3
+
+
+def test_question_added_to_a_swapped_out_system_reaches_the_served_one(artifacts):
+    _, _, second = artifacts
+    old = rag_module.get_rag_system()
+    new = swap_index_version(second)
+
+    old.add_questions([QUESTION])
+
+    assert len(new.vectorstore) == 4
+
+
+def test_activate_endpoint_status_codes(artifacts):
+    _, _, second = artifacts
+    client = TestClient(app)
+
+    response = client.post("/v1/index/activate", json={"version": second})
+    assert (response.status_code, response.json()["version"]) == (200, second)
+    assert client.post("/v1/index/activate", json={"version": "v0"}).status_code == 404
+    assert client.post("/v1/index/reload", json={}).status_code == 400
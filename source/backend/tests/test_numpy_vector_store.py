@@ -0,0 +1,124 @@
+import os
+
+import pytest
+
+from tests.conftest import HashEmbeddings
+from tools.numpy_vector_store import NumpyVectorStore, StaleStoreError
+
+TEXTS = [
+    "Comment justifier une absence en cours ?",
+    "Où trouver mon emploi du temps ?",
+    "Comment obtenir un certificat de scolarité ?",
+]
+METADATAS = [
+    {"id": 1, "ecoles": "ESILV", "langues": "Français"},
+    {"id": 2, "ecoles": "EMLV", "langues": "Français"},
+    {"id": 3, "ecoles": "IIM", "langues": "English"},
+]
+IDS = ["qa-1", "qa-2", "qa-3"]
+
+
+def _store(directory=None, **options):
+    store = NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=directory, **options)
+    store.add_texts(TEXTS, metadatas=METADATAS, ids=IDS)
+    return store
+
+
+def _ids(results):
+    return [doc.id for doc in results]
+
+
+def test_nearest_document_first_with_its_id():
+    results = _store().similarity_search_with_score("justifier une absence", k=2)
+
+    assert results[0][0].id == "qa-1"
+    assert results[0][0].metadata["ecoles"] == "ESILV"
+    assert results[0][1] > results[1][1]
+
+
+def test_filters():
+    store = _store()
+    query = "comment"
+
+    assert _ids(store.similarity_search(query, k=3, filter={"ecoles": "EMLV"})) == ["qa-2"]
+    assert set(_ids(store.similarity_search(query, k=3, filter={"ecoles": {"$in": ["ESILV", "IIM"]}}))) == {"qa-1", "qa-3"}
+    assert _ids(store.similarity_search(query, k=3, filter={"ecoles": {"$nin": ["ESILV", "IIM"]}})) == ["qa-2"]
+    assert _ids(store.similarity_search(query, k=3, filter={"$and": [
+        {"langues": "Français"}, {"$or": [{"ecoles": "IIM"}, {"ecoles": {"$ne": "EMLV"}}]},
+    ]})) == ["qa-1"]
+    with pytest.raises(ValueError):
+        store.similarity_search(query, filter={"ecoles": {"$gt": 1}})
+
+
+def test_persisted_store_reloads_memory_mapped(tmp_path):
+    directory = str(tmp_path / "store")
+    _store(directory, dtype="float16")
+
+    store = NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=directory, read_only=True)
+
+    assert len(store) == 3 and str(store._matrix.dtype) == "float16"
+    assert _ids(store.similarity_search("certificat de scolarité", k=1)) == ["qa-3"]
+    assert store.get(ids=["qa-2"])["metadatas"] == [METADATAS[1]]
+
+
+def test_delete_and_update_are_persisted_without_leftover_files(tmp_path):
+    directory = str(tmp_path / "store")
+    store = _store(directory)
+
+    assert store.delete(ids=["qa-2", "unknown"]) is True
+    assert store.delete(ids=["unknown"]) is False
+    store.update_metadatas(["qa-1"], [{"id": 1, "ecoles": "ESILV, EMLV", "langues": "Français"}])
+
+    reloaded = NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=directory)
+    assert reloaded.get(include=["metadatas"]) == {
+        "ids": ["qa-1", "qa-3"],
+        "metadatas": [{"id": 1, "ecoles": "ESILV, EMLV", "langues": "Français"}, METADATAS[2]],
+    }
+    assert len([name for name in os.listdir(directory) if name.endswith(".npy")]) == 1
+
+
+def test_deferred_persist_writes_once(tmp_path):
+    store = NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=str(tmp_path / "store"))
+    writes = []
+    persist = store.persist
+    store.persist = lambda: writes.append(persist())
+
+    with store.deferred_persist():
+        store.add_texts(TEXTS, metadatas=METADATAS, ids=IDS)
+        store.delete(ids=["qa-3"])
+
+    assert len(writes) == 1
+
+
+def test_existing_ids_are_replaced_not_duplicated(tmp_path):
+    directory = str(tmp_path / "store")
+    _store(directory)
+    # The matrix of a reloaded store is a read-only memory map
+    store = NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=directory)
+
+    store.add_texts(
+        ["Comment déclarer un stage ?", "Où trouver mon planning ?", "Où consulter mon planning ?"],
+        metadatas=[{"id": 4}, {"id": 2, "ecoles": "EMLV"}, {"id": 2, "ecoles": "ESILV"}],
+        ids=["qa-4", "qa-2", "qa-2"],
+    )
+
+    assert store.get(include=[])["ids"] == ["qa-1", "qa-2", "qa-3", "qa-4"]
+    assert store.get(ids=["qa-2"]) == {"ids": ["qa-2"], "documents": ["Où consulter mon planning ?"], "metadatas": [{"id": 2, "ecoles": "ESILV"}]}
+    assert _ids(store.similarity_search("consulter planning", k=1)) == ["qa-2"]
+    assert _ids(store.similarity_search("emploi du temps", k=4)).count("qa-2") == 1
+
+
+def test_a_store_rewritten_by_another_process_is_not_overwritten(tmp_path):
+    directory = str(tmp_path / "store")
+    _store(directory)
+    server = NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=directory)
+    sync = NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=directory)
+
+    sync.delete(ids=["qa-3"])
+    with pytest.raises(StaleStoreError):
+        server.add_texts(["Comment déclarer un stage ?"], ids=["qa-4"])
+
+    # After a reload the server writes again, on top of the other process' changes
+    server = NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=directory)
+    server.add_texts(["Comment déclarer un stage ?"], ids=["qa-4"])
+    assert NumpyVectorStore(embedding=HashEmbeddings(), persist_directory=directory).get(include=[])["ids"] == ["qa-1", "qa-2", "qa-4"]
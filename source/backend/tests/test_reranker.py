@@ -0,0 +1,68 @@
+from langchain_core.documents import Document
+
+from agents.tools import RAGRetrieverTool
+from tools.bm25 import tokenize
+from tools.reranker import CrossEncoderReranker
+
+
+class OverlapModel:
+    """Cross-encoder stand-in: scores a pair by the number of shared terms, counting the pairs scored"""
+
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs):
+        self.pairs.extend(pairs)
+        return [len(set(tokenize(question)) & set(tokenize(text))) for question, text in pairs]
+
+
+def _reranker(**options):
+    return CrossEncoderReranker("overlap", model=OverlapModel(), **options)
+
+
+DOCS = [
+    Document(page_content="Où trouver mon emploi du temps ?", metadata={"id": 2}, id="qa-2"),
+    Document(page_content="<p>Justifier une absence : envoyez le justificatif.</p>", metadata={"id": 1}, id="qa-1"),
+    Document(page_content="Certificat de scolarité", metadata={"id": 3}, id="qa-3"),
+]
+
+
+def test_rerank_keeps_the_best_documents_with_their_ids_and_scores():
+    reranked = _reranker().rerank("Comment justifier une absence ?", DOCS, top_n=2)
+
+    assert [doc.id for doc in reranked] == ["qa-1", "qa-2"]
+    assert reranked[0].metadata == {"id": 1, "rerank_score": 2.0}
+    # Ties keep the retrieval order
+    assert reranked[1].metadata["rerank_score"] == 0.0
+    assert _reranker().rerank("absence", [], top_n=2) == []
+
+
+def test_only_new_pairs_are_scored():
+    reranker = _reranker()
+    reranker.score("Comment justifier une absence ?", DOCS[:2])
+
+    scores = reranker.score("comment justifier une  ABSENCE ?", DOCS)
+
+    assert scores == [0.0, 2.0, 0.0]
+    assert len(reranker.model.pairs) == 3
+    # The model sees the documents without markup
+    assert reranker.model.pairs[1][1] == "Justifier une absence : envoyez le justificatif."
+
+
+def test_score_cache_is_bounded():
+    reranker = _reranker(cache_size=2)
+    reranker.score("absence", DOCS)
+    reranker.score("absence", DOCS[:1])
+
+    assert len(reranker._cache) == 2
+    assert len(reranker.model.pairs) == 4
+
+
+def test_retriever_fetches_wide_and_keeps_the_reranked_top(rag):
+    tool = RAGRetrieverTool(rag_system=rag, k_docs=1, reranker=_reranker(), fetch_k=3)
+
+    docs = tool.retrieve("certificat de scolarité")
+
+    assert len(tool.reranker.model.pairs) == 3
+    assert [doc.metadata["id"] for doc in docs] == [3]
+    assert "rerank_score" in docs[0].metadata
@@ -0,0 +1,102 @@
+import asyncio
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from agents import sessions
+from tools import ollamaChat
+from tools.session_store import FileSessionBackend, SessionStore, get_session_store
+
+PROFILE = {"ecole": "ESILV", "utilisateur": "student", "langue": "Français"}
+
+
+def test_sessions_are_written_through_to_the_backend(tmp_path):
+    async def scenario():
+        backend = FileSessionBackend(str(tmp_path))
+        store = SessionStore(backend=backend, max_size=1)
+        session = await store.create(profile=PROFILE)
+        session.messages.append({"role": "user", "content": "Comment justifier une absence ?"})
+        await store.save(session)
+        # Evicted from memory by a newer session, reloaded from its file
+        await store.create()
+        assert len(store) == 1
+
+        reloaded = await SessionStore(backend=backend).get(session.id)
+        assert (reloaded.profile, reloaded.messages) == (PROFILE, session.messages)
+        assert (await store.get(session.id)).messages == session.messages
+
+        assert await store.get("../../etc/passwd") is None
+        assert await store.delete(session.id) is True
+        assert await SessionStore(backend=backend).get(session.id) is None
+
+    asyncio.run(scenario())
+
+
+def test_idle_sessions_expire():
+    async def scenario():
+        store = SessionStore(ttl_seconds=60)
+        session = await store.create()
+        session.updated_at -= 120
+        assert await store.get(session.id) is None
+        assert len(store) == 0
+
+    asyncio.run(scenario())
+
+
+def test_session_messages_end_with_the_new_question():
+    session = sessions.Session(id="s", messages=[
+        {"role": "user", "content": "Comment justifier une absence ?"},
+        {"role": "agent", "content": "Envoyez le justificatif."},
+    ])
+
+    messages = sessions.session_messages(session, "Sous quel délai ?")
+
+    assert [type(message) for message in messages] == [HumanMessage, AIMessage, HumanMessage]
+    assert messages[-1].content == "Sous quel délai ?"
+
+
+def test_old_turns_are_folded_into_the_summary_in_the_background(settings, monkeypatch):
+    monkeypatch.setenv("HELPAI_SESSION_SUMMARY_TRIGGER_TURNS", "2")
+    monkeypatch.setenv("HELPAI_SESSION_KEEP_TURNS", "1")
+    settings.cache_clear()
+    folded = []
+
+    async def scenario():
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def fake_summarize(summary, messages):
+            folded.append([message["content"] for message in messages])
+            started.set()
+            await release.wait()
+            return f"Résumé de {len(messages)} messages"
+
+        monkeypatch.setattr(sessions, "summarize", fake_summarize)
+        store = get_session_store()
+        session = await store.create(profile=PROFILE)
+        for turn in range(3):
+            await sessions.record_turn(session, f"Question {turn}", f"Réponse {turn}")
+        await started.wait()
+        # A turn recorded while the summary is running stays in the session
+        await sessions.record_turn(session, "Question 3", "Réponse 3")
+        release.set()
+        await asyncio.gather(*sessions._summary_tasks)
+        return await store.get(session.id)
+
+    session = asyncio.run(scenario())
+
+    assert folded == [["Question 0", "Réponse 0", "Question 1", "Réponse 1"]]
+    assert session.summary == "Résumé de 4 messages"
+    assert session.summarized_count == 4
+    assert [message["content"] for message in session.messages] == ["Question 2", "Réponse 2", "Question 3", "Réponse 3"]
+
+
+def test_summary_generation_is_bounded(settings, fake_ollama, monkeypatch):
+    monkeypatch.setenv("HELPAI_SESSION_SUMMARY_MAX_TOKENS", "40")
+    settings.cache_clear()
+
+    summary = asyncio.run(sessions.summarize("", [
+        {"role": "user", "content": "Je suis à l'ESILV, comment justifier une absence ?"},
+        {"role": "agent", "content": "<p>Envoyez le justificatif au secrétariat.</p>"},
+    ]))
+
+    assert summary
+    assert [chat.num_predict for chat in ollamaChat._chat_registry.values()] == [40]
@@ -0,0 +1,68 @@
+import asyncio
+
+from tools.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution():
+    async def scenario():
+        group = SingleFlight()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        results = await asyncio.gather(*(group.run("question", work) for _ in range(5)))
+        return calls, results, len(group)
+
+    calls, results, in_flight = asyncio.run(scenario())
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["answer"] * 5
+    assert sorted(shared for _, shared in results) == [False] + [True] * 4
+    assert in_flight == 0
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        group = SingleFlight()
+        return await asyncio.gather(group.run("a", lambda: asyncio.sleep(0, "a")), group.run("b", lambda: asyncio.sleep(0, "b")))
+
+    assert asyncio.run(scenario()) == [("a", False), ("b", False)]
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        group = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        first = asyncio.ensure_future(group.run("question", work))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(group.run("question", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == ("answer", True)
+
+
+def test_errors_are_shared_and_the_key_released():
+    async def scenario():
+        group = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("ollama down")
+
+        results = await asyncio.gather(group.run("q", fail), group.run("q", fail), return_exceptions=True)
+        return results, len(group)
+
+    results, in_flight = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert in_flight == 0
@@ -0,0 +1,76 @@
+import json
+
+from tests.conftest import RECORDS
+from tools import rag_system as rag_module
+from tools.answer_cache import get_answer_cache
+from tools.rag_system import RAGSystem
+
+QUESTION = {
+    "titre": "Comment réserver une salle de travail ?",
+    "contenu": "Les salles se réservent sur l'intranet.",
+    "ecoles": "ESILV",
+    "utilisateurs": "student",
+    "langue": "Français",
+}
+
+
+def _export(tmp_path, records):
+    path = tmp_path / "export.json"
+    path.write_text(json.dumps(records, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def _changed_export(tmp_path):
+    unchanged, updated, _ = RECORDS
+    added = {**unchanged, "id": 4, "Title": "Comment accéder au Wi-Fi du campus ?"}
+    return _export(tmp_path, [unchanged, {**updated, "Content": "<p>Le planning est sur l'application mobile.</p>"}, added])
+
+
+def test_sync_embeds_only_the_changes(rag, tmp_path):
+    rag.add_questions([QUESTION])
+    calls = rag.embeddings.calls
+
+    stats = rag.sync_export(_changed_export(tmp_path))
+
+    assert {key: stats[key] for key in ("unchanged", "added", "updated", "deleted")} == \
+        {"unchanged": 1, "added": 1, "updated": 1, "deleted": 1}
+    assert sorted(stats["changed_ids"]) == ["2", "3", "4"]
+    # The added and updated records are embedded in one batch
+    assert rag.embeddings.calls == calls + 1
+
+    ids = rag.vectorstore.get(include=[])["ids"]
+    assert {"qa-1", "qa-2", "qa-4"} <= set(ids) and "qa-3" not in ids
+    # Questions added through the API are not part of the export
+    assert len(ids) == 4
+    assert rag.vectorstore.get(ids=["qa-2"])["documents"][0].endswith("Le planning est sur l'application mobile.")
+    assert [doc.id for doc, _ in rag.keyword_index.search("wi-fi campus")] == ["qa-4"]
+
+    again = rag.sync_export(_changed_export(tmp_path))
+    assert (again["unchanged"], again["changed_ids"]) == (3, [])
+
+
+def test_dry_run_leaves_the_store_untouched(rag, tmp_path):
+    before = rag.vectorstore.get()
+
+    stats = rag.sync_export(_changed_export(tmp_path), dry_run=True)
+
+    assert (stats["added"], stats["updated"], stats["deleted"]) == (1, 1, 1)
+    assert rag.vectorstore.get() == before
+
+
+def test_reload_serves_the_synced_store_and_drops_changed_answers(rag, tmp_path):
+    # The sync runs in its own process, on the same store directory
+    RAGSystem(persist_directory=rag.persist_directory, backend="numpy", embeddings=rag.embeddings).sync_export(
+        _changed_export(tmp_path)
+    )
+    cache = get_answer_cache()
+    embedding = rag.embeddings.embed_query("absence")
+    cache.store("absence", embedding, "Réponse 1", [{"id": 1}])
+    cache.store("planning", rag.embeddings.embed_query("planning"), "Réponse 2", [{"id": 2}])
+    assert len(rag.vectorstore) == 3 and "qa-4" not in rag.vectorstore.get(include=[])["ids"]
+
+    reloaded = rag_module.reload_rag_system(["2", "3", "4"])
+
+    assert rag_module.get_rag_system() is reloaded
+    assert "qa-4" in reloaded.vectorstore.get(include=[])["ids"]
+    assert len(cache) == 1 and cache.lookup(embedding) is not None
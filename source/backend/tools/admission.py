@@ -0,0 +1,144 @@
+"""Admission control of the LLM work: concurrency limit, bounded wait queue and load shedding"""
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from core.config import get_settings
+from core.metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """The request was shed: the wait queue is full (429) or the wait timed out (503)"""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(f"Server overloaded ({reason}), retry in {retry_after}s")
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Lets at most `max_concurrent` agent executions reach Ollama at once
+
+    Other requests wait in a bounded FIFO queue for at most `queue_timeout`
+    seconds. Beyond that, they are rejected at once with a Retry-After
+    estimated from the recent execution times, instead of all slowing down
+    together until clients time out. Used from the event loop only.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_queue: int = 32, queue_timeout: float = 20.0, degrade_queue_depth: int = 8):
+        """
+        Args:
+            max_concurrent: Maximum number of admitted executions
+            max_queue: Maximum number of requests waiting for a slot (429 beyond)
+            queue_timeout: Maximum wait for a slot in seconds (503 beyond)
+            degrade_queue_depth: Requests admitted while at least this many are
+                waiting run in degraded mode (0 disables it)
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.degrade_queue_depth = degrade_queue_depth
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._active = 0
+        self._waiting = 0
+        # Moving average of the execution time, for the Retry-After estimate
+        self._average_seconds = 5.0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @property
+    def queue_full(self) -> bool:
+        return self._active >= self.max_concurrent and self._waiting >= self.max_queue
+
+    @property
+    def under_pressure(self) -> bool:
+        """True while enough requests are queued to switch to degraded mode"""
+        return self.degrade_queue_depth > 0 and self._waiting >= self.degrade_queue_depth
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue should have drained"""
+        rounds = (self._waiting + 1) / self.max_concurrent
+        return max(1, math.ceil(rounds * self._average_seconds))
+
+    def reject_if_full(self):
+        """Raise AdmissionRejected (429) if a new request could not even queue"""
+        if self.queue_full:
+            ADMISSION_REJECTED.labels(reason="queue_full").inc()
+            logger.warning("Admission queue full (%d waiting), request rejected", self._waiting)
+            raise AdmissionRejected(429, "queue_full", self.retry_after())
+
+    @asynccontextmanager
+    async def admit(self):
+        """Hold an execution slot for the duration of the block
+
+        Yields:
+            True if the request runs in degraded mode (the queue was long when it was admitted)
+
+        Raises:
+            AdmissionRejected: the queue is full, or no slot freed up in time
+        """
+        self.reject_if_full()
+        start = time.monotonic()
+        self._waiting += 1
+        ADMISSION_QUEUE_DEPTH.set(self._waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            ADMISSION_REJECTED.labels(reason="timeout").inc()
+            logger.warning("No execution slot within %.1fs, request rejected", self.queue_timeout)
+            raise AdmissionRejected(503, "timeout", self.retry_after()) from None
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUE_DEPTH.set(self._waiting)
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - start)
+
+        degraded = self.under_pressure
+        self._active += 1
+        ADMISSION_ACTIVE.set(self._active)
+        started = time.monotonic()
+        try:
+            yield degraded
+        finally:
+            self._active -= 1
+            ADMISSION_ACTIVE.set(self._active)
+            self._semaphore.release()
+            self._average_seconds = 0.8 * self._average_seconds + 0.2 * (time.monotonic() - started)
+
+
+_admission_controller: Optional[AdmissionController] = None
+_admission_controller_lock = threading.Lock()
+
+
+def get_admission_controller() -> Optional[AdmissionController]:
+    """Return the process-wide admission controller, or None if admission control is disabled"""
+    global _admission_controller
+    settings = get_settings()
+    if settings.admission_max_concurrent <= 0:
+        return None
+    with _admission_controller_lock:
+        if _admission_controller is None:
+            _admission_controller = AdmissionController(
+                max_concurrent=settings.admission_max_concurrent,
+                max_queue=settings.admission_max_queue,
+                queue_timeout=settings.admission_queue_timeout_seconds,
+                degrade_queue_depth=settings.admission_degrade_queue_depth,
+            )
+    return _admission_controller
@@ -0,0 +1,160 @@
+"""Semantic answer cache: reuse validated answers for near-identical questions"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+import uuid
+
+import numpy as np
+
+from core.config import get_settings
+
+
+@dataclass
+class CachedAnswer:
+    """A validated answer stored in the cache"""
+    question: str
+    answer: str
+    embedding: np.ndarray
+    sources: List[dict] = field(default_factory=list)
+    # Entries only match lookups with the same scope (e.g. the user profile)
+    scope: str = ""
+    created_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def doc_ids(self) -> set:
+        """IDs of the documents the answer was generated from"""
+        return {str(source.get("id")) for source in self.sources}
+
+
+class SemanticAnswerCache:
+    """LRU + TTL answer cache looked up by nearest-neighbour similarity on question embeddings
+    
+    Embeddings are expected to be L2-normalized, so a dot product is the cosine similarity.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_size: int = 1000):
+        """
+        Args:
+            threshold: Minimum cosine similarity for a cached question to match
+            ttl_seconds: Lifetime of an entry
+            max_size: Maximum number of entries (least recently used are evicted)
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: str):
+        del self._entries[key]
+        self._matrix = None
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [key for key, entry in self._entries.items() if now - entry.created_at > self.ttl_seconds]
+        for key in expired:
+            self._drop(key)
+
+    def _similarity_matrix(self) -> np.ndarray:
+        # Rebuilt lazily after any insertion or removal
+        if self._matrix is None:
+            self._keys = list(self._entries.keys())
+            self._matrix = np.stack([self._entries[key].embedding for key in self._keys])
+        return self._matrix
+
+    def lookup(self, embedding: List[float], scope: str = "") -> Optional[CachedAnswer]:
+        """Return the cached answer of the most similar question above the threshold
+        
+        Args:
+            embedding: Normalized embedding of the incoming question
+            scope: Only entries stored with the same scope can match
+            
+        Returns:
+            The matching entry, or None on a miss
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._evict_expired()
+            if not self._entries:
+                return None
+            scores = self._similarity_matrix() @ query
+            scores[[self._entries[key].scope != scope for key in self._keys]] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            key = self._keys[best]
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def store(self, question: str, embedding: List[float], answer: str, sources: List[dict], scope: str = ""):
+        """Add a validated answer to the cache, evicting the least recently used entries
+        
+        Args:
+            question: The question that was answered
+            embedding: Normalized embedding of the question
+            answer: The validated answer
+            sources: Sources (id + title) of the documents used for the answer
+            scope: Scope of the entry (see lookup)
+        """
+        entry = CachedAnswer(
+            question=question,
+            answer=answer,
+            embedding=np.asarray(embedding, dtype=np.float32),
+            sources=list(sources or []),
+            scope=scope,
+        )
+        with self._lock:
+            self._entries[str(uuid.uuid4())] = entry
+            self._matrix = None
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, doc_ids: Optional[List] = None) -> int:
+        """Remove cached answers after a knowledge base change
+        
+        Args:
+            doc_ids: IDs of the changed documents; entries built from any of
+                them are removed. If None, the whole cache is cleared.
+                
+        Returns:
+            Number of removed entries
+        """
+        with self._lock:
+            if doc_ids is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._matrix = None
+                return removed
+            
+            changed = {str(doc_id) for doc_id in doc_ids}
+            stale = [key for key, entry in self._entries.items() if entry.doc_ids & changed]
+            for key in stale:
+                self._drop(key)
+            return len(stale)
+
+
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Return the process-wide answer cache, or None if it is disabled"""
+    global _answer_cache
+    settings = get_settings()
+    if not settings.answer_cache_enabled:
+        return None
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = SemanticAnswerCache(
+                threshold=settings.answer_cache_threshold,
+                ttl_seconds=settings.answer_cache_ttl_seconds,
+                max_size=settings.answer_cache_max_size,
+            )
+    return _answer_cache
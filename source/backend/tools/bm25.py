@@ -0,0 +1,128 @@
+"""In-process inverted index with BM25 scoring for keyword retrieval"""
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Frequent French / English words that carry no retrieval signal
+STOPWORDS = {
+    "le", "la", "les", "un", "une", "des", "du", "de", "d", "l", "et", "ou", "a", "au", "aux",
+    "en", "dans", "par", "pour", "sur", "avec", "sans", "ce", "ces", "cet", "cette", "que", "qui",
+    "quoi", "quel", "quelle", "quels", "quelles", "est", "sont", "je", "tu", "il", "elle", "nous",
+    "vous", "ils", "elles", "mon", "ma", "mes", "ton", "ta", "tes", "son", "sa", "ses", "notre",
+    "votre", "vos", "leur", "leurs", "ne", "pas", "se", "si", "y", "s", "t", "n", "m", "qu", "c",
+    "the", "an", "of", "to", "in", "on", "for", "and", "or", "is", "are", "be", "i", "my", "your",
+    "it", "what", "how", "can", "do", "does", "with", "at", "by",
+    "question", "reponse", "ecoles", "thematique",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-free tokens without HTML tags and stopwords"""
+    text = _TAG_RE.sub(" ", text)
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return [token for token in _TOKEN_RE.findall(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over an inverted index of LangChain documents"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lengths: Dict[str, int] = {}
+        self._documents: Dict[str, Document] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add(self, doc_id: str, document: Document):
+        """Index (or re-index) a document under the given ID"""
+        tokens = tokenize(document.page_content)
+        # Results carry their store ID, like the vector store's
+        if document.id != doc_id:
+            document = document.model_copy(update={"id": doc_id})
+        with self._lock:
+            if doc_id in self._documents:
+                self._remove(doc_id)
+            for term, frequency in Counter(tokens).items():
+                self._postings[term][doc_id] = frequency
+            self._lengths[doc_id] = len(tokens)
+            self._documents[doc_id] = document
+            self._total_length += len(tokens)
+
+    def remove(self, doc_id: str):
+        """Remove a document from the index (no-op if unknown)"""
+        with self._lock:
+            if doc_id in self._documents:
+                self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        for term in set(tokenize(self._documents[doc_id].page_content)):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._lengths.pop(doc_id)
+        del self._documents[doc_id]
+
+    def search(
+        self,
+        query: str,
+        k: int = 10,
+        predicate: Optional[Callable[[Document], bool]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Return the k best documents for the query with their BM25 scores
+        
+        Args:
+            query: Free-text query
+            k: Number of results
+            predicate: Optional filter on the documents
+            
+        Returns:
+            List of (document, score) sorted by decreasing score
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._documents)
+            if not terms or not n_docs:
+                return []
+            avg_length = self._total_length / n_docs
+            
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc_id, frequency in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+            
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            results = []
+            for doc_id, score in ranked:
+                document = self._documents[doc_id]
+                if predicate is not None and not predicate(document):
+                    continue
+                results.append((document, score))
+                if len(results) >= k:
+                    break
+            return results
@@ -0,0 +1,54 @@
+"""Offline build of a versioned index artifact
+
+Usage (from source/backend):
+    python -m tools.build_index ../database/samples/QA_clean.json [--dtype float16] [--activate]
+
+Running servers pick up the new version when it is activated (CURRENT file),
+or through POST /v1/index/activate. Activating an older version is a rollback.
+"""
+import argparse
+import time
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from core.config import get_settings
+from tools.index_artifacts import build_artifact, read_manifest, set_current_version
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Build an immutable, versioned index artifact")
+    parser.add_argument("json_path", help="Path to the QA JSON export")
+    parser.add_argument("--artifacts-directory", default=settings.artifacts_directory)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default=settings.vector_dtype)
+    parser.add_argument("--batch-size", type=int, default=settings.ingest_batch_size)
+    parser.add_argument("--activate", action="store_true", help="Make the new version the active one")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    embeddings = HuggingFaceEmbeddings(
+        model_name=settings.embedding_model,
+        model_kwargs={'device': 'cpu'},
+        encode_kwargs={'normalize_embeddings': True}
+    )
+    version = build_artifact(
+        args.json_path,
+        args.artifacts_directory,
+        embeddings=embeddings,
+        embedding_model=settings.embedding_model,
+        dtype=args.dtype,
+        batch_size=args.batch_size,
+    )
+    manifest = read_manifest(args.artifacts_directory, version)
+    print(
+        f"Built index {version} in {time.perf_counter() - start:.1f}s: "
+        f"{manifest['count']} documents, dimension {manifest['dimension']}, {manifest['dtype']}"
+    )
+
+    if args.activate:
+        set_current_version(args.artifacts_directory, version)
+        print(f"Index {version} is now active")
+
+
+if __name__ == "__main__":
+    main()
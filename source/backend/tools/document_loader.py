@@ -1,6 +1,62 @@
+import hashlib
+import html
 import json
-from typing import List
+import re
+from typing import Iterator, List
 from langchain_core.documents import Document
+from tools.metadata_filters import filter_flags
+
+# Metadata "source" of the documents coming from the QA JSON export
+EXPORT_SOURCE = "export"
+
+_BLOCK_TAG_RE = re.compile(r"<\s*(br|/p|/div|/li|/h\d|/dd|/dt|/tr)\b[^>]*>", re.IGNORECASE)
+_LIST_ITEM_RE = re.compile(r"<\s*li\b[^>]*>", re.IGNORECASE)
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACES_RE = re.compile(r"[ \t\xa0]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+def clean_html(text: str) -> str:
+    """
+    Converts the HTML of an export answer to plain text: block tags become
+    line breaks, list items become "- " lines, other tags and entities are
+    dropped so that they do not waste prompt tokens.
+    """
+    if not text:
+        return ""
+    text = _BLOCK_TAG_RE.sub("\n", text)
+    text = _LIST_ITEM_RE.sub("\n- ", text)
+    text = html.unescape(_TAG_RE.sub("", text))
+    lines = (_SPACES_RE.sub(" ", line).strip() for line in text.split("\n"))
+    return _BLANK_LINES_RE.sub("\n", "\n".join(lines)).strip()
+
+
+def answer_from_content(page_content: str) -> str:
+    """
+    Extracts the plain-text answer ("Réponse: ..." part) of a stored document.
+    """
+    _, found, answer = page_content.partition("Réponse:")
+    return clean_html(answer if found else page_content)
+
+
+def question_fingerprint(
+    titre: str,
+    contenu: str,
+    thematique: str,
+    ecoles: str,
+    utilisateurs: str,
+    langue: str,
+) -> str:
+    """
+    Stable content hash of a question, used as its vector store ID
+    so that re-sent questions can be detected and skipped.
+    """
+    payload = json.dumps(
+        [(titre or "").strip(), (contenu or "").strip(), thematique or "", ecoles or "", utilisateurs or "", langue or ""],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
 
 def build_document_from_fields(
     question_id: int,
@@ -22,7 +78,7 @@ def build_document_from_fields(
 
 Question: {titre}
 
-Réponse: {contenu}"""
+Réponse: {clean_html(contenu)}"""
 
     metadata = {
         "id": question_id,
@@ -35,51 +91,129 @@ Réponse: {contenu}"""
         "ecoles": ecoles or "N/A",
         "status": status,
     }
+    metadata.update(filter_flags(metadata["ecoles"], metadata["utilisateurs"]))
 
     return Document(page_content=text_content, metadata=metadata)
 
 
-def load_qa_documents(json_path: str) -> List[Document]:
+def iter_json_array(json_path: str, chunk_size: int = 1 << 16) -> Iterator[dict]:
     """
-    Loads the Q&A documents from the JSON file.
+    Streams the items of a top-level JSON array without loading the whole file.
     
     Args:
-        json_path: Path to the QA_clean.json file
+        json_path: Path to a JSON file containing an array
+        chunk_size: Number of characters read at a time
         
-    Returns:
-        List of LangChain Documents with metadata
+    Yields:
+        Each decoded item of the array
     """
+    decoder = json.JSONDecoder()
     with open(json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    documents = []
-    for item in data:
-        # Create the enriched text content with important context
-        ecoles = ', '.join(item.get('Écoles', [])) if item.get('Écoles', []) else 'N/A'
-        thematiques = item.get('Thématiques', '')
+        buffer = ""
+        eof = False
+        started = False
         
-        text_content = f"""[Écoles: {ecoles}] [Thématique: {thematiques}]
+        while True:
+            if not eof and len(buffer) < chunk_size:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+            buffer = buffer.lstrip()
+            
+            if not buffer:
+                if eof:
+                    raise ValueError(f"Unexpected end of file in {json_path}")
+                continue
+            if not started:
+                if buffer[0] != "[":
+                    raise ValueError(f"{json_path} does not contain a JSON array")
+                buffer = buffer[1:]
+                started = True
+                continue
+            if buffer[0] == "]":
+                return
+            if buffer[0] == ",":
+                buffer = buffer[1:]
+                continue
+            
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Item larger than the buffer: read more and retry
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            
+            yield item
+            buffer = buffer[end:]
+
+
+def record_fingerprint(item: dict) -> str:
+    """
+    Content fingerprint of an export record, stored alongside its vector
+    so that incremental syncs only re-embed changed records.
+    """
+    payload = json.dumps(item, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def build_document_from_record(item: dict) -> Document:
+    """
+    Builds a LangChain Document from one record of the QA JSON export.
+    """
+    # Create the enriched text content with important context
+    ecoles = ', '.join(item.get('Écoles', [])) if item.get('Écoles', []) else 'N/A'
+    thematiques = item.get('Thématiques', '')
+    
+    text_content = f"""[Écoles: {ecoles}] [Thématique: {thematiques}]
 
 Question: {item.get('Title', '')}
 
-Réponse: {item.get('Content', '')}"""
+Réponse: {clean_html(item.get('Content') or '')}"""
+    
+    # Create the metadata (for filtering and traceability)
+    metadata = {
+        'id': item.get('id'),
+        'title': item.get('Title', ''),
+        'date': item.get('Date', ''),
+        'post_type': item.get('Post Type', ''),
+        'langues': item.get('Langues', ''),
+        'thematiques': item.get('Thématiques', ''),
+        'utilisateurs': ', '.join(item.get('Utilisateurs', [])) if item.get('Utilisateurs', []) else 'N/A',
+        'ecoles': ecoles,
+        'status': item.get('Status', ''),
+        # Traceability of the export record (used by the incremental sync)
+        'source': EXPORT_SOURCE,
+        'fingerprint': record_fingerprint(item),
+    }
+    metadata.update(filter_flags(metadata['ecoles'], metadata['utilisateurs']))
+
+    # Create the LangChain document
+    return Document(page_content=text_content, metadata=metadata)
+
+
+def iter_qa_documents(json_path: str) -> Iterator[Document]:
+    """
+    Streams the Q&A documents of the JSON export, one record at a time.
+    """
+    for item in iter_json_array(json_path):
+        yield build_document_from_record(item)
+
+
+def load_qa_documents(json_path: str) -> List[Document]:
+    """
+    Loads the Q&A documents from the JSON file.
+    
+    Args:
+        json_path: Path to the QA_clean.json file
         
-        # Create the metadata (for filtering and traceability)
-        metadata = {
-            'id': item.get('id'),
-            'title': item.get('Title', ''),
-            'date': item.get('Date', ''),
-            'post_type': item.get('Post Type', ''),
-            'langues': item.get('Langues', ''),
-            'thematiques': item.get('Thématiques', ''),
-            'utilisateurs': ', '.join(item.get('Utilisateurs', [])) if item.get('Utilisateurs', []) else 'N/A',
-            'ecoles': ecoles,
-            'status': item.get('Status', '')
-        }
-
-        # Create the LangChain document
-        doc = Document(page_content=text_content, metadata=metadata)
-        documents.append(doc)
+    Returns:
+        List of LangChain Documents with metadata
+    """
+    documents = list(iter_qa_documents(json_path))
 
     print(f"Loaded {len(documents)} documents from {json_path}")
     return documents
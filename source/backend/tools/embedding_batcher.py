@@ -0,0 +1,118 @@
+"""Micro-batching of concurrent query embeddings
+
+Queries submitted within a few milliseconds of each other are encoded in
+one forward pass instead of one small pass each, which uses the CPU cores
+much better under bursts of requests.
+"""
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from core.metrics import EMBEDDING_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class BatchingEmbeddings(Embeddings):
+    """Embeddings wrapper grouping concurrent `embed_query` calls into batches
+
+    A single worker thread takes the first pending query, waits at most
+    `max_wait_ms` for others (up to `max_batch_size`), encodes them together
+    with the wrapped model's `embed_documents` and resolves each caller's
+    future. The wrapped model must embed queries and documents the same way
+    (symmetric models such as the paraphrase MiniLM).
+    """
+
+    def __init__(self, embeddings: Embeddings, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        """
+        Args:
+            embeddings: The wrapped embedding model
+            max_batch_size: Maximum number of queries encoded in one call
+            max_wait_ms: Maximum time the first query of a batch waits for others
+        """
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="helpai-embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue a query and return the future of its embedding"""
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        return future
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query as part of the next batch (blocks the calling thread)"""
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Embed a query as part of the next batch without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents with the wrapped model (already batched by the caller)"""
+        return self.embeddings.embed_documents(texts)
+
+    def close(self):
+        """Stop the worker thread once the queued queries are done"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                self._queue.put(_STOP)
+            self._worker = None
+
+    def _collect(self, first: Tuple[str, Future]) -> Tuple[List[Tuple[str, Future]], bool]:
+        """Gather the queries arriving within the wait window after the first one"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch, stop = self._collect(item)
+            # Skip callers that gave up (cancelled futures)
+            batch = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            # Identical queries in the same batch are encoded once
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            EMBEDDING_BATCH_SIZE.observe(len(texts))
+            try:
+                vectors = dict(zip(texts, self.embeddings.embed_documents(texts)))
+            except Exception as e:
+                logger.warning("Batched query embedding failed (%d queries): %s", len(texts), e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for text, future in batch:
+                future.set_result(vectors[text])
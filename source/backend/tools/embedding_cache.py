@@ -0,0 +1,160 @@
+"""Two-tier cache for query embeddings: in-process LRU + on-disk float16 store"""
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from core.metrics import EMBEDDING_CACHE_REQUESTS
+from tools.executor import run_cpu_bound
+
+
+def normalize_text(text: str) -> str:
+    """Normalize a query so trivially different spellings share a cache entry"""
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.split()).casefold()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper caching query vectors
+    
+    Tier 1 is an in-process LRU keyed by a hash of the normalized text.
+    Tier 2 is a SQLite file of float16 vectors that survives restarts.
+    Document embeddings (indexing) are passed through uncached.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache_path: Optional[str] = None, max_size: int = 10000):
+        """
+        Args:
+            embeddings: The wrapped embedding model
+            model_name: Name of the model, part of the cache key
+            cache_path: SQLite file of the on-disk tier (None disables it)
+            max_size: Maximum number of vectors kept in memory
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_size = max_size
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        # The memory tier lock is never held during SQLite I/O, which has its own lock
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._stats = {"memory_hit": 0, "disk_hit": 0, "miss": 0}
+        
+        self._db = None
+        if cache_path:
+            os.makedirs(os.path.dirname(os.path.abspath(cache_path)), exist_ok=True)
+            self._db = sqlite3.connect(cache_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS query_embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha1(f"{self.model_name}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def _record(self, result: str):
+        self._stats[result] += 1
+        EMBEDDING_CACHE_REQUESTS.labels(result=result).inc()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key: str) -> Optional[List[float]]:
+        if self._db is None:
+            return None
+        with self._db_lock:
+            row = self._db.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float16).astype(np.float32).tolist()
+
+    def _write_disk(self, key: str, vector: List[float]):
+        if self._db is None:
+            return
+        blob = np.asarray(vector, dtype=np.float16).tobytes()
+        with self._db_lock:
+            self._db.execute("INSERT OR REPLACE INTO query_embeddings (key, vector) VALUES (?, ?)", (key, blob))
+            self._db.commit()
+
+    def _lookup_memory(self, key: str) -> Optional[List[float]]:
+        """Memory tier, recording the hit (None if not in memory)"""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._record("memory_hit")
+            return vector
+
+    def _lookup_disk(self, key: str) -> Optional[List[float]]:
+        """Disk tier (blocking), promoting a hit to the memory tier (None on a miss)"""
+        vector = self._read_disk(key)
+        if vector is not None:
+            with self._lock:
+                self._remember(key, vector)
+                self._record("disk_hit")
+        return vector
+
+    def _remember_miss(self, key: str, vector: List[float]):
+        with self._lock:
+            self._remember(key, vector)
+            self._record("miss")
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the memory then the disk tier before the model"""
+        key = self._key(text)
+        vector = self._lookup_memory(key)
+        if vector is None:
+            vector = self._lookup_disk(key)
+        if vector is not None:
+            return vector
+        
+        # Encode outside the lock so concurrent misses do not serialize
+        vector = self.embeddings.embed_query(text)
+        self._remember_miss(key, vector)
+        self._write_disk(key, vector)
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async embed_query: on a miss, awaits the wrapped model's aembed_query
+        (the micro-batcher resolves it without holding a worker thread)
+        
+        Only the memory tier is read on the event loop; the SQLite reads and
+        writes of the disk tier run in the CPU thread pool.
+        """
+        key = self._key(text)
+        vector = self._lookup_memory(key)
+        if vector is not None:
+            return vector
+        if self._db is not None:
+            vector = await run_cpu_bound(self._lookup_disk, key)
+            if vector is not None:
+                return vector
+        
+        vector = await self.embeddings.aembed_query(text)
+        self._remember_miss(key, vector)
+        if self._db is not None:
+            await run_cpu_bound(self._write_disk, key, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents with the wrapped model (not cached)"""
+        return self.embeddings.embed_documents(texts)
+
+    def stats(self) -> dict:
+        """Hit / miss counters and current memory tier size"""
+        with self._lock:
+            total = sum(self._stats.values())
+            hits = self._stats["memory_hit"] + self._stats["disk_hit"]
+            return {
+                "memory_hits": self._stats["memory_hit"],
+                "disk_hits": self._stats["disk_hit"],
+                "misses": self._stats["miss"],
+                "hit_rate": hits / total if total else 0.0,
+                "memory_size": len(self._memory),
+            }
@@ -0,0 +1,46 @@
+"""Bounded thread pool for CPU-bound work (embeddings, vector search)"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from core.config import get_settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool, sized from the settings"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_settings().cpu_workers,
+                thread_name_prefix="helpai-cpu",
+            )
+    return _executor
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking function in the shared thread pool without blocking the event loop
+    
+    Args:
+        func: Blocking callable (embedding, Chroma query, ...)
+        *args, **kwargs: Arguments passed to the callable
+        
+    Returns:
+        The callable's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_cpu_executor():
+    """Stop the shared thread pool (called when the application shuts down)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
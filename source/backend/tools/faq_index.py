@@ -0,0 +1,75 @@
+"""Normalized-title index of the stored questions, for the FAQ fast path"""
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from tools.embedding_cache import normalize_text
+
+_NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(text: str) -> str:
+    """Lowercase, accent- and punctuation-free form of a question"""
+    text = unicodedata.normalize("NFKD", normalize_text(text))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD_RE.sub(" ", text).strip()
+
+
+class FaqIndex:
+    """Maps the normalized title of each stored question to its document IDs
+    
+    Also keeps the embeddings of the stored titles compared by the FAQ fast
+    path, so they do not take room in the query embedding cache.
+    """
+
+    def __init__(self):
+        self._ids_by_title: Dict[str, Set[str]] = defaultdict(set)
+        self._title_by_id: Dict[str, str] = {}
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._title_by_id)
+
+    def add(self, doc_id: str, title: str):
+        """Index (or re-index) a document under its title"""
+        key = normalize_title(title or "")
+        with self._lock:
+            self._remove(doc_id)
+            if key:
+                self._ids_by_title[key].add(doc_id)
+                self._title_by_id[doc_id] = key
+
+    def remove(self, doc_id: str):
+        """Drop a document from the index (no-op if it is not indexed)"""
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id: str):
+        self._vectors.pop(doc_id, None)
+        key = self._title_by_id.pop(doc_id, None)
+        if key is not None:
+            self._ids_by_title[key].discard(doc_id)
+            if not self._ids_by_title[key]:
+                del self._ids_by_title[key]
+
+    def lookup(self, question: str) -> List[str]:
+        """IDs of the documents whose title matches the question once normalized"""
+        key = normalize_title(question)
+        with self._lock:
+            return sorted(self._ids_by_title.get(key, ()))
+
+    def title_vectors(self, doc_ids: List[Optional[str]]) -> List[Optional[np.ndarray]]:
+        """Cached title embeddings of the documents (None where not cached yet)"""
+        with self._lock:
+            return [self._vectors.get(doc_id) for doc_id in doc_ids]
+
+    def set_title_vector(self, doc_id: Optional[str], vector: np.ndarray):
+        """Cache the title embedding of an indexed document (dropped with the document)"""
+        with self._lock:
+            if doc_id in self._title_by_id:
+                self._vectors[doc_id] = vector
@@ -0,0 +1,66 @@
+"""Cheap groundedness score of an answer against the retrieved documents
+
+Used before the LLM validator: the answer is compared with the documents
+using the MiniLM embeddings already loaded for retrieval (sentence-level
+max similarity) and a lexical overlap of content words.
+"""
+import re
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from tools.bm25 import tokenize
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+|\n+")
+_TAG_RE = re.compile(r"<[^>]+>")
+# Structure added by the document loader and RAGRetrieverTool.format_docs
+_DOC_HEADER_RE = re.compile(r"^(Document \d+ \(ID: [^)]*\):|\[Écoles:.*)$", re.MULTILINE)
+_FIELD_LABEL_RE = re.compile(r"^(Question|Réponse)\s*:\s*", re.MULTILINE)
+MIN_SENTENCE_CHARS = 12
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split a text into sentences long enough to carry a claim"""
+    text = _DOC_HEADER_RE.sub("", _TAG_RE.sub(" ", text))
+    text = _FIELD_LABEL_RE.sub("", text)
+    return [sentence.strip() for sentence in _SENTENCE_RE.split(text) if len(sentence.strip()) >= MIN_SENTENCE_CHARS]
+
+
+def lexical_overlap(answer: str, context: str) -> float:
+    """Share of the answer's content words that appear in the context"""
+    answer_terms = set(tokenize(answer))
+    if not answer_terms:
+        return 0.0
+    return len(answer_terms & set(tokenize(context))) / len(answer_terms)
+
+
+def groundedness_score(answer: str, context: str, embeddings: Embeddings, semantic_weight: float = 0.7) -> dict:
+    """Score how well the answer is supported by the context
+    
+    Args:
+        answer: Generated answer
+        context: Retrieved documents (formatted)
+        embeddings: Normalized sentence embeddings
+        semantic_weight: Weight of the semantic score (the rest goes to lexical overlap)
+        
+    Returns:
+        {"semantic", "lexical", "score"}, all in [0, 1] (semantic may be slightly negative)
+    """
+    answer_sentences = split_sentences(answer)
+    context_sentences = split_sentences(context)
+    lexical = lexical_overlap(answer, context)
+    if not answer_sentences or not context_sentences:
+        return {"semantic": 0.0, "lexical": lexical, "score": (1 - semantic_weight) * lexical}
+    
+    # One batched encode for the answer and the context sentences
+    vectors = np.asarray(embeddings.embed_documents(answer_sentences + context_sentences), dtype=np.float32)
+    answer_vectors, context_vectors = vectors[:len(answer_sentences)], vectors[len(answer_sentences):]
+    # Each answer sentence should be supported by at least one document sentence
+    semantic = float((answer_vectors @ context_vectors.T).max(axis=1).mean())
+    
+    return {
+        "semantic": semantic,
+        "lexical": lexical,
+        "score": semantic_weight * semantic + (1 - semantic_weight) * lexical,
+    }
@@ -0,0 +1,54 @@
+"""Hybrid retriever: dense (vector store) + BM25 results fused by reciprocal rank"""
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from tools.bm25 import BM25Index
+
+
+def reciprocal_rank_fusion(result_lists: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """Fuse ranked document lists with RRF: score(d) = sum(1 / (rrf_k + rank))
+    
+    Args:
+        result_lists: Ranked lists of documents (best first)
+        k: Number of documents to return
+        rrf_k: Smoothing constant (60 in the original paper)
+        
+    Returns:
+        The k best documents after fusion
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            # The page content identifies a document across both retrievers
+            key = doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [documents[key] for key in ranked[:k]]
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever combining vector similarity and BM25 keyword search"""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: Any
+    keyword_index: BM25Index
+    k: int = 6
+    # Number of candidates taken from each retriever before fusion
+    fetch_k: int = 20
+    rrf_k: int = 60
+    # Metadata pre-filter (vector store where clause) and its Python equivalent
+    filter: Optional[dict] = None
+    predicate: Optional[Callable] = None
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        fetch_k = max(self.fetch_k, self.k)
+        dense = self.vectorstore.similarity_search(query, k=fetch_k, filter=self.filter)
+        sparse = [doc for doc, _ in self.keyword_index.search(query, k=fetch_k, predicate=self.predicate)]
+        return reciprocal_rank_fusion([dense, sparse], k=self.k, rrf_k=self.rrf_k)
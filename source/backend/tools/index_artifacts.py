@@ -0,0 +1,210 @@
+"""Versioned, immutable index artifacts (embeddings + metadata + manifest)
+
+Layout of the artifacts directory:
+    CURRENT              name of the active version (replaced atomically)
+    pending.jsonl        questions added through the API since the last build
+    v20250101-120000-<µs>-<hash>/
+                         one immutable directory per build
+        manifest.json    model name, dimension, document count, checksums
+        data.json        ids, documents and columnar metadata
+        embeddings-*.npy embedding matrix (memory-mapped when served)
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from tools.document_loader import build_document_from_fields, iter_qa_documents, question_fingerprint
+from tools.numpy_vector_store import DATA_FILE, NumpyVectorStore
+
+MANIFEST_FILE = "manifest.json"
+CURRENT_FILE = "CURRENT"
+PENDING_FILE = "pending.jsonl"
+
+
+class ArtifactError(RuntimeError):
+    """Raised when an index artifact is missing, incomplete or corrupted"""
+
+
+class ArtifactNotFoundError(ArtifactError):
+    """Raised when the requested index version does not exist"""
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def new_version_name() -> str:
+    """Unique, chronologically sortable version name (builds started in the same second do not collide)"""
+    return f"{datetime.now().strftime('v%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:6]}"
+
+
+def list_versions(artifacts_dir: str) -> List[str]:
+    """Versions with a manifest, oldest first"""
+    if not os.path.isdir(artifacts_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(artifacts_dir)
+        if not name.startswith(".") and os.path.exists(os.path.join(artifacts_dir, name, MANIFEST_FILE))
+    )
+
+
+def current_version(artifacts_dir: str) -> Optional[str]:
+    """The active version named in CURRENT (None if no version was activated)"""
+    path = os.path.join(artifacts_dir, CURRENT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read().strip() or None
+
+
+def set_current_version(artifacts_dir: str, version: str):
+    """Atomically point CURRENT to a version"""
+    read_manifest(artifacts_dir, version)
+    tmp_path = os.path.join(artifacts_dir, CURRENT_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(artifacts_dir, CURRENT_FILE))
+
+
+def read_manifest(artifacts_dir: str, version: str) -> dict:
+    """Read the manifest of a version"""
+    path = os.path.join(artifacts_dir, version, MANIFEST_FILE)
+    # Version names are plain directory names, never paths
+    if not version or version.startswith(".") or os.path.basename(version) != version or not os.path.exists(path):
+        raise ArtifactNotFoundError(f"Index version {version} not found in {artifacts_dir}")
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def verify_artifact(artifacts_dir: str, version: str, embedding_model: str) -> dict:
+    """Check that a version is complete, intact and built with the expected model
+    
+    Returns:
+        The manifest of the version
+    """
+    manifest = read_manifest(artifacts_dir, version)
+    if manifest["embedding_model"] != embedding_model:
+        raise ArtifactError(
+            f"Index version {version} was built with {manifest['embedding_model']}, not {embedding_model}"
+        )
+    embeddings_path = os.path.join(artifacts_dir, version, manifest["embeddings_file"])
+    if not os.path.exists(embeddings_path) or _sha256(embeddings_path) != manifest["embeddings_sha256"]:
+        raise ArtifactError(f"Embedding matrix of index version {version} is missing or corrupted")
+    return manifest
+
+
+def read_pending(artifacts_dir: str) -> List[dict]:
+    """Questions added through the API that are not necessarily in an artifact yet"""
+    path = os.path.join(artifacts_dir, PENDING_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_pending(artifacts_dir: str, questions: List[dict]):
+    """Journal added questions so the next build (and hot-swaps) include them"""
+    os.makedirs(artifacts_dir, exist_ok=True)
+    with open(os.path.join(artifacts_dir, PENDING_FILE), "a", encoding="utf-8") as f:
+        for question in questions:
+            f.write(json.dumps(question, ensure_ascii=False) + "\n")
+
+
+def build_artifact(
+    source_json: str,
+    artifacts_dir: str,
+    embeddings: Embeddings,
+    embedding_model: str,
+    dtype: str = "float32",
+    batch_size: int = 64,
+) -> str:
+    """Build a new immutable index version from the QA export and the pending questions
+    
+    The version is written to a hidden temporary directory and renamed once
+    complete, so a reader never sees a partial build.
+    
+    Args:
+        source_json: Path to the QA JSON export
+        artifacts_dir: Artifacts directory
+        embeddings: Embedding model used to encode the documents
+        embedding_model: Name of the model (recorded in the manifest)
+        dtype: Storage type of the matrix ("float32" or "float16")
+        batch_size: Number of documents embedded per model call
+        
+    Returns:
+        The new version name
+        
+    Raises:
+        ArtifactError: no documents to index, or the version directory already exists
+    """
+    version = new_version_name()
+    tmp_dir = os.path.join(artifacts_dir, f".{version}.tmp")
+    store = NumpyVectorStore(embedding=embeddings, dtype=dtype)
+
+    def add_batch(batch):
+        texts = [doc.page_content for _, doc in batch]
+        store.add_embeddings(texts, embeddings.embed_documents(texts), [doc.metadata for _, doc in batch], [doc_id for doc_id, _ in batch])
+
+    batch, seen = [], set()
+    for doc in iter_qa_documents(source_json):
+        doc_id = f"qa-{doc.metadata['id']}"
+        if doc.metadata.get("id") is None or doc_id in seen:
+            continue
+        seen.add(doc_id)
+        batch.append((doc_id, doc))
+        if len(batch) >= batch_size:
+            add_batch(batch)
+            batch = []
+    for question in read_pending(artifacts_dir):
+        doc_id = question_fingerprint(
+            question["titre"], question["contenu"], question.get("thematique", ""),
+            question["ecoles"], question["utilisateurs"], question["langue"],
+        )
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+        batch.append((doc_id, build_document_from_fields(question_id=doc_id, **question)))
+        if len(batch) >= batch_size:
+            add_batch(batch)
+            batch = []
+    if batch:
+        add_batch(batch)
+    if not len(store):
+        raise ArtifactError(f"No documents found in {source_json}")
+
+    store.persist_directory = tmp_dir
+    store.persist()
+    with open(os.path.join(tmp_dir, DATA_FILE), "r", encoding="utf-8") as f:
+        embeddings_file = json.load(f)["embeddings_file"]
+    manifest = {
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "embedding_model": embedding_model,
+        "dimension": int(store._matrix.shape[1]),
+        "count": len(store),
+        "dtype": str(store._matrix.dtype),
+        "source": os.path.abspath(source_json),
+        "source_sha256": _sha256(source_json),
+        "embeddings_file": embeddings_file,
+        "embeddings_sha256": _sha256(os.path.join(tmp_dir, embeddings_file)),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    try:
+        # Fails instead of replacing an existing (non-empty) version directory
+        os.rename(tmp_dir, os.path.join(artifacts_dir, version))
+    except OSError as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise ArtifactError(f"Index version {version} cannot be created: {e}") from e
+    return version
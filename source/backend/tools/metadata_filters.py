@@ -0,0 +1,78 @@
+"""Retrieval pre-filters on school, audience and language metadata"""
+from typing import Callable, Optional
+
+# Boolean flags stored in each document's metadata, one per school / audience,
+# because Chroma cannot match a value inside the comma-separated "ecoles" string
+ECOLE_FLAG_PREFIX = "ecole_"
+UTILISATEUR_FLAG_PREFIX = "utilisateur_"
+# Marker telling that a document already carries the flags
+FLAGS_MARKER = "filters_indexed"
+
+
+def _split(values: str) -> list:
+    return [value.strip() for value in (values or "").split(",") if value.strip() and value.strip() != "N/A"]
+
+
+def filter_flags(ecoles: str, utilisateurs: str) -> dict:
+    """Metadata flags used to pre-filter documents at retrieval time
+    
+    Args:
+        ecoles: Comma-separated schools ("ESILV, EMLV" or "N/A")
+        utilisateurs: Comma-separated audiences ("student, staff" or "N/A")
+        
+    Returns:
+        Dict of boolean flags, e.g. {"ecole_ESILV": True, "utilisateur_student": True, ...}
+    """
+    flags = {FLAGS_MARKER: True}
+    flags.update({f"{ECOLE_FLAG_PREFIX}{ecole}": True for ecole in _split(ecoles)})
+    flags.update({f"{UTILISATEUR_FLAG_PREFIX}{utilisateur}": True for utilisateur in _split(utilisateurs)})
+    return flags
+
+
+def profile_filter(profile: Optional[dict]) -> Optional[dict]:
+    """Build the Chroma `where` filter for a user profile
+    
+    Documents without school / audience ("N/A") apply to everyone and always match.
+    
+    Args:
+        profile: {"ecole", "utilisateur", "langue"} (any of them may be missing)
+        
+    Returns:
+        Chroma where clause, or None if the profile does not restrict anything
+    """
+    if not profile:
+        return None
+    
+    clauses = []
+    if profile.get("ecole"):
+        clauses.append({"$or": [{f"{ECOLE_FLAG_PREFIX}{profile['ecole']}": True}, {"ecoles": "N/A"}]})
+    if profile.get("utilisateur"):
+        clauses.append({"$or": [{f"{UTILISATEUR_FLAG_PREFIX}{profile['utilisateur']}": True}, {"utilisateurs": "N/A"}]})
+    if profile.get("langue"):
+        clauses.append({"langues": profile["langue"]})
+    
+    if not clauses:
+        return None
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses}
+
+
+def profile_predicate(profile: Optional[dict]) -> Optional[Callable]:
+    """Python equivalent of profile_filter, for the in-process keyword index"""
+    if not profile or not any(profile.get(key) for key in ("ecole", "utilisateur", "langue")):
+        return None
+    
+    def matches(document) -> bool:
+        metadata = document.metadata
+        if profile.get("ecole") and metadata.get("ecoles", "N/A") != "N/A" \
+                and profile["ecole"] not in _split(metadata.get("ecoles", "")):
+            return False
+        if profile.get("utilisateur") and metadata.get("utilisateurs", "N/A") != "N/A" \
+                and profile["utilisateur"] not in _split(metadata.get("utilisateurs", "")):
+            return False
+        if profile.get("langue") and metadata.get("langues") != profile["langue"]:
+            return False
+        return True
+    
+    return matches
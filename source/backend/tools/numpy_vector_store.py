@@ -0,0 +1,401 @@
+"""Exact in-memory vector store on a contiguous NumPy embedding matrix
+
+For a corpus of a few hundred / thousand documents, a brute-force matrix
+product is faster and more predictable than an HNSW index. The matrix is
+memory-mapped from disk and metadata is kept column by column so that
+filters are evaluated as vectorized masks.
+"""
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, a single process must write the store
+    fcntl = None
+
+DATA_FILE = "data.json"
+LOCK_FILE = ".lock"
+
+
+class StaleStoreError(RuntimeError):
+    """Raised when persisting over a store another process wrote since it was loaded"""
+
+
+class NumpyVectorStore(VectorStore):
+    """Exact cosine-similarity vector store backed by a NumPy matrix
+    
+    Supports the subset of the Chroma API used by RAGSystem: `get`, `delete`,
+    `add_texts` / `add_documents`, similarity search with Chroma-style `where`
+    filters ($and, $or, $eq, $ne, $in, $nin) and metadata updates.
+    Embeddings are expected to be L2-normalized.
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        persist_directory: Optional[str] = None,
+        dtype: str = "float32",
+        read_only: bool = False,
+    ):
+        """
+        Args:
+            embedding: Embedding function used for queries and new texts
+            persist_directory: Directory of the store (None for a memory-only store)
+            dtype: Storage type of the matrix ("float32" or "float16")
+            read_only: Never write to persist_directory (appends stay in memory)
+        """
+        self._embedding = embedding
+        self.persist_directory = persist_directory
+        self.dtype = np.dtype(dtype)
+        self.read_only = read_only
+        self._lock = threading.Lock()
+        
+        self._matrix = np.zeros((0, 0), dtype=self.dtype)
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._columns: Dict[str, List[Any]] = {}
+        self._column_arrays: Dict[str, np.ndarray] = {}
+        # Writes inside deferred_persist() blocks are persisted once, at the end
+        self._defer_depth = 0
+        self._dirty = False
+        # Matrix file this store was loaded from or last wrote (single-writer check)
+        self._embeddings_file: Optional[str] = None
+        
+        if persist_directory and os.path.exists(os.path.join(persist_directory, DATA_FILE)):
+            self._load()
+
+    # ------------------------------------------------------------------ storage
+
+    def _load(self):
+        with open(os.path.join(self.persist_directory, DATA_FILE), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # Memory-mapped: pages are loaded lazily by the OS and shared between workers
+        matrix = np.load(os.path.join(self.persist_directory, data["embeddings_file"]), mmap_mode="r")
+        self.dtype = matrix.dtype
+        self._matrix = matrix
+        self._embeddings_file = data["embeddings_file"]
+        self._ids = data["ids"]
+        self._documents = data["documents"]
+        self._columns = data["metadata"]
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive lock on the store directory, held while the store is written"""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.persist_directory, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def persist(self):
+        """Write the store atomically: a new matrix file, then the data file pointing to it
+        
+        The store has a single writer at a time: writes are serialized by a lock
+        file, and a store that another process wrote since it was loaded (e.g.
+        tools.sync_index while the server runs) is not overwritten.
+        
+        Raises:
+            StaleStoreError: the data file no longer points to the matrix this store loaded or wrote
+        """
+        if not self.persist_directory or self.read_only:
+            return
+        os.makedirs(self.persist_directory, exist_ok=True)
+        data_path = os.path.join(self.persist_directory, DATA_FILE)
+        with self._file_lock():
+            previous = None
+            if os.path.exists(data_path):
+                with open(data_path, "r", encoding="utf-8") as f:
+                    previous = json.load(f)["embeddings_file"]
+            if previous != self._embeddings_file:
+                raise StaleStoreError(
+                    f"The vector store in {self.persist_directory} was written by another process: "
+                    "reload it (POST /v1/index/reload) before writing"
+                )
+            
+            embeddings_file = f"embeddings-{uuid.uuid4().hex[:12]}.npy"
+            np.save(os.path.join(self.persist_directory, embeddings_file), np.ascontiguousarray(self._matrix))
+            tmp_path = data_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "embeddings_file": embeddings_file,
+                    "ids": self._ids,
+                    "documents": self._documents,
+                    "metadata": self._columns,
+                }, f, ensure_ascii=False)
+            os.replace(tmp_path, data_path)
+            self._embeddings_file = embeddings_file
+            
+            if previous:
+                try:
+                    os.remove(os.path.join(self.persist_directory, previous))
+                except OSError:
+                    pass
+
+    def _written(self):
+        """Persist after a write, or only mark the store dirty inside deferred_persist()"""
+        if self._defer_depth:
+            self._dirty = True
+        else:
+            self.persist()
+
+    @contextmanager
+    def deferred_persist(self):
+        """Write the store once for a whole block of writes (a sync, a batch of questions)
+        
+        Each persist rewrites the full matrix and data file, so persisting after
+        every add or delete of a sync is quadratic in the store size.
+        """
+        with self._lock:
+            self._defer_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._defer_depth -= 1
+                if not self._defer_depth and self._dirty:
+                    self._dirty = False
+                    self.persist()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the embedding matrix in bytes"""
+        return int(self._matrix.nbytes)
+
+    # ----------------------------------------------------------------- metadata
+
+    def _metadata_at(self, row: int) -> dict:
+        return {
+            key: values[row]
+            for key, values in self._columns.items()
+            if values[row] is not None
+        }
+
+    def _column(self, key: str) -> np.ndarray:
+        array = self._column_arrays.get(key)
+        if array is None:
+            values = self._columns.get(key, [None] * len(self._ids))
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            self._column_arrays[key] = array
+        return array
+
+    def _mask(self, where: Optional[dict]) -> np.ndarray:
+        """Evaluate a Chroma-style where clause as a boolean mask over the rows"""
+        n_rows = len(self._ids)
+        if not where:
+            return np.ones(n_rows, dtype=bool)
+        
+        mask = np.ones(n_rows, dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self._mask(clause)
+            elif key == "$or":
+                any_mask = np.zeros(n_rows, dtype=bool)
+                for clause in condition:
+                    any_mask |= self._mask(clause)
+                mask &= any_mask
+            else:
+                column = self._column(key)
+                if not isinstance(condition, dict):
+                    condition = {"$eq": condition}
+                for operator, value in condition.items():
+                    if operator == "$eq":
+                        mask &= column == value
+                    elif operator == "$ne":
+                        mask &= column != value
+                    elif operator in ("$in", "$nin"):
+                        values = set(value)
+                        matches = np.fromiter((item in values for item in column), dtype=bool, count=len(column))
+                        mask &= matches if operator == "$in" else ~matches
+                    else:
+                        raise ValueError(f"Unsupported filter operator: {operator}")
+        return mask
+
+    # -------------------------------------------------------------------- writes
+
+    def add_embeddings(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Add precomputed embeddings (no model call)
+        
+        IDs already in the store are replaced rather than duplicated (the last
+        occurrence wins when an ID repeats within the call).
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        vectors = np.asarray(embeddings, dtype=self.dtype)
+        
+        with self._lock:
+            n_rows = len(self._ids)
+            rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            replaced: Dict[int, int] = {}
+            appended: Dict[str, int] = {}
+            for position, doc_id in enumerate(ids):
+                if doc_id in rows:
+                    replaced[rows[doc_id]] = position
+                else:
+                    appended[doc_id] = position
+            
+            for key in {key for metadata in metadatas for key in metadata}:
+                self._columns.setdefault(key, [None] * n_rows)
+            if replaced:
+                # Writable copy out of the memory map
+                matrix = np.array(self._matrix)
+                matrix[list(replaced)] = vectors[list(replaced.values())]
+                self._matrix = matrix
+                for row, position in replaced.items():
+                    self._documents[row] = texts[position]
+                    for key, values in self._columns.items():
+                        values[row] = metadatas[position].get(key)
+            if appended:
+                positions = list(appended.values())
+                for position in positions:
+                    for key, values in self._columns.items():
+                        values.append(metadatas[position].get(key))
+                self._ids.extend(appended)
+                self._documents.extend(texts[position] for position in positions)
+                # Appends copy the (small) matrix out of the memory map
+                new_vectors = vectors[positions]
+                self._matrix = new_vectors if n_rows == 0 else np.vstack([self._matrix, new_vectors])
+            self._column_arrays = {}
+            self._written()
+        return ids
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            removed = set(ids)
+            keep = [row for row, doc_id in enumerate(self._ids) if doc_id not in removed]
+            if len(keep) == len(self._ids):
+                return False
+            self._matrix = np.asarray(self._matrix[keep])
+            self._ids = [self._ids[row] for row in keep]
+            self._documents = [self._documents[row] for row in keep]
+            self._columns = {key: [values[row] for row in keep] for key, values in self._columns.items()}
+            self._column_arrays = {}
+            self._written()
+        return True
+
+    def update_metadatas(self, ids: List[str], metadatas: List[dict]):
+        """Replace the metadata of existing documents"""
+        with self._lock:
+            rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+            for doc_id, metadata in zip(ids, metadatas):
+                row = rows.get(doc_id)
+                if row is None:
+                    continue
+                for key in metadata:
+                    self._columns.setdefault(key, [None] * len(self._ids))
+                for key, values in self._columns.items():
+                    values[row] = metadata.get(key)
+            self._column_arrays = {}
+            self._written()
+
+    # --------------------------------------------------------------------- reads
+
+    def get(self, ids: Optional[List[str]] = None, include: Optional[List[str]] = None, **kwargs: Any) -> dict:
+        """Chroma-compatible `get`: {"ids", "documents", "metadatas"}"""
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            return self._get(ids, include)
+
+    def _get(self, ids: Optional[List[str]], include: List[str]) -> dict:
+        if ids is None:
+            rows = list(range(len(self._ids)))
+        else:
+            wanted = set(ids)
+            rows = [row for row, doc_id in enumerate(self._ids) if doc_id in wanted]
+        result = {"ids": [self._ids[row] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [self._documents[row] for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [self._metadata_at(row) for row in rows]
+        return result
+
+    def similarity_search_by_vector_with_score(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[dict] = None,
+    ) -> List[Tuple[Document, float]]:
+        """Top-k documents by cosine similarity, restricted to rows matching the filter"""
+        query = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            if not self._ids or k <= 0:
+                return []
+            scores = self._matrix.astype(np.float32, copy=False) @ query
+            if filter:
+                scores = np.where(self._mask(filter), scores, -np.inf)
+            
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [
+                (Document(page_content=self._documents[row], metadata=self._metadata_at(row), id=self._ids[row]), float(scores[row]))
+                for row in top
+                if np.isfinite(scores[row])
+            ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[dict] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Scores already are cosine similarities
+        return lambda score: score
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        dtype: str = "float32",
+        **kwargs: Any,
+    ) -> "NumpyVectorStore":
+        store = cls(embedding=embedding, persist_directory=persist_directory, dtype=dtype)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
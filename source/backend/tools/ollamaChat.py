@@ -1,6 +1,25 @@
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import httpx
 from langchain_ollama import ChatOllama
+from ollama import AsyncClient, Client
+
+from core.config import get_settings
+from core.metrics import (
+    OLLAMA_DECODE_SECONDS,
+    OLLAMA_GENERATED_TOKENS,
+    OLLAMA_LOAD_SECONDS,
+    OLLAMA_PREFILL_SECONDS,
+    OLLAMA_PROMPT_TOKENS,
+    OLLAMA_TOKENS_PER_SECOND,
+)
+
+logger = logging.getLogger(__name__)
 
-def create_ollama_chat(model: str = "llama3", base_url: str = "http://localhost:11434", temperature: float = 0.2, max_tokens: int = 200):
+def create_ollama_chat(model: str = "llama3", base_url: str = "http://localhost:11434", temperature: float = 0.2, max_tokens: int = 200, keep_alive: Optional[Union[int, str]] = None, num_predict: Optional[int] = None):
     """
     Creates a ChatOllama instance to interact with a local Ollama instance.
     Args:
@@ -8,6 +27,8 @@ def create_ollama_chat(model: str = "llama3", base_url: str = "http://localhost:
         base_url: URL of the local Ollama instance
         temperature: Model temperature
         max_tokens: Maximum number of generated tokens
+        keep_alive: How long Ollama keeps the model loaded after the request (ex: "30m", -1 for ever)
+        num_predict: Maximum number of tokens Ollama generates (None for the model default)
     Returns:
         ChatOllama: Chat model instance
     """
@@ -16,4 +37,146 @@ def create_ollama_chat(model: str = "llama3", base_url: str = "http://localhost:
         base_url=base_url,
         temperature=temperature,
         max_tokens=max_tokens,
+        keep_alive=keep_alive,
+        num_predict=num_predict,
     )
+
+
+# Registry of chat clients keyed by (model, temperature, num_predict, host), all sharing
+# one keep-alive connection pool per Ollama host
+_chat_registry: Dict[Tuple[str, float, Optional[int], str], ChatOllama] = {}
+_sync_clients: Dict[str, Client] = {}
+_async_clients: Dict[str, AsyncClient] = {}
+_registry_lock = threading.Lock()
+
+
+def _pool_kwargs() -> dict:
+    """httpx options for the shared Ollama connection pool"""
+    settings = get_settings()
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.ollama_max_connections,
+            max_keepalive_connections=settings.ollama_max_keepalive_connections,
+        ),
+        "timeout": httpx.Timeout(settings.ollama_timeout),
+    }
+
+
+def _ensure_clients(base_url: str):
+    """Create the pooled clients of an Ollama host (registry lock held)"""
+    if base_url not in _sync_clients:
+        _sync_clients[base_url] = Client(host=base_url, **_pool_kwargs())
+        _async_clients[base_url] = AsyncClient(host=base_url, **_pool_kwargs())
+
+
+def get_ollama_chat(model: str, temperature: float = 0.2, num_predict: Optional[int] = None, base_url: Optional[str] = None) -> ChatOllama:
+    """
+    Returns a shared ChatOllama instance, creating it on first use.
+    Every instance reuses the same pooled HTTP clients, so graph nodes do not
+    open new connections to Ollama on each request, and asks Ollama to keep
+    the model loaded for `HELPAI_OLLAMA_KEEP_ALIVE`.
+    Args:
+        model: Name of the Ollama model
+        temperature: Model temperature
+        num_predict: Maximum number of tokens Ollama generates (None for the model default)
+        base_url: URL of the Ollama instance (defaults to the settings)
+    Returns:
+        ChatOllama: Shared chat model instance
+    """
+    base_url = base_url or get_settings().ollama_base_url
+    key = (model, temperature, num_predict, base_url)
+
+    with _registry_lock:
+        chat = _chat_registry.get(key)
+        if chat is None:
+            _ensure_clients(base_url)
+
+            chat = create_ollama_chat(
+                model=model,
+                base_url=base_url,
+                temperature=temperature,
+                keep_alive=get_settings().ollama_keep_alive,
+                num_predict=num_predict,
+            )
+            # Swap the per-instance clients for the shared pooled ones
+            chat._client = _sync_clients[base_url]
+            chat._async_client = _async_clients[base_url]
+            _chat_registry[key] = chat
+
+    return chat
+
+
+def _seconds(nanoseconds) -> Optional[float]:
+    return nanoseconds / 1e9 if nanoseconds else None
+
+
+def record_ollama_timings(response, node: str) -> dict:
+    """
+    Records the load / prefill / decode split reported by Ollama for one call.
+    Args:
+        response: AIMessage returned by ChatOllama (or an Ollama API response)
+        node: Label of the caller (graph node or "warmup")
+    Returns:
+        dict: Timings in seconds, token counts (missing values are None)
+            and tokens_per_second when Ollama reported the decode
+    """
+    metadata = getattr(response, "response_metadata", None)
+    if metadata is None:
+        metadata = response if isinstance(response, dict) else dict(response or {})
+
+    timings = {
+        "load_seconds": _seconds(metadata.get("load_duration")),
+        "prefill_seconds": _seconds(metadata.get("prompt_eval_duration")),
+        "decode_seconds": _seconds(metadata.get("eval_duration")),
+        "prompt_tokens": metadata.get("prompt_eval_count"),
+        "generated_tokens": metadata.get("eval_count"),
+    }
+    if timings["load_seconds"] is not None:
+        OLLAMA_LOAD_SECONDS.labels(node=node).observe(timings["load_seconds"])
+    if timings["prefill_seconds"] is not None:
+        OLLAMA_PREFILL_SECONDS.labels(node=node).observe(timings["prefill_seconds"])
+    if timings["decode_seconds"] is not None:
+        OLLAMA_DECODE_SECONDS.labels(node=node).observe(timings["decode_seconds"])
+    if timings["prompt_tokens"]:
+        OLLAMA_PROMPT_TOKENS.labels(node=node).inc(timings["prompt_tokens"])
+    if timings["generated_tokens"]:
+        OLLAMA_GENERATED_TOKENS.labels(node=node).inc(timings["generated_tokens"])
+        if timings["decode_seconds"]:
+            timings["tokens_per_second"] = timings["generated_tokens"] / timings["decode_seconds"]
+            OLLAMA_TOKENS_PER_SECOND.labels(node=node).observe(timings["tokens_per_second"])
+    return timings
+
+
+async def warm_up_model(model: str, base_url: Optional[str] = None) -> dict:
+    """
+    Loads the model in Ollama (empty prompt, nothing generated) and pins it
+    for `HELPAI_OLLAMA_KEEP_ALIVE`, so that requests do not pay the load time.
+    Args:
+        model: Name of the Ollama model
+        base_url: URL of the Ollama instance (defaults to the settings)
+    Returns:
+        dict: Timings reported by Ollama (see record_ollama_timings)
+    """
+    settings = get_settings()
+    base_url = base_url or settings.ollama_base_url
+    with _registry_lock:
+        _ensure_clients(base_url)
+        client = _async_clients[base_url]
+
+    response = await client.generate(model=model, prompt="", keep_alive=settings.ollama_keep_alive)
+    return record_ollama_timings(response, node="warmup")
+
+
+async def keep_model_warm(model: str, interval: float):
+    """Background task: load the model now, then refresh its keep-alive every `interval` seconds
+    
+    Errors are logged and retried at the next interval (Ollama may start after the API).
+    """
+    while True:
+        try:
+            timings = await warm_up_model(model)
+            if timings["load_seconds"] and timings["load_seconds"] > 0.5:
+                logger.info("Ollama model %s loaded in %.1fs", model, timings["load_seconds"])
+        except Exception as e:
+            logger.warning("Ollama warm-up of %s failed: %s", model, e)
+        await asyncio.sleep(interval)
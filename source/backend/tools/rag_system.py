@@ -1,15 +1,49 @@
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from contextlib import nullcontext
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+import asyncio
+import logging
 import os
+import threading
 import uuid
 
-from tools.document_loader import build_document_from_fields
+import numpy as np
+
+from core.config import get_settings
+from tools.answer_cache import get_answer_cache
+from tools.bm25 import BM25Index
+from tools.document_loader import EXPORT_SOURCE, build_document_from_fields, iter_qa_documents, question_fingerprint
+from tools.embedding_batcher import BatchingEmbeddings
+from tools.embedding_cache import CachedEmbeddings
+from tools.faq_index import FaqIndex
+from tools.executor import run_cpu_bound
+from tools.hybrid_retriever import HybridRetriever
+from tools.metadata_filters import FLAGS_MARKER, filter_flags, profile_filter, profile_predicate
+from tools.index_artifacts import append_pending, current_version, read_pending, set_current_version, verify_artifact
+from tools.numpy_vector_store import NumpyVectorStore
+
+logger = logging.getLogger(__name__)
+
+
+class EmptyVectorStoreError(ValueError):
+    """The vector store has no documents and none were given to build it"""
+
+
+def document_ids(documents: List[Document]) -> List[str]:
+    """Stable store IDs: qa-<id> for export records, random otherwise"""
+    return [
+        f"qa-{doc.metadata['id']}" if doc.metadata.get("source") == EXPORT_SOURCE and doc.metadata.get("id") is not None
+        else str(uuid.uuid4())
+        for doc in documents
+    ]
+
 
 class RAGSystem:
-    """ RAG System with Chroma and HuggingFace embeddings"""
+    """ RAG System with a vector store (Chroma or exact NumPy) and HuggingFace embeddings"""
 
     def __init__(
         self,
@@ -17,6 +51,18 @@ class RAGSystem:
         persist_directory: str="",
         embedding_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
         k_docs: int = 6,
+        embedding_cache_path: Optional[str] = None,
+        embedding_cache_size: int = 10000,
+        hybrid: bool = True,
+        hybrid_fetch_k: int = 20,
+        rrf_k: int = 60,
+        backend: str = "chroma",
+        vector_dtype: str = "float32",
+        embeddings: Optional[Embeddings] = None,
+        index_version: Optional[str] = None,
+        embedding_batch_size: int = 1,
+        embedding_batch_wait_ms: float = 5.0,
+        collection_metadata: Optional[dict] = None,
     ):
         """
         Initializes the RAG system.
@@ -25,39 +71,157 @@ class RAGSystem:
             documents: List of documents to index
             persist_directory: Directory to persist the Chroma database
             embedding_model: Embedding model (multilingual for French)
+            k_docs: Default number of documents returned by the retriever
+            embedding_cache_path: On-disk query embedding cache (None for memory only)
+            embedding_cache_size: Number of query embeddings kept in memory
+            hybrid: Fuse BM25 keyword results with the dense results
+            hybrid_fetch_k: Candidates taken from each retriever before fusion
+            rrf_k: Reciprocal-rank fusion constant
+            backend: Vector store backend, "chroma" (HNSW), "numpy" (exact search) or
+                "artifact" (read-only versioned build, persist_directory is the artifacts directory)
+            vector_dtype: Storage type of the NumPy backend matrix ("float32" or "float16")
+            embeddings: Already loaded embeddings to reuse instead of loading the model
+            index_version: Artifact version to serve (defaults to the active one)
+            embedding_batch_size: Maximum number of concurrent queries encoded together (1 disables micro-batching)
+            embedding_batch_wait_ms: Maximum time a query waits for others to join its batch
+            collection_metadata: Chroma collection settings used when the collection is
+                created (ex: {"hnsw:M": 32, "hnsw:construction_ef": 200, "hnsw:search_ef": 50})
         """
         self.persist_directory = persist_directory
+        self.k_docs = k_docs
+        self.hybrid = hybrid
+        self.hybrid_fetch_k = hybrid_fetch_k
+        self.rrf_k = rrf_k
+        self.backend = backend
+        self.embedding_model = embedding_model
+        self.index_version = None
+        self.collection_metadata = collection_metadata
+        
+        if embeddings is not None:
+            self.embeddings = embeddings
+        else:
+            # Initialize embeddings (multilingual model for French)
+            print(f"Loading embedding model: {embedding_model} ...")
+            model = HuggingFaceEmbeddings(
+                model_name=embedding_model,
+                model_kwargs={'device': 'cpu'},
+                encode_kwargs={'normalize_embeddings': True}
+            )
+            # Concurrent cache misses are encoded together in one forward pass
+            if embedding_batch_size > 1:
+                model = BatchingEmbeddings(model, max_batch_size=embedding_batch_size, max_wait_ms=embedding_batch_wait_ms)
+            # Query embeddings are cached (memory + disk) in front of the model
+            self.embeddings = CachedEmbeddings(
+                model,
+                model_name=embedding_model,
+                cache_path=embedding_cache_path,
+                max_size=embedding_cache_size,
+            )
+            print("Embedding model loaded")
+        
+        if backend == "numpy":
+            self.vectorstore = self._open_numpy_store(documents, vector_dtype)
+        elif backend == "artifact":
+            self.vectorstore = self._open_artifact_store(index_version)
+        elif backend == "chroma":
+            self.vectorstore = self._open_chroma_store(documents)
+        else:
+            raise ValueError(f"Unknown vector store backend: {backend}")
+        
+        # Older stores lack the school / audience flags used by the pre-filters
+        self._ensure_filter_flags()
         
-        # Initialize embeddings (multilingual model for French)
-        print(f"Loading embedding model: {embedding_model} ...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=embedding_model,
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
+        # Keyword index over the same documents as the vector store
+        self.keyword_index = BM25Index()
+        if self.hybrid:
+            self._build_keyword_index()
+        
+        # Stored question titles, for the FAQ fast path
+        self.faq_index = FaqIndex()
+        self._build_faq_index()
+        
+        # Create the retriever
+        self.retriever = self._create_retriever(k_docs)
+    
+    def _open_numpy_store(self, documents: Optional[List[Document]], vector_dtype: str) -> NumpyVectorStore:
+        """Load the exact NumPy store (memory-mapped), building it if it is empty"""
+        store = NumpyVectorStore(
+            embedding=self.embeddings,
+            persist_directory=self.persist_directory,
+            dtype=vector_dtype,
         )
-        print("Embedding model loaded")
+        if len(store) > 0:
+            print(f"Vector store loaded from {self.persist_directory} ({len(store)} documents, {store.nbytes / 1e6:.1f} MB)")
+            return store
+        
+        if documents is None:
+            raise EmptyVectorStoreError("No documents provided to initialize the vector store.")
+        print(f"Creating NumPy vector store with {len(documents)} documents...")
+        store.add_documents(documents, ids=document_ids(documents))
+        print(f"Vector store created and saved in {self.persist_directory}")
+        return store
+    
+    def _open_artifact_store(self, index_version: Optional[str]) -> NumpyVectorStore:
+        """Load a prebuilt index version read-only (never rebuilt at startup)"""
+        version = index_version or current_version(self.persist_directory)
+        if version is None:
+            raise ValueError(
+                f"No active index in {self.persist_directory}: run python -m tools.build_index <export.json> --activate"
+            )
+        manifest = verify_artifact(self.persist_directory, version, self.embedding_model)
+        store = NumpyVectorStore(
+            embedding=self.embeddings,
+            persist_directory=os.path.join(self.persist_directory, version),
+            read_only=True,
+        )
+        if len(store) != manifest["count"]:
+            raise ValueError(f"Index version {version} is incomplete ({len(store)}/{manifest['count']} documents)")
+        self.index_version = version
+        print(f"Index {version} loaded ({len(store)} documents, {store.nbytes / 1e6:.1f} MB)")
+        return store
+    
+    def replay_pending(self) -> int:
+        """Add the journaled API questions missing from the served artifact
+        
+        Returns:
+            Number of questions added
+        """
+        if self.backend != "artifact":
+            return 0
+        pending = read_pending(self.persist_directory)
+        if not pending:
+            return 0
+        results = self.add_questions(pending, journal=False)
+        return sum(1 for result in results if result["status"] == "added")
+    
+    def _open_chroma_store(self, documents: Optional[List[Document]]) -> Chroma:
+        """Load the Chroma store, building it if it is missing or empty"""
+        persist_directory = self.persist_directory
         
         # Create or load the Chroma vector store
         # Check if the store already exists with data
         db_exists = False
         if os.path.exists(persist_directory):
+            # Try to load an existing store. A store that cannot be opened is an
+            # error, not a reason to silently rebuild over it.
             try:
-                # Try to load an existing store
                 test_store = Chroma(
                     persist_directory=persist_directory,
-                    embedding_function=self.embeddings
+                    embedding_function=self.embeddings,
+                    collection_metadata=self.collection_metadata,
                 )
-                # Check if it contains documents
-                if test_store._collection.count() > 0:
-                    db_exists = True
-                    self.vectorstore = test_store
-                    print(f"Vector store loaded from {persist_directory} ({test_store._collection.count()} documents)")
-            except:
-                db_exists = False
+                count = test_store._collection.count()
+            except Exception as e:
+                raise RuntimeError(f"Vector store in {persist_directory} cannot be opened (corrupted?): {e}") from e
+            # Check if it contains documents
+            if count > 0:
+                db_exists = True
+                vectorstore = test_store
+                print(f"Vector store loaded from {persist_directory} ({count} documents)")
         
         if not db_exists:
             if documents is None:
-                raise ValueError("No documents provided to initialize the vector store.")
+                raise EmptyVectorStoreError("No documents provided to initialize the vector store.")
             print(f"Creating vector store with {len(documents)} documents...")
             print("   This may take a few minutes to generate embeddings...")
             
@@ -65,23 +229,117 @@ class RAGSystem:
             os.makedirs(persist_directory, exist_ok=True)
             
             # Create the vector store and persist it
-            self.vectorstore = Chroma.from_documents(
+            vectorstore = Chroma.from_documents(
                 documents=documents,
                 embedding=self.embeddings,
-                persist_directory=persist_directory
+                ids=document_ids(documents),
+                persist_directory=persist_directory,
+                collection_metadata=self.collection_metadata,
             )
             
             print(f"Vector store created and saved in {persist_directory}")
         
-        # Create the retriever
-        self.retriever = self.vectorstore.as_retriever(
+        return vectorstore
+    
+    def _build_keyword_index(self):
+        """Index every document of the vector store for BM25 search"""
+        stored = self.vectorstore.get(include=["documents", "metadatas"])
+        for doc_id, content, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"]):
+            self.keyword_index.add(doc_id, Document(page_content=content, metadata=metadata or {}, id=doc_id))
+        print(f"Keyword index built ({len(self.keyword_index)} documents)")
+    
+    def _build_faq_index(self):
+        """Index the title of every stored question"""
+        stored = self.vectorstore.get(include=["metadatas"])
+        for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            self.faq_index.add(doc_id, (metadata or {}).get("title", ""))
+    
+    def get_documents(self, ids: List[str]) -> List[Document]:
+        """Stored documents with the given IDs (missing IDs are ignored)"""
+        stored = self.vectorstore.get(ids=ids, include=["documents", "metadatas"])
+        return [
+            Document(page_content=content, metadata=metadata or {}, id=doc_id)
+            for doc_id, content, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])
+        ]
+    
+    def title_vectors(self, documents: List[Document]) -> np.ndarray:
+        """Embeddings of the stored titles of documents, one row per document
+        
+        Computed in one model call for the titles not cached yet, and cached
+        in the FAQ index rather than in the query embedding cache.
+        """
+        doc_ids = [doc.id for doc in documents]
+        vectors = self.faq_index.title_vectors(doc_ids)
+        missing = [row for row, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # The cache wrapper only caches queries: encode with the model behind it
+            model = getattr(self.embeddings, "embeddings", self.embeddings)
+            computed = model.embed_documents([documents[row].metadata.get("title", "") for row in missing])
+            for row, vector in zip(missing, computed):
+                vectors[row] = np.asarray(vector, dtype=np.float32)
+                self.faq_index.set_title_vector(doc_ids[row], vectors[row])
+        return np.vstack(vectors)
+    
+    def _ensure_filter_flags(self):
+        """Add the metadata flags used by the profile pre-filters to documents missing them"""
+        stored = self.vectorstore.get(include=["metadatas"])
+        ids, metadatas = [], []
+        for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            metadata = metadata or {}
+            if metadata.get(FLAGS_MARKER):
+                continue
+            ids.append(doc_id)
+            metadatas.append({**metadata, **filter_flags(metadata.get("ecoles", ""), metadata.get("utilisateurs", ""))})
+        if ids:
+            if isinstance(self.vectorstore, NumpyVectorStore):
+                self.vectorstore.update_metadatas(ids, metadatas)
+            else:
+                self.vectorstore._collection.update(ids=ids, metadatas=metadatas)
+            print(f"Added filter metadata to {len(ids)} documents")
+    
+    def _batched_writes(self):
+        """Persist the NumPy store once for a block of writes (Chroma persists its own way)"""
+        if isinstance(self.vectorstore, NumpyVectorStore):
+            return self.vectorstore.deferred_persist()
+        return nullcontext()
+    
+    def _create_retriever(self, k: int, profile: Optional[dict] = None):
+        where = profile_filter(profile)
+        if self.hybrid:
+            return HybridRetriever(
+                vectorstore=self.vectorstore,
+                keyword_index=self.keyword_index,
+                k=k,
+                fetch_k=self.hybrid_fetch_k,
+                rrf_k=self.rrf_k,
+                filter=where,
+                predicate=profile_predicate(profile),
+            )
+        search_kwargs = {"k": k}
+        if where is not None:
+            search_kwargs["filter"] = where
+        return self.vectorstore.as_retriever(
             search_type="similarity",
-            search_kwargs={"k": k_docs}  # Return the 6 most similar documents
+            search_kwargs=search_kwargs
         )
     
-    def get_retriever(self):
-        """Return the retriever for use in a RAG chain"""
-        return self.retriever
+    def get_retriever(self, k: Optional[int] = None, profile: Optional[dict] = None):
+        """Return the retriever for use in a RAG chain
+        
+        Args:
+            k: Number of documents to return (defaults to the system's k_docs)
+            profile: Optional {"ecole", "utilisateur", "langue"} pre-filter
+        """
+        if (k is None or k == self.k_docs) and profile_filter(profile) is None:
+            return self.retriever
+        return self._create_retriever(k or self.k_docs, profile)
+    
+    def warm_up(self):
+        """Run a first encode so the embedding model is fully loaded before serving"""
+        # Bypass the query cache (if any): a disk hit would leave the model cold
+        model = getattr(self.embeddings, "embeddings", self.embeddings)
+        model.embed_query("Comment justifier une absence ?")
+        print("Embedding model warmed up")
     
     def add_question(
         self,
@@ -91,33 +349,360 @@ class RAGSystem:
         ecoles: str,
         utilisateurs: str,
         langue: str,
-        date: str = datetime.now().strftime("%Y-%m-%d"),
+        date: Optional[str] = None,
         post_type: str = "",
         status: str = ""
-    ):
+    ) -> dict:
         """
-        Adds or updates a question in the vector store.
+        Adds a question to the vector store (skipped if the same content is already stored).
+        
+        Returns:
+            Result dict with the document "id" and a "status" ("added" or "skipped")
         """
-        generated_id = str(uuid.uuid4())
-        doc = build_document_from_fields(
-            question_id=generated_id,
-            titre=titre,
-            contenu=contenu,
-            thematique=thematique,
-            ecoles=ecoles,
-            utilisateurs=utilisateurs,
-            langue=langue,
-            date=date,
-            post_type=post_type,
-            status=status,
-        )
+        result = self.add_questions([{
+            "titre": titre,
+            "contenu": contenu,
+            "thematique": thematique,
+            "ecoles": ecoles,
+            "utilisateurs": utilisateurs,
+            "langue": langue,
+            "date": date,
+            "post_type": post_type,
+            "status": status,
+        }])[0]
+        if result["status"] == "error":
+            raise RuntimeError(result["message"])
+        return result
+    
+    def add_questions(self, questions: List[dict], batch_size: int = 64, journal: bool = True) -> List[dict]:
+        """
+        Adds many questions, embedding them in batches.
+        Each question is stored under a content hash, so questions already in the
+        store (or repeated in the same call) are skipped instead of duplicated.
+        
+        Args:
+            questions: Dicts with titre, contenu, thematique, ecoles, utilisateurs, langue
+                (and optionally date, post_type, status)
+            batch_size: Number of documents embedded per model call
+            journal: With the artifact backend, record the added questions in the
+                pending journal so the next build and hot-swaps keep them
+            
+        Returns:
+            One result per question, in order: {"index", "id", "status", "message"}
+            with status "added", "skipped" or "error"
+            
+        Raises:
+            ValueError: batch_size is not a positive integer
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be a positive integer, got {batch_size}")
+        results: List[Optional[dict]] = [None] * len(questions)
+        pending = {}
+        fields = {}
+        today = datetime.now().strftime("%Y-%m-%d")
+        
+        for index, question in enumerate(questions):
+            try:
+                doc_id = question_fingerprint(
+                    question["titre"], question["contenu"], question.get("thematique", ""),
+                    question["ecoles"], question["utilisateurs"], question["langue"],
+                )
+                if doc_id in pending:
+                    results[index] = {"index": index, "id": doc_id, "status": "skipped", "message": "Duplicate in request"}
+                    continue
+                fields[doc_id] = {
+                    "titre": question["titre"],
+                    "contenu": question["contenu"],
+                    "thematique": question.get("thematique") or "",
+                    "ecoles": question["ecoles"],
+                    "utilisateurs": question["utilisateurs"],
+                    "langue": question["langue"],
+                    "date": question.get("date") or today,
+                    "post_type": question.get("post_type") or "",
+                    "status": question.get("status") or "",
+                }
+                pending[doc_id] = (index, build_document_from_fields(question_id=doc_id, **fields[doc_id]))
+            except Exception as e:
+                results[index] = {"index": index, "id": None, "status": "error", "message": str(e)}
+        
+        items = list(pending.items())
+        with self._batched_writes():
+            for start in range(0, len(items), batch_size):
+                batch = items[start:start + batch_size]
+                existing = set(self.vectorstore.get(ids=[doc_id for doc_id, _ in batch], include=[])["ids"])
+                new_items = []
+                for doc_id, (index, doc) in batch:
+                    if doc_id in existing:
+                        results[index] = {"index": index, "id": doc_id, "status": "skipped", "message": "Already in the knowledge base"}
+                    else:
+                        new_items.append((doc_id, index, doc))
+                if not new_items:
+                    continue
+                
+                try:
+                    # One embedding call for the whole batch
+                    self.vectorstore.add_documents(
+                        [doc for _, _, doc in new_items],
+                        ids=[doc_id for doc_id, _, _ in new_items]
+                    )
+                except Exception as e:
+                    for doc_id, index, _ in new_items:
+                        results[index] = {"index": index, "id": doc_id, "status": "error", "message": str(e)}
+                    continue
+                
+                for doc_id, index, doc in new_items:
+                    if self.hybrid:
+                        self.keyword_index.add(doc_id, doc)
+                    self.faq_index.add(doc_id, doc.metadata.get("title", ""))
+                    results[index] = {"index": index, "id": doc_id, "status": "added", "message": ""}
+                
+                # The served artifact is read-only: journal the additions for the next build
+                if self.backend == "artifact" and journal:
+                    self._journal([fields[doc_id] for doc_id, _, _ in new_items])
+        
+        return results
+    
+    def _journal(self, questions: List[dict]):
+        """Journal questions added to the artifact, and forward them if this system was swapped out meanwhile"""
+        # Under the swap lock: a swap either replays this entry or happened before it
+        with _rag_system_lock:
+            append_pending(self.persist_directory, questions)
+            served = _rag_system
+        if served is not None and served is not self:
+            served.add_questions(questions, journal=False)
+    
+    def sync_export(self, json_path: str, batch_size: int = 64, dry_run: bool = False) -> dict:
+        """
+        Incrementally synchronizes the vector store with the QA JSON export.
+        The export is streamed record by record and compared with the fingerprints
+        stored in the metadata: only new or changed records are embedded, and
+        records that disappeared from the export are deleted. Questions added
+        through the API are left untouched.
+        
+        Args:
+            json_path: Path to the QA JSON export
+            batch_size: Number of documents embedded per model call
+            dry_run: Only compute the diff, without modifying the store
+            
+        Returns:
+            Counts of unchanged / added / updated / deleted records and the
+            "changed_ids" (export record IDs) affected by the sync
+        """
+        # Current state of the export documents in the store: record id -> store ids + fingerprint
+        indexed = {}
+        stored = self.vectorstore.get(include=["metadatas"])
+        for doc_id, metadata in zip(stored["ids"], stored["metadatas"]):
+            metadata = metadata or {}
+            is_export = metadata.get("source") == EXPORT_SOURCE or (
+                # Stores built before the sync existed: export records have integer IDs
+                metadata.get("source") is None and isinstance(metadata.get("id"), int)
+            )
+            if not is_export:
+                continue
+            entry = indexed.setdefault(str(metadata.get("id")), {"ids": [], "fingerprint": None})
+            entry["ids"].append(doc_id)
+            entry["fingerprint"] = metadata.get("fingerprint")
+        
+        stats = {"unchanged": 0, "added": 0, "updated": 0, "deleted": 0, "changed_ids": []}
+        seen = set()
+        batch = []
+        
+        def flush():
+            if not batch or dry_run:
+                batch.clear()
+                return
+            stale_ids = [old_id for _, _, old_ids in batch for old_id in old_ids]
+            if stale_ids:
+                self.vectorstore.delete(ids=stale_ids)
+                for old_id in stale_ids:
+                    self.keyword_index.remove(old_id)
+                    self.faq_index.remove(old_id)
+            new_ids = [f"qa-{record_id}" for record_id, _, _ in batch]
+            docs = [doc for _, doc, _ in batch]
+            self.vectorstore.add_documents(docs, ids=new_ids)
+            for doc_id, doc in zip(new_ids, docs):
+                if self.hybrid:
+                    self.keyword_index.add(doc_id, doc)
+                self.faq_index.add(doc_id, doc.metadata.get("title", ""))
+            batch.clear()
+        
+        with self._batched_writes():
+            for doc in iter_qa_documents(json_path):
+                record_id = doc.metadata.get("id")
+                if record_id is None or str(record_id) in seen:
+                    print(f"Skipping export record without ID or duplicated: {doc.metadata.get('title', '')[:60]}")
+                    continue
+                record_id = str(record_id)
+                seen.add(record_id)
+                
+                entry = indexed.get(record_id)
+                if entry and entry["fingerprint"] == doc.metadata["fingerprint"] and entry["ids"] == [f"qa-{record_id}"]:
+                    stats["unchanged"] += 1
+                    continue
+                
+                stats["updated" if entry else "added"] += 1
+                stats["changed_ids"].append(record_id)
+                batch.append((record_id, doc, entry["ids"] if entry else []))
+                if len(batch) >= batch_size:
+                    flush()
+            flush()
+                
+            # Records no longer in the export
+            removed = [record_id for record_id in indexed if record_id not in seen]
+            stale_ids = [doc_id for record_id in removed for doc_id in indexed[record_id]["ids"]]
+            if stale_ids and not dry_run:
+                self.vectorstore.delete(ids=stale_ids)
+                for doc_id in stale_ids:
+                    self.keyword_index.remove(doc_id)
+                    self.faq_index.remove(doc_id)
+        stats["deleted"] = len(removed)
+        stats["changed_ids"].extend(removed)
+        
+        return stats
+
 
-        doc_id = generated_id
+# Process-wide RAG system shared by the agent nodes and the endpoints
+_rag_system: Optional[RAGSystem] = None
+_rag_system_lock = threading.Lock()
 
-        # Remove an old document with the same ID if present
+
+def create_rag_system(index_version: Optional[str] = None, embeddings: Optional[Embeddings] = None) -> RAGSystem:
+    """Create a RAG system from the settings
+    
+    Args:
+        index_version: Artifact version to serve (artifact backend only)
+        embeddings: Already loaded embeddings to reuse
+    """
+    settings = get_settings()
+    persist_directory = {
+        "numpy": settings.numpy_directory,
+        "artifact": settings.artifacts_directory,
+    }.get(settings.vector_backend, settings.persist_directory)
+    rag_system = RAGSystem(
+        persist_directory=persist_directory,
+        embedding_model=settings.embedding_model,
+        k_docs=settings.k_docs,
+        embedding_cache_path=settings.embedding_cache_path or None,
+        embedding_cache_size=settings.embedding_cache_size,
+        hybrid=settings.hybrid_retrieval,
+        hybrid_fetch_k=settings.hybrid_fetch_k,
+        rrf_k=settings.rrf_k,
+        backend=settings.vector_backend,
+        vector_dtype=settings.vector_dtype,
+        embeddings=embeddings,
+        index_version=index_version,
+        embedding_batch_size=settings.embedding_batch_size,
+        embedding_batch_wait_ms=settings.embedding_batch_wait_ms,
+    )
+    rag_system.replay_pending()
+    return rag_system
+
+
+def init_rag_system() -> RAGSystem:
+    """Create (once) and warm up the shared RAG system from the settings"""
+    global _rag_system
+    with _rag_system_lock:
+        if _rag_system is None:
+            rag_system = create_rag_system()
+            rag_system.warm_up()
+            _rag_system = rag_system
+    return _rag_system
+
+
+def get_rag_system() -> RAGSystem:
+    """Return the shared RAG system, creating it on first use outside the API"""
+    if _rag_system is None:
+        return init_rag_system()
+    return _rag_system
+
+
+def swap_index_version(version: str, activate: bool = True) -> RAGSystem:
+    """Hot-swap the served index to another artifact version
+    
+    The new system is fully loaded (reusing the embedding model) before the
+    shared reference is replaced, so in-flight requests finish on the old
+    index and new ones start on the new index. Questions added through the
+    old system meanwhile are replayed from the journal before the swap, or
+    forwarded to the new system after it. Swapping to an older version
+    is a rollback.
+    
+    Args:
+        version: Artifact version to serve
+        activate: Also make it the active version on disk (CURRENT)
+        
+    Returns:
+        The new shared RAG system
+    """
+    global _rag_system
+    current = get_rag_system()
+    if current.backend != "artifact":
+        raise ValueError("Hot-swapping requires the artifact backend (HELPAI_VECTOR_BACKEND=artifact)")
+    
+    rag_system = create_rag_system(index_version=version, embeddings=current.embeddings)
+    if activate:
+        set_current_version(current.persist_directory, version)
+    with _rag_system_lock:
+        # Questions journaled through the old system while the new one was loading
+        added = rag_system.replay_pending()
+        _rag_system = rag_system
+    
+    # Cached answers were built from the previous index
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        answer_cache.invalidate()
+    logger.info("Now serving index %s (%d journaled questions added during the swap)", version, added)
+    return rag_system
+
+
+def reload_rag_system(changed_ids: Optional[List[str]] = None) -> RAGSystem:
+    """Reload the served store after an out-of-process sync (tools.sync_index)
+    
+    The store, BM25 and FAQ indexes are rebuilt from disk (reusing the
+    embedding model) before the shared reference is replaced, then the
+    cached answers built from the changed records are dropped.
+    
+    Args:
+        changed_ids: Export record IDs changed by the sync; None drops every
+            cached answer
+        
+    Returns:
+        The new shared RAG system
+        
+    Raises:
+        ValueError: the backend cannot be reloaded in place
+    """
+    global _rag_system
+    current = get_rag_system()
+    if current.backend == "chroma":
+        # Chroma keeps its HNSW index in memory and does not see another process' writes
+        raise ValueError("The Chroma backend cannot be reloaded in place: restart the server after a sync")
+    if current.backend == "artifact":
+        raise ValueError("The artifact backend follows its active version: use /v1/index/activate")
+    
+    rag_system = create_rag_system(embeddings=current.embeddings)
+    with _rag_system_lock:
+        _rag_system = rag_system
+    
+    answer_cache = get_answer_cache()
+    if answer_cache is not None:
+        answer_cache.invalidate(changed_ids)
+    logger.info("Vector store reloaded from %s", rag_system.persist_directory)
+    return rag_system
+
+
+async def watch_index_version(interval: float):
+    """Background task: follow the active artifact version (CURRENT) without restarting
+    
+    Lets every worker pick up a version activated by tools.build_index --activate
+    or by another worker.
+    """
+    while True:
+        await asyncio.sleep(interval)
         try:
-            self.vectorstore.delete(ids=[doc_id])
-        except Exception:
-            pass  # The ID did not exist yet
-        self.vectorstore.add_documents([doc], ids=[doc_id])
-        #self.vectorstore.persist()
\ No newline at end of file
+            rag_system = get_rag_system()
+            active = current_version(rag_system.persist_directory)
+            if active and active != rag_system.index_version:
+                logger.info("Active index changed to %s, hot-swapping", active)
+                await run_cpu_bound(swap_index_version, active, activate=False)
+        except Exception as e:
+            logger.warning("Index hot-swap failed, still serving the previous version: %s", e)
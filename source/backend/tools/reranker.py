@@ -0,0 +1,106 @@
+"""Cross-encoder reranking of retrieved documents, with a score cache"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from langchain_core.documents import Document
+
+from core.config import get_settings
+from core.metrics import RERANK_CACHE_REQUESTS, RERANK_SECONDS
+from tools.document_loader import clean_html
+from tools.embedding_cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class CrossEncoderReranker:
+    """Scores (question, document) pairs with a small multilingual cross-encoder on CPU
+
+    Scores are cached in an in-process LRU keyed by the normalized question and
+    the document content, so repeated questions only score new documents.
+    """
+
+    def __init__(self, model_name: str, max_length: int = 512, cache_size: int = 20000, model=None):
+        """
+        Args:
+            model_name: sentence-transformers cross-encoder model
+            max_length: Maximum number of tokens of a (question, document) pair
+            cache_size: Number of pair scores kept in memory
+            model: Already loaded model exposing predict(pairs) (tests, benchmarks)
+        """
+        if model is None:
+            from sentence_transformers import CrossEncoder
+            print(f"Loading reranker model: {model_name} ...")
+            model = CrossEncoder(model_name, max_length=max_length, device="cpu")
+            print("Reranker model loaded")
+        self.model = model
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, question: str, document: Document) -> str:
+        payload = f"{self.model_name}\0{normalize_text(question)}\0{document.page_content}"
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def score(self, question: str, documents: List[Document]) -> List[float]:
+        """Relevance score of each document for the question (higher is better)"""
+        keys = [self._key(question, doc) for doc in documents]
+        scores: List[Optional[float]] = [None] * len(documents)
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._cache:
+                    self._cache.move_to_end(key)
+                    scores[i] = self._cache[key]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        RERANK_CACHE_REQUESTS.labels(result="hit").inc(len(documents) - len(missing))
+        RERANK_CACHE_REQUESTS.labels(result="miss").inc(len(missing))
+        if not missing:
+            return scores
+
+        # One forward pass for all uncached pairs
+        start = time.perf_counter()
+        predicted = self.model.predict([(question, clean_html(documents[i].page_content)) for i in missing])
+        RERANK_SECONDS.observe(time.perf_counter() - start)
+        with self._lock:
+            for i, value in zip(missing, predicted):
+                scores[i] = float(value)
+                self._cache[keys[i]] = scores[i]
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return scores
+
+    def rerank(self, question: str, documents: List[Document], top_n: int) -> List[Document]:
+        """Keep the `top_n` best documents, best first, with their "rerank_score" in the metadata"""
+        if not documents:
+            return []
+        scores = self.score(question, documents)
+        ranked = sorted(zip(scores, range(len(documents))), key=lambda item: (-item[0], item[1]))[:top_n]
+        return [
+            Document(page_content=documents[i].page_content, metadata={**documents[i].metadata, "rerank_score": score}, id=documents[i].id)
+            for score, i in ranked
+        ]
+
+
+# Process-wide reranker (None when reranking is disabled)
+_reranker: Optional[CrossEncoderReranker] = None
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Optional[CrossEncoderReranker]:
+    """Return the shared reranker, loading the model on first use (None if disabled)"""
+    global _reranker
+    settings = get_settings()
+    if not settings.rerank_enabled:
+        return None
+    with _reranker_lock:
+        if _reranker is None:
+            _reranker = CrossEncoderReranker(
+                settings.rerank_model,
+                max_length=settings.rerank_max_length,
+                cache_size=settings.rerank_cache_size,
+            )
+    return _reranker
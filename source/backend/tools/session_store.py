@@ -0,0 +1,184 @@
+"""Server-side conversation sessions: in-memory LRU / TTL store in front of a persistent backend"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import List, Optional
+
+from core.config import get_settings
+from tools.executor import run_cpu_bound
+
+logger = logging.getLogger(__name__)
+
+_SESSION_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+@dataclass
+class Session:
+    """A conversation: rolling summary of the old turns and the recent messages"""
+    id: str
+    profile: Optional[dict] = None
+    # Messages not folded into the summary yet, oldest first ({"role": "user" | "agent", "content": ...})
+    messages: List[dict] = field(default_factory=list)
+    summary: str = ""
+    # Number of messages folded into the summary so far
+    summarized_count: int = 0
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "messages": [dict(message) for message in self.messages]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Session":
+        return cls(**data)
+
+
+class SessionBackend(ABC):
+    """Persistent storage of the sessions (the in-memory store is a cache in front of it)"""
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[dict]:
+        """Stored session data, or None if the session does not exist"""
+
+    @abstractmethod
+    def save(self, data: dict):
+        """Store (or replace) the data of a session"""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Remove a session (no-op if it does not exist)"""
+
+
+class FileSessionBackend(SessionBackend):
+    """One JSON file per session in a local directory"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.json")
+
+    def load(self, session_id: str) -> Optional[dict]:
+        try:
+            with open(self._path(session_id), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Unreadable session file %s: %s", session_id, e)
+            return None
+
+    def save(self, data: dict):
+        # Write then rename, so a crash never leaves a truncated file
+        path = self._path(data["id"])
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temporary, path)
+
+    def delete(self, session_id: str):
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+
+class SessionStore:
+    """Bounded LRU / TTL cache of the sessions, written through to an optional backend
+
+    Sessions are mutated from the event loop only; the backend calls run in
+    the shared thread pool.
+    """
+
+    def __init__(self, backend: Optional[SessionBackend] = None, max_size: int = 1000, ttl_seconds: float = 86400):
+        """
+        Args:
+            backend: Persistent storage (None keeps the sessions in memory only)
+            max_size: Maximum number of sessions kept in memory (least recently used are evicted)
+            ttl_seconds: Sessions idle for longer than this are dropped
+        """
+        self.backend = backend
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _expired(self, session: Session) -> bool:
+        return time.time() - session.updated_at > self.ttl_seconds
+
+    def _remember(self, session: Session):
+        with self._lock:
+            self._sessions[session.id] = session
+            self._sessions.move_to_end(session.id)
+            while len(self._sessions) > self.max_size:
+                self._sessions.popitem(last=False)
+
+    async def create(self, profile: Optional[dict] = None) -> Session:
+        """Start a new, empty session"""
+        session = Session(id=uuid.uuid4().hex, profile=profile)
+        await self.save(session)
+        return session
+
+    async def get(self, session_id: str) -> Optional[Session]:
+        """Return a session from memory, or from the backend, or None if unknown or expired"""
+        if not _SESSION_ID_RE.match(session_id or ""):
+            return None
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+        if session is None and self.backend is not None:
+            data = await run_cpu_bound(self.backend.load, session_id)
+            session = Session.from_dict(data) if data else None
+        if session is None:
+            return None
+        if self._expired(session):
+            await self.delete(session_id)
+            return None
+        self._remember(session)
+        return session
+
+    async def save(self, session: Session):
+        """Keep the session in memory and write it to the backend"""
+        session.updated_at = time.time()
+        self._remember(session)
+        if self.backend is not None:
+            await run_cpu_bound(self.backend.save, session.to_dict())
+
+    async def delete(self, session_id: str) -> bool:
+        """Drop a session; returns whether it existed in memory"""
+        with self._lock:
+            existed = self._sessions.pop(session_id, None) is not None
+        if self.backend is not None and _SESSION_ID_RE.match(session_id or ""):
+            await run_cpu_bound(self.backend.delete, session_id)
+        return existed
+
+
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    """Return the process-wide session store"""
+    global _session_store
+    with _session_store_lock:
+        if _session_store is None:
+            settings = get_settings()
+            backend = FileSessionBackend(settings.session_directory) if settings.session_directory else None
+            _session_store = SessionStore(
+                backend=backend,
+                max_size=settings.session_max_size,
+                ttl_seconds=settings.session_ttl_seconds,
+            )
+    return _session_store
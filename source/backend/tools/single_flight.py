@@ -0,0 +1,78 @@
+"""Single-flight coalescing: concurrent callers with the same key share one execution"""
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from core.config import get_settings
+from core.metrics import COALESCED_REQUESTS, INFLIGHT_EXECUTIONS
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Runs at most one execution per key at a time; later callers await its result
+
+    The execution is an independent task awaited through asyncio.shield, so a
+    caller being cancelled (client disconnect) never cancels the work the
+    other callers are waiting for. Used from the event loop only.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def in_flight(self, key: str) -> Optional[asyncio.Task]:
+        """The running execution for a key, if any"""
+        return self._flights.get(key)
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+            INFLIGHT_EXECUTIONS.dec()
+        # Mark the exception as retrieved when every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    async def join(self, task: asyncio.Task) -> Any:
+        """Await a running execution without being able to cancel it"""
+        COALESCED_REQUESTS.inc()
+        return await asyncio.shield(task)
+
+    async def run(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Run func() for the key, or join the execution already running for it
+
+        Args:
+            key: Identity of the work (callers with the same key get the same result)
+            func: Coroutine function starting the work
+
+        Returns:
+            (result, whether it was shared from another caller's execution)
+        """
+        task = self._flights.get(key)
+        if task is not None:
+            logger.debug("Joining the in-flight execution of %r", key[:80])
+            return await self.join(task), True
+
+        task = asyncio.ensure_future(func())
+        self._flights[key] = task
+        INFLIGHT_EXECUTIONS.inc()
+        task.add_done_callback(lambda done: self._done(key, done))
+        return await asyncio.shield(task), False
+
+
+_single_flight: Optional[SingleFlight] = None
+_single_flight_lock = threading.Lock()
+
+
+def get_single_flight() -> Optional[SingleFlight]:
+    """Return the process-wide single-flight group, or None if coalescing is disabled"""
+    global _single_flight
+    if not get_settings().coalescing_enabled:
+        return None
+    with _single_flight_lock:
+        if _single_flight is None:
+            _single_flight = SingleFlight()
+    return _single_flight
@@ -0,0 +1,81 @@
+"""Incremental sync of the vector store with the help-center QA JSON export
+
+Usage (from source/backend):
+    python -m tools.sync_index ../database/samples/QA_clean.json [--dry-run] [--reload-url URL]
+
+A running server does not see the changes until it reloads its store:
+pass --reload-url http://<host>/v1/index/reload (numpy backend), or restart
+it (chroma backend).
+"""
+import argparse
+import time
+from itertools import islice
+
+import httpx
+
+from core.config import get_settings
+from tools.document_loader import iter_qa_documents
+from tools.rag_system import EmptyVectorStoreError, RAGSystem
+
+
+def first_records(json_path: str, count: int) -> list:
+    """First documents of the export, one per record ID, to create an empty store with"""
+    documents = {}
+    for doc in islice(iter_qa_documents(json_path), count):
+        record_id = doc.metadata.get("id")
+        if record_id is not None:
+            documents.setdefault(str(record_id), doc)
+    return list(documents.values())
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Re-embed only the new or changed QA records")
+    parser.add_argument("json_path", help="Path to the QA JSON export")
+    parser.add_argument("--backend", choices=["chroma", "numpy"], default=settings.vector_backend)
+    parser.add_argument("--persist-directory", default=None, help="Store directory (defaults to the backend's directory from the settings)")
+    parser.add_argument("--batch-size", type=int, default=settings.ingest_batch_size)
+    parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+    parser.add_argument("--reload-url", default=None, help="Reload endpoint of the running server (e.g. http://localhost:8000/v1/index/reload)")
+    args = parser.parse_args()
+    if args.persist_directory is None:
+        args.persist_directory = settings.numpy_directory if args.backend == "numpy" else settings.persist_directory
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+
+    options = dict(
+        persist_directory=args.persist_directory,
+        embedding_model=settings.embedding_model,
+        hybrid=False,
+        backend=args.backend,
+        vector_dtype=settings.vector_dtype,
+    )
+    start = time.perf_counter()
+    try:
+        rag_system = RAGSystem(**options)
+    except EmptyVectorStoreError:
+        if args.dry_run:
+            print("Vector store is empty: every record would be added")
+            return
+        # First sync: create the store with the first batch, the sync streams in the rest
+        documents = first_records(args.json_path, args.batch_size)
+        if not documents:
+            print(f"No records with an ID in {args.json_path}")
+            return
+        rag_system = RAGSystem(documents=documents, **options)
+
+    stats = rag_system.sync_export(args.json_path, batch_size=args.batch_size, dry_run=args.dry_run)
+    prefix = "[dry-run] " if args.dry_run else ""
+    print(
+        f"{prefix}Sync done in {time.perf_counter() - start:.1f}s: "
+        f"{stats['added']} added, {stats['updated']} updated, "
+        f"{stats['deleted']} deleted, {stats['unchanged']} unchanged"
+    )
+
+    if args.reload_url and not args.dry_run:
+        response = httpx.post(args.reload_url, json={"changed_ids": stats["changed_ids"]}, timeout=300)
+        print(f"Server reload: {response.json().get('message')}")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,8 @@ export function ChatBot(props: ChatProps) {
   const [showConfirmation, setShowConfirmation] = useState(false)
   const [isChatDisabled, setIsChatDisabled] = useState(false)
   const messagesEndRef = useRef<HTMLDivElement>(null)
+  // Session côté serveur : seul le nouveau message est envoyé à chaque tour
+  const sessionIdRef = useRef<string | null>(null)
   
   const { createHelpRequest } = useHelpRequest()
 
@@ -67,6 +69,40 @@ export function ChatBot(props: ChatProps) {
     setShowConfirmation(false)
   }
 
+  const askInSession = async (content: string) => {
+    if (!sessionIdRef.current) {
+      const created = await fetch('http://localhost:8000/v1/sessions/', {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({})
+      })
+      if (!created.ok) {
+        throw new Error(`Erreur API: ${created.status}`)
+      }
+      sessionIdRef.current = (await created.json()).session_id
+    }
+
+    // Appel API (multi-agent, historique conservé par le serveur)
+    const response = await fetch(`http://localhost:8000/v1/sessions/${sessionIdRef.current}/messages`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ content })
+    })
+
+    if (response.status === 404) {
+      return { status: '404' }
+    }
+    if (!response.ok) {
+      throw new Error(`Erreur API: ${response.status}`)
+    }
+
+    return response.json()
+  }
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     if (!input.trim() || isChatDisabled) return
@@ -83,29 +119,12 @@ export function ChatBot(props: ChatProps) {
     setIsLoading(true)
     
     try {
-      // Préparer les messages pour l'API (conversion du format)
-      const apiMessages = [...messages, userMessage].map(msg => ({
-        id: msg.id,
-        role: msg.role === 'assistant' ? 'agent' : msg.role, // Convertir 'assistant' en 'agent'
-        content: msg.content
-      }))
-
-      // Appel API (using new multi-agent endpoint)
-      const response = await fetch('http://localhost:8000/v1/ask_agent/', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          messages: apiMessages
-        })
-      })
-
-      if (!response.ok) {
-        throw new Error(`Erreur API: ${response.status}`)
+      let data = await askInSession(currentInput)
+      if (data.status === '404') {
+        // Session expirée : on en ouvre une nouvelle
+        sessionIdRef.current = null
+        data = await askInSession(currentInput)
       }
-
-      const data = await response.json()
       
       // Créer le message de réponse de l'assistant
       const assistantMessage: Message = {